@@ -0,0 +1,8 @@
+#!/bin/bash
+# Builds the stylesheet, then collects the static files into timers/static,
+# content hashed and precompressed (see timers/timers/storage.py)
+set -euo pipefail
+
+pnpm run css --minify
+cd timers
+MZT_DEBUG=0 uv run manage.py collectstatic --noinput --clear
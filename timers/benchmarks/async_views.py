@@ -0,0 +1,155 @@
+"""
+Concurrent visitors polling and toggling their run, requests per second and
+latency percentiles, served by the sync views through WSGI with a thread per
+visitor, then by the async views through ASGI on a single event loop.
+
+    python -m benchmarks.async_views [--visitors 16] [--requests 20]
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+MODES = {"wsgi": "0", "asgi": "1"}
+
+
+def measure(database: Path, mode: str, visitors: int, requests: int):
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "website.settings")
+    django.setup()
+
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import AsyncClient, Client
+    from django.urls import reverse
+    from django.utils import timezone
+
+    from timers.models import TimerSequence
+    from timers.sessions import SessionStore
+
+    settings.DATABASES["default"]["NAME"] = database
+    settings.ALLOWED_HOSTS = ["testserver"]
+    # no internal address, the debug toolbar stays off
+    settings.INTERNAL_IPS = []
+    call_command("migrate", verbosity=0)
+
+    # a session, a sequence and a running run per visitor
+    visits: list[tuple[str, str]] = []
+    for i in range(visitors):
+        session = SessionStore()
+        session.create()
+        sequence = TimerSequence.create(
+            name=f"visitor {i}",
+            timers=[timedelta(minutes=25), timedelta(minutes=5)],
+            session_key=session.session_key,  # type: ignore
+            now=timezone.now(),
+        )
+        run = sequence.run(timezone.now(), session.session_key)  # type: ignore
+        url = reverse(
+            "detail_sequence_run",
+            kwargs={"sequence_id": sequence.pk, "run_id": run.pk},
+        )
+        visits.append((session.session_key, url))  # type: ignore
+    connection.close()
+
+    latencies: list[float] = []
+
+    def visit(client: Client, url: str):
+        # mostly polls, a toggle every fifth request
+        for i in range(requests):
+            started = time.perf_counter()
+            response = client.post(url) if i % 5 == 4 else client.get(url)
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.status_code
+        connection.close()
+
+    async def avisit(client: AsyncClient, url: str):
+        for i in range(requests):
+            started = time.perf_counter()
+            response = await (client.post(url) if i % 5 == 4 else client.get(url))
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.status_code
+
+    def client(cls: type[Client] | type[AsyncClient], session_key: str):
+        client = cls()
+        client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+        return client
+
+    started = time.perf_counter()
+    if mode == "asgi":
+
+        async def visit_all():
+            await asyncio.gather(
+                *(avisit(client(AsyncClient, key), url) for key, url in visits)
+            )
+
+        asyncio.run(visit_all())
+    else:
+        workers = [
+            threading.Thread(target=visit, args=(client(Client, key), url))
+            for key, url in visits
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1e3,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1e3,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--visitors", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--mode", choices=MODES)
+    args = parser.parse_args()
+
+    if args.mode is not None:
+        with tempfile.TemporaryDirectory() as directory:
+            results = measure(
+                Path(directory) / "db.sqlite3", args.mode, args.visitors, args.requests
+            )
+        for name, value in results.items():
+            print(f"{name:>24}: {value:,.3f}")
+        return
+
+    # the views are picked when the URLs are loaded, each mode runs in its own
+    # process, both with the production database profile
+    for mode, async_views in MODES.items():
+        print(mode)
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.async_views",
+                f"--visitors={args.visitors}",
+                f"--requests={args.requests}",
+                f"--mode={mode}",
+            ],
+            env={
+                **os.environ,
+                "MZT_ASYNC_VIEWS": async_views,
+                "MZT_DATABASE_PROFILE": "production",
+            },
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Size and decoding cost of the run durations, comma separated milliseconds
+against varint packed ones.
+
+    python -m benchmarks.durations_encoding [--runs 10000] [--timers 8]
+"""
+
+import argparse
+import random
+import time
+from datetime import timedelta
+from typing import Callable
+
+from timers.lib.packing import PackedDurations
+
+
+def encode_text(durations: list[timedelta]) -> str:
+    return ",".join(str(int(x / timedelta(milliseconds=1))) for x in durations)
+
+
+def decode_text(value: str) -> list[timedelta]:
+    return [timedelta(milliseconds=int(x)) for x in value.split(",")]
+
+
+def elapsed_us(runs: int, work: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    work()
+    return (time.perf_counter() - started) / runs * 1e6
+
+
+def measure(runs: int, timers: int) -> dict[str, float]:
+    rng = random.Random(20250501)
+    durations = [
+        [timedelta(minutes=rng.choice([5, 15, 25, 50])) for _ in range(timers)]
+        for _ in range(runs)
+    ]
+
+    texts = [encode_text(x) for x in durations]
+    blobs = [PackedDurations.from_durations(x).packed for x in durations]
+    assert all(PackedDurations(b) == decode_text(t) for t, b in zip(texts, blobs))
+
+    return {
+        "text_bytes_per_row": sum(len(x) for x in texts) / runs,
+        "packed_bytes_per_row": sum(len(x) for x in blobs) / runs,
+        # loading a listing, the durations are never read
+        "text_load_us_per_row": elapsed_us(
+            runs, lambda: [decode_text(x) for x in texts]
+        ),
+        "packed_load_us_per_row": elapsed_us(
+            runs, lambda: [PackedDurations(x) for x in blobs]
+        ),
+        # loading the rows then reading every duration
+        "text_read_us_per_row": elapsed_us(
+            runs, lambda: [sum(decode_text(x), timedelta()) for x in texts]
+        ),
+        "packed_read_us_per_row": elapsed_us(
+            runs, lambda: [sum(PackedDurations(x), timedelta()) for x in blobs]
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10_000)
+    parser.add_argument("--timers", type=int, default=8)
+    args = parser.parse_args()
+
+    for name, value in measure(args.runs, args.timers).items():
+        print(f"{name:>24}: {value:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
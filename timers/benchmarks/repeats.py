@@ -0,0 +1,81 @@
+"""
+A pomodoro repeated N times, as expanded timers against a `Repeat`: memory of
+the sequence and time to build and snapshot it in the middle of the cycles.
+
+    python -m benchmarks.repeats [--cycles 10 1000 100000]
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable
+
+from timers.lib.timerange import DateTimePeriod, PausableTimerSequence, Repeat
+
+POMODORO = [timedelta(minutes=25), timedelta(minutes=5)]
+
+
+def measure_one(build: Callable[[], PausableTimerSequence], now: datetime):
+    tracemalloc.start()
+    started = time.perf_counter()
+    sequence = build()
+    built = time.perf_counter()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    snapshotted = time.perf_counter()
+    sequence.snapshot(now)
+    ended = time.perf_counter()
+
+    return size, (built - started) * 1e6, (ended - snapshotted) * 1e6
+
+
+def measure(cycles: int) -> dict[str, float]:
+    started_at = datetime.fromisoformat("2025-05-01T10:00:00Z")
+    now = started_at + cycles * sum(POMODORO, timedelta()) / 2
+    pauses = [
+        DateTimePeriod(
+            started_at + timedelta(hours=i, seconds=7),
+            started_at + timedelta(hours=i, seconds=30),
+        )
+        for i in range(10)
+    ]
+    repeat = Repeat(0, len(POMODORO), cycles)
+
+    results: dict[str, float] = {}
+    for name, build in [
+        (
+            "expanded",
+            lambda: PausableTimerSequence.from_timers(
+                started_at, list(repeat.expand(POMODORO)), pauses
+            ),
+        ),
+        (
+            "repeat",
+            lambda: PausableTimerSequence.from_timers(
+                started_at, POMODORO, pauses, repeat
+            ),
+        ),
+    ]:
+        size, build_us, snapshot_us = measure_one(build, now)
+        results[f"{name}_bytes"] = size
+        results[f"{name}_build_us"] = build_us
+        results[f"{name}_snapshot_us"] = snapshot_us
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cycles", type=int, nargs="+", default=[10, 1000, 100_000])
+    args = parser.parse_args()
+
+    for cycles in args.cycles:
+        print(f"{cycles} cycles")
+        for name, value in measure(cycles).items():
+            print(f"{name:>24}: {value:,.1f}")
+
+
+if __name__ == "__main__":
+    main()
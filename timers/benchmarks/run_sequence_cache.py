@@ -0,0 +1,77 @@
+"""
+Projection of a run viewed repeatedly, its sequence built from the pauses on
+every view against kept in the `PausableTimerSequenceCache`, per count of
+pauses. In memory, the pauses query saved on a hit is not counted.
+
+    python -m benchmarks.run_sequence_cache [--views 2000]
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+PAUSES = [0, 10, 100, 1000]
+
+
+def elapsed_us(views: int, work: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    for _ in range(views):
+        work()
+    return (time.perf_counter() - started) / views * 1e6
+
+
+def measure(views: int) -> dict[str, float]:
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "website.settings")
+    django.setup()
+
+    from timers.lib.projections import PausableTimerSequenceCache, TimerProjection
+    from timers.models import TimerSequencePause, TimerSequenceRun
+
+    started_at = datetime.fromisoformat("2025-05-01T10:00:00Z")
+    results: dict[str, float] = {}
+    for count in PAUSES:
+        pauses = [
+            TimerSequencePause(
+                started_at=started_at + timedelta(seconds=2 * i + 1),
+                ended_at=started_at + timedelta(seconds=2 * i + 2),
+            )
+            for i in range(count)
+        ]
+        run = TimerSequenceRun(
+            pk=1,
+            started_at=started_at,
+            timer_sequence_durations=[timedelta(minutes=25), timedelta(minutes=5)] * 4,
+        )
+        run.loaded_pauses = pauses
+        now = started_at + timedelta(minutes=20)
+        cache = PausableTimerSequenceCache()
+
+        results[f"built_us_{count}_pauses"] = elapsed_us(
+            views,
+            lambda: TimerProjection.from_timer_sequence_run(
+                now=now, sequence_run=run, pauses=run.get_pauses()
+            ),
+        )
+        results[f"cached_us_{count}_pauses"] = elapsed_us(
+            views,
+            lambda: TimerProjection.from_cached_timer_sequence_run(now, run, cache),
+        )
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--views", type=int, default=2000)
+    args = parser.parse_args()
+
+    for name, value in measure(args.views).items():
+        print(f"{name:>24}: {value:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
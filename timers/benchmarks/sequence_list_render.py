@@ -0,0 +1,78 @@
+"""
+Rendering of the sequences list, every card rendered against every card
+served from the fragment cache.
+
+    python -m benchmarks.sequence_list_render [--cards 25] [--timers 100]
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "website.settings")
+django.setup()
+
+from django.core.cache import caches  # noqa: E402
+from django.template.loader import render_to_string  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from timers.models import TimerSequence, TimerSequenceDuration  # noqa: E402
+
+
+def build_sequences(cards: int, timers: int) -> list[TimerSequence]:
+    updated_at = datetime.fromisoformat("2025-05-01T10:00:00Z")
+    sequences: list[TimerSequence] = []
+    for pk in range(1, cards + 1):
+        sequence = TimerSequence(pk=pk, name=f"sequence {pk}", updated_at=updated_at)
+        sequence.preview_durations = [  # type: ignore
+            TimerSequenceDuration(index=i, duration=timedelta(minutes=i % 50 + 1))
+            for i in range(timers)
+        ]
+        sequences.append(sequence)
+
+    return sequences
+
+
+def measure(cards: int, timers: int, rounds: int) -> dict[str, float]:
+    request = RequestFactory().get("/")
+    context = {"sequences": build_sequences(cards, timers), "is_first_page": True}
+    fragments = caches["template_fragments"]
+
+    def render() -> str:
+        return render_to_string("sequences/list.html", context, request=request)
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fragments.clear()
+        render()
+    cold = (time.perf_counter() - started) / rounds
+
+    render()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        render()
+    warm = (time.perf_counter() - started) / rounds
+
+    return {
+        "uncached_ms_per_page": cold * 1e3,
+        "cached_ms_per_page": warm * 1e3,
+        "speedup": cold / warm,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cards", type=int, default=25)
+    parser.add_argument("--timers", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    for name, value in measure(args.cards, args.timers, args.rounds).items():
+        print(f"{name:>24}: {value:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
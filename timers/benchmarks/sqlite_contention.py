@@ -0,0 +1,117 @@
+"""
+Concurrent pause toggles against a SQLite file, toggles per second and
+"database is locked" errors, for each database profile.
+
+    python -m benchmarks.sqlite_contention [--threads 8] [--seconds 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+PROFILES = ["development", "production"]
+
+
+def measure(database: Path, threads: int, seconds: float) -> dict[str, float]:
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "website.settings")
+    django.setup()
+
+    from django.conf import settings
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.core.management import call_command
+    from django.db import OperationalError, connection, transaction
+    from django.utils import timezone
+
+    from timers.models import TimerSequence, TimerSequenceRun
+
+    settings.DATABASES["default"]["NAME"] = database
+    call_command("migrate", verbosity=0)
+
+    session = SessionStore()
+    session.create()
+    sequence = TimerSequence.create(
+        name="contention",
+        timers=[timedelta(minutes=25), timedelta(minutes=5)],
+        session_key=session.session_key,  # type: ignore
+        now=timezone.now(),
+    )
+    runs = [sequence.run(timezone.now(), session.session_key) for _ in range(threads)]  # type: ignore
+    connection.close()
+
+    toggles = [0] * threads
+    errors = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def toggle(i: int):
+        # one visitor toggling their own run, like `detail_sequence_run`
+        while time.perf_counter() < deadline:
+            try:
+                with transaction.atomic():
+                    run = TimerSequenceRun.objects.with_pauses().get(pk=runs[i].pk)
+                    run.toggle(timezone.now())
+                toggles[i] += 1
+            except OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                errors[i] += 1
+        connection.close()
+
+    workers = [threading.Thread(target=toggle, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    attempts = sum(toggles) + sum(errors)
+    return {
+        "toggles_per_second": sum(toggles) / elapsed,
+        "lock_errors": sum(errors),
+        "lock_error_rate": sum(errors) / attempts if attempts else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--profile", choices=PROFILES)
+    args = parser.parse_args()
+
+    if args.profile is not None:
+        with tempfile.TemporaryDirectory() as directory:
+            results = measure(
+                Path(directory) / "db.sqlite3", args.threads, args.seconds
+            )
+        for name, value in results.items():
+            print(f"{name:>24}: {value:,.3f}")
+        return
+
+    # settings are read once per process, each profile runs in its own
+    for profile in PROFILES:
+        print(profile)
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.sqlite_contention",
+                f"--threads={args.threads}",
+                f"--seconds={args.seconds}",
+                f"--profile={profile}",
+            ],
+            env={**os.environ, "MZT_DATABASE_PROFILE": profile},
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Samples of a run's history, one `snapshot` per instant against one
+`snapshot_many` sweep, per count of timers.
+
+    python -m benchmarks.timeline [--samples 1000]
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from timers.lib.timerange import DateTimePeriod, PausableTimerSequence
+
+TIMERS = [8, 100, 1000]
+
+
+def measure(samples: int) -> dict[str, float]:
+    started_at = datetime.fromisoformat("2025-05-01T10:00:00Z")
+    results: dict[str, float] = {}
+    for count in TIMERS:
+        durations = [timedelta(minutes=25), timedelta(minutes=5)] * (count // 2)
+        pauses = [
+            DateTimePeriod(
+                started_at + timedelta(minutes=30 * i, seconds=7),
+                started_at + timedelta(minutes=30 * i, seconds=37),
+            )
+            for i in range(count // 4)
+        ]
+        sequence = PausableTimerSequence.from_timers(started_at, durations, pauses)
+        step = sum(durations, timedelta()) / samples
+        nows = [started_at + i * step for i in range(samples)]
+
+        started = time.perf_counter()
+        snapshots = [sequence.snapshot(x) for x in nows]
+        snapshotted = time.perf_counter()
+        timeline = sequence.snapshot_many(nows)
+        swept = time.perf_counter()
+        assert len(snapshots) == len(timeline)
+
+        results[f"snapshots_ms_{count}_timers"] = (snapshotted - started) * 1e3
+        results[f"snapshot_many_ms_{count}_timers"] = (swept - snapshotted) * 1e3
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=1000)
+    args = parser.parse_args()
+
+    for name, value in measure(args.samples).items():
+        print(f"{name:>30}: {value:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
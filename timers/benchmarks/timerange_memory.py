@@ -0,0 +1,77 @@
+"""
+Memory footprint of the projections held for live runs.
+
+    python -m benchmarks.timerange_memory [--runs 10000]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from timers.lib.timerange import DateTimePeriod, PausableTimerSequence
+
+POMODORO = [timedelta(minutes=25), timedelta(minutes=5)] * 4
+
+
+def build_run(index: int) -> PausableTimerSequence:
+    started_at = datetime.fromisoformat("2025-05-01T10:00:00Z") + timedelta(
+        seconds=index
+    )
+    pauses = [
+        DateTimePeriod(
+            started_at + timedelta(minutes=10 * i, seconds=7),
+            started_at + timedelta(minutes=10 * i, seconds=7 + i + 1),
+        )
+        for i in range(6)
+    ]
+
+    return PausableTimerSequence.from_timers(started_at, POMODORO, pauses)
+
+
+def measure(runs: int) -> dict[str, float]:
+    now = datetime.fromisoformat("2025-05-01T11:00:00Z")
+
+    started = time.perf_counter()
+    sequences = [build_run(i) for i in range(runs)]
+    built = time.perf_counter()
+    snapshots = [x.snapshot(now) for x in sequences]
+    snapshotted = time.perf_counter()
+    del sequences, snapshots
+
+    gc.collect()
+    tracemalloc.start()
+
+    sequences = [build_run(i) for i in range(runs)]
+    sequences_size, _ = tracemalloc.get_traced_memory()
+    sequences_blocks = sum(
+        x.count for x in tracemalloc.take_snapshot().statistics("filename")
+    )
+    snapshots = [x.snapshot(now) for x in sequences]
+    total_size, peak = tracemalloc.get_traced_memory()
+
+    tracemalloc.stop()
+    assert len(snapshots) == runs
+
+    return {
+        "bytes_per_run": sequences_size / runs,
+        "blocks_per_run": sequences_blocks / runs,
+        "snapshot_bytes_per_run": (total_size - sequences_size) / runs,
+        "peak_mb": peak / 1024 / 1024,
+        "build_us_per_run": (built - started) / runs * 1e6,
+        "snapshot_us_per_run": (snapshotted - built) / runs * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10_000)
+    args = parser.parse_args()
+
+    for name, value in measure(args.runs).items():
+        print(f"{name:>24}: {value:,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
+const RUN = '.mzt-run';
 const DATA = '#mzt-data';
 const CONTAINER = '.mzt-container';
 const ARC_CONTAINER = '.mzt-arc-container';
 const TIMER = '.mzt-time';
 const PAST_TIMERS = '.mzt-timers-past';
 const FUTURE_TIMERS = '.mzt-timers-future';
+// asks the run view for the timer block only
+const FRAGMENT_HEADER = 'Mzt-Fragment';
+
+// bumped by every countdown, an older one stops at its next tick
+let generation = 0;
 
 /** @param {number} ms */
 function wait(ms) {
@@ -43,9 +49,10 @@ function formatTimer(duration) {
 }
 
 async function countdown() {
+  const current = ++generation;
   let now = Date.now();
 
-  /** @type {{ state: 'running' | 'paused' | 'ended'; remainingTime: number; totalRemainingTime: number; currentTimer: number | undefined; pastTimers: number[]; futureTimers: number[] } | null} */
+  /** @type {{ state: 'running' | 'paused' | 'ended'; remainingTime: number; totalRemainingTime: number | null; currentTimer: number | undefined; pastTimers: number[]; futureTimers: number[]; hiddenFutureTimers: number | null } | null} */
   const timer = toJson(document.querySelector(DATA)?.textContent);
 
   if (!timer || timer.state === 'ended' || timer.state === 'paused') return;
@@ -53,16 +60,27 @@ async function countdown() {
   let isEnded = false;
   while (!isEnded) {
     await wait(200);
+    if (current !== generation) return;
+
     const newNow = Date.now();
     const ellapsed = newNow - now;
 
     timer.remainingTime = timer.remainingTime - ellapsed;
-    timer.totalRemainingTime = Math.max(timer.totalRemainingTime - ellapsed, 0);
+    // null when the sequence repeats indefinitely
+    if (timer.totalRemainingTime !== null) {
+      timer.totalRemainingTime = Math.max(timer.totalRemainingTime - ellapsed, 0);
+    }
 
     if (timer.remainingTime <= 0) {
       if (timer.currentTimer) timer.pastTimers.push(timer.currentTimer);
       timer.currentTimer = timer.futureTimers.shift();
 
+      // only the first future timers are listed, the page lists the next ones
+      if (!timer.currentTimer && timer.hiddenFutureTimers !== 0) {
+        await refresh();
+        return;
+      }
+
       if (!timer.currentTimer) {
         isEnded = true;
       }
@@ -107,4 +125,83 @@ async function countdown() {
   document.querySelector(CONTAINER)?.classList.add('opacity-50');
 }
 
+/**
+ * Replaces the timer block by `html` and restarts the countdown from it.
+ * @param {string} html
+ */
+function swap(html) {
+  const $template = document.createElement('template');
+  $template.innerHTML = html;
+
+  const $next = $template.content.querySelector(RUN);
+  const $run = document.querySelector(RUN);
+  if (!$next || !$run) return window.location.reload();
+
+  $run.replaceWith($next);
+  countdown().catch(console.error);
+}
+
+/** Fetches the timer block of the page again. */
+async function refresh() {
+  const response = await fetch(window.location.href, {
+    headers: { [FRAGMENT_HEADER]: '1' },
+  });
+  if (!response.ok) return window.location.reload();
+
+  swap(await response.text());
+}
+
+/**
+ * Toggles the run without leaving the page, the view answers with the timer
+ * block only. The page is reloaded when the request fails: the toggle may
+ * have been applied already, submitting the form again would revert it.
+ */
+function toggleInPlace() {
+  document.addEventListener('submit', async (event) => {
+    const $form = event.target;
+    if (!($form instanceof HTMLFormElement) || !$form.closest(RUN)) return;
+
+    event.preventDefault();
+    try {
+      const response = await fetch($form.action, {
+        method: 'POST',
+        body: new FormData($form),
+        headers: { [FRAGMENT_HEADER]: '1' },
+      });
+      if (!response.ok) throw new Error(`toggle failed with ${response.status}`);
+
+      swap(await response.text());
+    } catch (e) {
+      console.error(e);
+      window.location.reload();
+    }
+  });
+}
+
+/**
+ * Refreshes the timer block when the run is toggled from somewhere else,
+ * timer boundaries are already handled by the countdown.
+ */
+function listen() {
+  /** @type {HTMLElement | null} */
+  const $container = document.querySelector(CONTAINER);
+  const url = $container?.dataset.eventsUrl;
+  if (!url || typeof EventSource === 'undefined') return;
+
+  const source = new EventSource(url);
+  source.addEventListener('state', (event) => {
+    /** @type {{ state: string } | null} */
+    const next = toJson(event.data);
+    // read again, the block is swapped by the toggles of this page
+    /** @type {{ state: string } | null} */
+    const timer = toJson(document.querySelector(DATA)?.textContent);
+    if (!next || !timer || next.state === timer.state) return;
+    if (next.state === 'ended' && timer.state === 'running') return;
+
+    refresh().catch(console.error);
+  });
+}
+
 countdown().catch(console.error);
+toggleInPlace();
+listen();
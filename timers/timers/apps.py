@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.contrib.staticfiles.apps import StaticFilesConfig as BaseStaticFilesConfig
 
 
 class TimersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "timers"
+
+    def ready(self):
+        # connects the SQL metrics to the connections opened from now on
+        from timers.lib import metrics  # noqa: F401
+
+
+class StaticFilesConfig(BaseStaticFilesConfig):
+    # the tailwind input is built into css/main.css, its bare `@import` would
+    # not resolve when hashed
+    ignore_patterns = [*BaseStaticFilesConfig.ignore_patterns, "tailwind.css"]
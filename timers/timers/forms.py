@@ -1,8 +1,13 @@
-from typing import TypeVar
+from datetime import timedelta
+from typing import Any, TypeVar
 
 from django import forms
+from django.utils.translation import gettext_lazy as _
 
 import timers.lib.classes as c
+from timers.lib.timerange import MAX_TOTAL_DURATION, Repeat
+
+MAX_REPEAT_COUNT = 10_000
 
 _BaseFormT = TypeVar("_BaseFormT", bound=forms.BaseForm)
 
@@ -30,3 +35,88 @@ class TimerSequenceForm(forms.Form):
         max_length=2048,
         widget=forms.TextInput(attrs={"class": c.input()}),
     )
+
+    # timers are numbered from 1 in the form, both ends included
+    repeat_from = forms.IntegerField(
+        label=_("repeat from timer"),
+        required=False,
+        min_value=1,
+        widget=forms.NumberInput(attrs={"class": c.input()}),
+    )
+    repeat_to = forms.IntegerField(
+        label=_("to timer"),
+        required=False,
+        min_value=1,
+        widget=forms.NumberInput(attrs={"class": c.input()}),
+    )
+    repeat_count = forms.IntegerField(
+        label=_("times, empty for indefinitely"),
+        required=False,
+        min_value=1,
+        max_value=MAX_REPEAT_COUNT,
+        widget=forms.NumberInput(attrs={"class": c.input()}),
+    )
+
+    def clean(self) -> dict[str, Any]:
+        cleaned_data = super().clean() or {}
+        start = cleaned_data.get("repeat_from")
+        end = cleaned_data.get("repeat_to")
+
+        if (start is None) != (end is None):
+            self.add_error(
+                "repeat_to" if end is None else "repeat_from",
+                _("both timers of a repeat are needed"),
+            )
+        elif start is None and cleaned_data.get("repeat_count") is not None:
+            self.add_error("repeat_count", _("the repeated timers are needed"))
+        elif start is not None and end is not None and start > end:
+            self.add_error("repeat_to", _("a repeat ends after it starts"))
+
+        return cleaned_data
+
+    def repeat(self, timers: list[timedelta]) -> Repeat | None:
+        """
+        The repeat of a sequence of `timers`, None when there is none or when
+        it is invalid, the form has an error then.
+        """
+        start = self.cleaned_data.get("repeat_from")
+        end = self.cleaned_data.get("repeat_to")
+        if start is None or end is None:
+            return None
+
+        repeat = Repeat(start - 1, end, self.cleaned_data.get("repeat_count"))
+        if repeat.end > len(timers):
+            self.add_error(
+                "repeat_to",
+                _("there are only %(count)d timers") % {"count": len(timers)},
+            )
+            return None
+        if repeat.count is None and repeat.end != len(timers):
+            self.add_error(
+                "repeat_count",
+                _("only a repeat ending with the last timer can be indefinite"),
+            )
+            return None
+
+        try:
+            repeat.validate(timers)
+        except ValueError:
+            self.add_error(
+                "repeat_count",
+                _("the repeated timers last more than %(days)d days")
+                % {"days": MAX_TOTAL_DURATION.days},
+            )
+            return None
+
+        return repeat
+
+    @staticmethod
+    def repeat_initial(repeat: Repeat | None) -> dict[str, int | None]:
+        if repeat is None:
+            return {"repeat_from": None, "repeat_to": None, "repeat_count": None}
+
+        return {
+            "repeat_from": repeat.start + 1,
+            "repeat_to": repeat.end,
+            "repeat_count": repeat.count,
+        }
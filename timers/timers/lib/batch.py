@@ -0,0 +1,242 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import Iterable, Mapping, Sequence
+
+from timers.lib.packing import PackedDurations
+from timers.lib.timerange import (
+    EPOCH,
+    DateTimePeriod,
+    PausableTimerSequence,
+    PausableTimerSequenceSnapshot,
+)
+from timers.models import TimerSequenceRun
+
+MILLISECOND = timedelta(milliseconds=1)
+
+
+def to_milliseconds(value: datetime) -> int:
+    return (value - EPOCH) // MILLISECOND
+
+
+@dataclass(frozen=True, kw_only=True)
+class TimerSequenceBatch:
+    """
+    N runs in a columnar layout, every instant and duration in integer
+    milliseconds. Run `i` owns `durations[duration_offsets[i]:duration_offsets[i + 1]]`
+    and the pauses in `pause_offsets[i]:pause_offsets[i + 1]`, sorted by start.
+    Running pauses are left out, like in `TimerProjection`.
+
+    Runs with a `Repeat` are left out too: laid out in full, a run repeated
+    `count` times would take as many columns, and an endless one would never
+    end. Their columns are empty, they are projected one by one through
+    their `RepeatingPausableTimerSequence`, see `snapshot_timer_sequence_runs`.
+    """
+
+    started_at: Sequence[int]
+    durations: Sequence[int]
+    duration_offsets: Sequence[int]
+    pause_starts: Sequence[int]
+    pause_ends: Sequence[int]
+    pause_offsets: Sequence[int]
+
+    def __len__(self) -> int:
+        return len(self.started_at)
+
+    def __post_init__(self):
+        assert len(self.duration_offsets) == len(self.started_at) + 1
+        assert len(self.pause_offsets) == len(self.started_at) + 1
+        assert len(self.pause_starts) == len(self.pause_ends)
+
+    @classmethod
+    def from_timer_sequence_runs(
+        cls, runs: Iterable[TimerSequenceRun]
+    ) -> "TimerSequenceBatch":
+        started_at = array("q")
+        durations = array("q")
+        duration_offsets = array("q", [0])
+        pause_starts = array("q")
+        pause_ends = array("q")
+        pause_offsets = array("q", [0])
+
+        for run in runs:
+            assert run.started_at is not None, f"sequence {run.pk} was not started"
+
+            started_at.append(to_milliseconds(run.started_at))
+            if run.repeat is not None:
+                duration_offsets.append(len(durations))
+                pause_offsets.append(len(pause_starts))
+                continue
+
+            run_durations = run.timer_sequence_durations
+            durations.extend(
+                run_durations.milliseconds()
+                if isinstance(run_durations, PackedDurations)
+                else [x // MILLISECOND for x in run_durations]  # type: ignore
+            )
+            duration_offsets.append(len(durations))
+
+            for pause in run.get_pauses():
+                if pause.ended_at is None:
+                    continue
+                pause_starts.append(to_milliseconds(pause.started_at))
+                pause_ends.append(to_milliseconds(pause.ended_at))
+            pause_offsets.append(len(pause_starts))
+
+        return cls(
+            started_at=started_at,
+            durations=durations,
+            duration_offsets=duration_offsets,
+            pause_starts=pause_starts,
+            pause_ends=pause_ends,
+            pause_offsets=pause_offsets,
+        )
+
+    def timer_ends(self) -> array:
+        """
+        End of every timer, in the layout of `durations`. Per run, it is the
+        prefix sum of the durations, shifted by the pauses each timer absorbed.
+        """
+        ends = array("q", bytes(8 * len(self.durations)))
+
+        for i, started_at in enumerate(self.started_at):
+            end = started_at
+            pause = self.pause_offsets[i]
+            last_pause = self.pause_offsets[i + 1]
+
+            for k in range(self.duration_offsets[i], self.duration_offsets[i + 1]):
+                end += self.durations[k]
+                while pause < last_pause and self.pause_starts[pause] <= end:
+                    end += self.pause_ends[pause] - self.pause_starts[pause]
+                    pause += 1
+                ends[k] = end
+
+        return ends
+
+    def snapshot(self, now: int | Sequence[int]) -> "BatchSnapshot":
+        size = len(self)
+        nows = [now] * size if isinstance(now, int) else now
+        assert len(nows) == size
+
+        ends = self.timer_ends()
+
+        current = array("q", [-1] * size)
+        remaining_time = array("q", bytes(8 * size))
+        total_remaining_time = array("q", bytes(8 * size))
+        past_end = array("q", bytes(8 * size))
+        future_start = array("q", bytes(8 * size))
+
+        for i, instant in enumerate(nows):
+            started_at = self.started_at[i]
+            first = self.duration_offsets[i]
+            last = self.duration_offsets[i + 1]
+
+            # past timers ended strictly before now, the future ones start after
+            k = bisect_left(ends, instant, first, last)
+            past_end[i] = k
+            future = (
+                first
+                if started_at > instant
+                else min(bisect_right(ends, instant, first, last) + 1, last)
+            )
+            future_start[i] = future
+
+            total = 0
+            if k < last and (ends[k - 1] if k > first else started_at) <= instant:
+                current[i] = k
+                remaining_time[i] = ends[k] - instant
+                total = ends[k] - instant
+            if future < last:
+                total += ends[last - 1] - (
+                    ends[future - 1] if future > first else started_at
+                )
+            total_remaining_time[i] = total
+
+        return BatchSnapshot(
+            batch=self,
+            current=current,
+            remaining_time=remaining_time,
+            total_remaining_time=total_remaining_time,
+            past_end=past_end,
+            future_start=future_start,
+        )
+
+
+@dataclass(frozen=True, kw_only=True)
+class BatchSnapshot:
+    """
+    Parallel arrays, one item per run. `current` is the index of the current
+    timer in `batch.durations` (-1 when there is none), past timers are
+    `durations[duration_offsets[i]:past_end[i]]` and future ones
+    `durations[future_start[i]:duration_offsets[i + 1]]`. The snapshots of
+    the runs left out of the batch, by their index, are in `repeated`.
+    """
+
+    batch: TimerSequenceBatch
+    current: Sequence[int]
+    remaining_time: Sequence[int]
+    total_remaining_time: Sequence[int]
+    past_end: Sequence[int]
+    future_start: Sequence[int]
+    repeated: Mapping[int, PausableTimerSequenceSnapshot] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.current)
+
+    def __getitem__(self, i: int) -> PausableTimerSequenceSnapshot:
+        repeated = self.repeated.get(i)
+        if repeated is not None:
+            return repeated
+
+        durations = self.batch.durations
+        current = self.current[i]
+
+        return PausableTimerSequenceSnapshot(
+            current=durations[current] * MILLISECOND if current >= 0 else None,
+            past=[
+                x * MILLISECOND
+                for x in durations[self.batch.duration_offsets[i] : self.past_end[i]]
+            ],
+            future=[
+                x * MILLISECOND
+                for x in durations[
+                    self.future_start[i] : self.batch.duration_offsets[i + 1]
+                ]
+            ],
+            remaining_time=self.remaining_time[i] * MILLISECOND,
+            total_remaining_time=self.total_remaining_time[i] * MILLISECOND,
+        )
+
+
+def snapshot_timer_sequence_runs(
+    runs: Sequence[TimerSequenceRun], now: datetime
+) -> BatchSnapshot:
+    """
+    Batch counterpart of `TimerProjection.from_timer_sequence_run`: paused runs
+    are projected where their running pause started. The runs with a `Repeat`,
+    endless ones included, are projected one by one without laying out their
+    repetitions.
+    """
+    nows = array("q")
+    repeated: dict[int, PausableTimerSequenceSnapshot] = {}
+    for i, run in enumerate(runs):
+        paused_at = now if run.paused_since is None else min(now, run.paused_since)
+        nows.append(to_milliseconds(paused_at))
+
+        if run.repeat is not None:
+            assert run.started_at is not None, f"sequence {run.pk} was not started"
+            sequence = PausableTimerSequence.from_timers(
+                run.started_at,
+                run.timer_sequence_durations,  # type: ignore
+                [
+                    DateTimePeriod(x.started_at, x.ended_at)
+                    for x in run.get_pauses()
+                    if x.ended_at is not None
+                ],
+                run.repeat,
+            )
+            repeated[i] = sequence.snapshot(paused_at)
+
+    snapshot = TimerSequenceBatch.from_timer_sequence_runs(runs).snapshot(nows)
+    return replace(snapshot, repeated=repeated)
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+
+from timers.models import TimerSequencePause, TimerSequenceRun
+
+
+@dataclass(frozen=True, kw_only=True)
+class RunChange:
+    sequence_run: TimerSequenceRun
+    pauses: list[TimerSequencePause]
+
+
+_Subscriber = tuple[asyncio.AbstractEventLoop, "asyncio.Queue[RunChange]"]
+
+
+class RunBroadcaster:
+    """
+    In-process fanout of run changes to the event loops listening to them.
+
+    Publishing is thread safe, so sync views can notify async streams.
+    Subscribers only keep the latest change: a slow one skips stale states
+    instead of buffering them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[int, set[_Subscriber]] = defaultdict(set)
+
+    @contextmanager
+    def subscribe(self, run_id: int) -> Iterator["asyncio.Queue[RunChange]"]:
+        subscriber: _Subscriber = (asyncio.get_running_loop(), asyncio.Queue(1))
+        with self._lock:
+            self._subscribers[run_id].add(subscriber)
+
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers[run_id]
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[run_id]
+
+    def publish(self, change: RunChange):
+        with self._lock:
+            subscribers = list(self._subscribers.get(change.sequence_run.pk, ()))
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, change)
+            except RuntimeError:
+                # the loop closed while unsubscribing
+                pass
+
+    def subscribers_count(self, run_id: int | None = None) -> int:
+        with self._lock:
+            if run_id is not None:
+                return len(self._subscribers.get(run_id, ()))
+            return sum(len(x) for x in self._subscribers.values())
+
+
+def _offer(queue: "asyncio.Queue[RunChange]", change: RunChange):
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(change)
+
+
+run_changes = RunBroadcaster()
@@ -0,0 +1,185 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Sequence
+
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates, Template
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERIES_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class Histogram:
+    """Prometheus style histogram, `counts[i]` observations fell in bucket i."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def cumulative(self) -> Iterator[tuple[str, int]]:
+        total = 0
+        for bucket, count in zip([*self.buckets, None], self.counts):
+            total += count
+            yield ("+Inf" if bucket is None else f"{bucket:g}"), total
+
+
+@dataclass(kw_only=True)
+class RequestSample:
+    """Measures of one sampled request, filled while it is handled."""
+
+    queries: int = 0
+    sql_seconds: float = 0.0
+    template_seconds: float = 0.0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    def record_query(
+        self,
+        execute: Callable[..., Any],
+        sql: str,
+        params: Any,
+        many: bool,
+        context: dict[str, Any],
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+current_sample: ContextVar[RequestSample | None] = ContextVar(
+    "current_sample", default=None
+)
+
+
+def _record_query(
+    execute: Callable[..., Any],
+    sql: str,
+    params: Any,
+    many: bool,
+    context: dict[str, Any],
+) -> Any:
+    sample = current_sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+
+    return sample.record_query(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def _instrument_connection(connection: BaseDatabaseWrapper, **kwargs: Any):
+    # every connection records into the sample of its context: under ASGI the
+    # queries run in `sync_to_async` threads, on their own connections, which
+    # inherit the context of the request. Innermost, as `execute_wrapper`
+    # blocks pop the last wrapper, and kept across reconnections.
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+_METRICS = {
+    "request_duration_seconds": ("Total latency of the requests", DURATION_BUCKETS),
+    "request_sql_queries": ("SQL queries per request", QUERIES_BUCKETS),
+    "request_sql_duration_seconds": ("Time spent in SQL", DURATION_BUCKETS),
+    "request_template_duration_seconds": (
+        "Time spent rendering templates",
+        DURATION_BUCKETS,
+    ),
+}
+
+
+class RequestMetrics:
+    """Histograms of the sampled requests, per URL name."""
+
+    prefix = "mzt_"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict[str, dict[str, Histogram]] = {}
+
+    def observe(self, view: str, sample: RequestSample, ended_at: float):
+        values = {
+            "request_duration_seconds": ended_at - sample.started_at,
+            "request_sql_queries": sample.queries,
+            "request_sql_duration_seconds": sample.sql_seconds,
+            "request_template_duration_seconds": sample.template_seconds,
+        }
+
+        with self._lock:
+            histograms = self._histograms.get(view)
+            if histograms is None:
+                histograms = self._histograms[view] = {
+                    name: Histogram(buckets) for name, (_, buckets) in _METRICS.items()
+                }
+            for name, value in values.items():
+                histograms[name].observe(value)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def to_prometheus(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            by_metric: dict[str, list[tuple[str, Histogram]]] = defaultdict(list)
+            for view, histograms in sorted(self._histograms.items()):
+                for name, histogram in histograms.items():
+                    by_metric[name].append((view, histogram))
+
+            for name, (description, _) in _METRICS.items():
+                metric = self.prefix + name
+                lines.append(f"# HELP {metric} {description}")
+                lines.append(f"# TYPE {metric} histogram")
+                for view, histogram in by_metric[name]:
+                    label = f'view="{view}"'
+                    for bucket, total in histogram.cumulative():
+                        lines.append(
+                            f'{metric}_bucket{{{label},le="{bucket}"}} {total}'
+                        )
+                    lines.append(f"{metric}_sum{{{label}}} {histogram.sum:g}")
+                    lines.append(f"{metric}_count{{{label}}} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+class _InstrumentedTemplate(Template):
+    def render(self, context: Any = None, request: Any = None) -> str:
+        sample = current_sample.get()
+        if sample is None:
+            return super().render(context, request)
+
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            sample.template_seconds += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Django templates, timed while a request is sampled."""
+
+    def from_string(self, template_code: str) -> Template:
+        return _InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name: str) -> Template:
+        template = super().get_template(template_name)
+
+        return _InstrumentedTemplate(template.template, self)
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from typing import Any, Iterable, Iterator, Sequence, overload
+
+MILLISECOND = timedelta(milliseconds=1)
+
+
+def pack_milliseconds(values: Iterable[int]) -> bytes:
+    """Unsigned LEB128 varints, a 25 minutes timer takes 3 bytes."""
+    packed = bytearray()
+    for value in values:
+        assert value >= 0, "expected positive durations"
+
+        while value > 0x7F:
+            packed.append((value & 0x7F) | 0x80)
+            value >>= 7
+        packed.append(value)
+
+    return bytes(packed)
+
+
+def unpack_milliseconds(packed: bytes) -> list[int]:
+    values: list[int] = []
+    value = shift = 0
+    for byte in packed:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+
+    assert shift == 0, "truncated durations"
+
+    return values
+
+
+class PackedDurations(Sequence[timedelta]):
+    """
+    Durations as stored in the database, only decoded on first access:
+    loading rows that never read them costs nothing.
+    """
+
+    __slots__ = ("packed", "_durations")
+
+    packed: bytes
+    _durations: list[timedelta] | None
+
+    def __init__(self, packed: bytes):
+        self.packed = packed
+        self._durations = None
+
+    @classmethod
+    def from_durations(cls, durations: Iterable[timedelta]) -> "PackedDurations":
+        return cls(pack_milliseconds(int(x / MILLISECOND) for x in durations))
+
+    def milliseconds(self) -> list[int]:
+        return unpack_milliseconds(self.packed)
+
+    def _decoded(self) -> list[timedelta]:
+        if self._durations is None:
+            self._durations = [x * MILLISECOND for x in self.milliseconds()]
+
+        return self._durations
+
+    @overload
+    def __getitem__(self, index: int) -> timedelta: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[timedelta]: ...
+
+    def __getitem__(self, index: int | slice) -> timedelta | list[timedelta]:
+        return self._decoded()[index]
+
+    def __len__(self) -> int:
+        return len(self._decoded())
+
+    def __iter__(self) -> Iterator[timedelta]:
+        return iter(self._decoded())
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, PackedDurations):
+            return self.packed == other.packed
+        if isinstance(other, Sequence):
+            return self._decoded() == list(other)  # type: ignore
+
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._decoded()!r})"
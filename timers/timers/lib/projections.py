@@ -1,27 +1,50 @@
 import enum
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Any, Iterable, cast
 
+from timers.lib.batch import to_milliseconds
 from timers.lib.timerange import DateTimePeriod, PausableTimerSequence
 from timers.models import TimerSequencePause, TimerSequenceRun
 
+# timers listed on each side of the current one, the others are counted, a
+# repeated sequence can have millions of them
+TIMERS_LIMIT = 100
+
 
 class TimerState(enum.StrEnum):
     running = "running"
     paused = "paused"
     ended = "ended"
 
+    @classmethod
+    def from_timer_sequence_run(
+        cls, now: datetime, sequence_run: TimerSequenceRun
+    ) -> "TimerState":
+        if sequence_run.is_paused():
+            return cls.paused
+        if sequence_run.is_ended(now):
+            return cls.ended
+
+        return cls.running
+
 
 @dataclass
 class TimerProjection:
     state: TimerState
     current_timer: timedelta | None
     remaining_time: timedelta
-    total_remaining_time: timedelta
+    # None when the sequence repeats indefinitely
+    total_remaining_time: timedelta | None
     past_timers: list[timedelta]
     future_timers: list[timedelta]
     ends_at: datetime | None = None
+    # only while running, the instant the current timer ends
+    current_timer_ends_at: datetime | None = None
+    hidden_past_timers: int = 0
+    hidden_future_timers: int | None = 0
 
     @property
     def remaining_time_radians(self) -> float:
@@ -36,7 +59,9 @@ class TimerProjection:
             "remainingTime": int(self.remaining_time / timedelta(milliseconds=1)),
             "totalRemainingTime": int(
                 self.total_remaining_time / timedelta(milliseconds=1)
-            ),
+            )
+            if self.total_remaining_time is not None
+            else None,
             "currentTimer": int(self.current_timer / timedelta(milliseconds=1))
             if self.current_timer is not None
             else None,
@@ -46,8 +71,24 @@ class TimerProjection:
             "futureTimers": [
                 int(x / timedelta(milliseconds=1)) for x in self.future_timers
             ],
+            "hiddenFutureTimers": self.hidden_future_timers,
         }
 
+    def to_anchored_json(self) -> dict[str, Any]:
+        """
+        Like `to_json`, with the times of a running run as instants instead of
+        durations from now: bodies generated at any time for a version of the
+        run describe the same timeline, up to the timer they start from.
+        """
+        timer = self.to_json()
+        timer["currentTimerIndex"] = self.hidden_past_timers + len(self.past_timers)
+        timer["endsAt"] = _to_json_instant(self.ends_at)
+        timer["currentTimerEndsAt"] = _to_json_instant(self.current_timer_ends_at)
+        if self.state == TimerState.running:
+            timer["remainingTime"] = timer["totalRemainingTime"] = None
+
+        return timer
+
     @classmethod
     def from_timer_sequence_run(
         cls,
@@ -59,44 +100,262 @@ class TimerProjection:
             f"sequence {sequence_run.pk} was not started"
         )
 
-        usable_pauses: list[DateTimePeriod] = []
-        is_paused = False
+        pauses = list(pauses)
+        paused_at: datetime | None = None
         for pause in pauses:
             if pause.ended_at is None:
-                is_paused = True
-                continue
+                paused_at = pause.started_at
+
+        return cls.from_pausable_timer_sequence(
+            now,
+            sequence_run=sequence_run,
+            pausable_timer_sequence=_pausable_timer_sequence(sequence_run, pauses),
+            paused_at=paused_at,
+        )
+
+    @classmethod
+    def from_cached_timer_sequence_run(
+        cls,
+        now: datetime,
+        sequence_run: TimerSequenceRun,
+        cache: "PausableTimerSequenceCache | None" = None,
+    ) -> "TimerProjection":
+        """
+        Like `from_timer_sequence_run`, with the sequence out of `cache` (by
+        default `run_timer_sequences`), the pauses are only read on a miss.
+        """
+        assert sequence_run.started_at is not None, (
+            f"sequence {sequence_run.pk} was not started"
+        )
+
+        if cache is None:
+            cache = run_timer_sequences
+
+        return cls.from_pausable_timer_sequence(
+            now,
+            sequence_run=sequence_run,
+            pausable_timer_sequence=cache.get(sequence_run),
+            paused_at=sequence_run.paused_since,
+        )
+
+    @classmethod
+    async def afrom_cached_timer_sequence_run(
+        cls,
+        now: datetime,
+        sequence_run: TimerSequenceRun,
+        cache: "PausableTimerSequenceCache | None" = None,
+    ) -> "TimerProjection":
+        """Like `from_cached_timer_sequence_run`, the pauses are read asynchronously."""
+        assert sequence_run.started_at is not None, (
+            f"sequence {sequence_run.pk} was not started"
+        )
 
-            usable_pauses.append(DateTimePeriod(pause.started_at, pause.ended_at))
+        if cache is None:
+            cache = run_timer_sequences
 
-        durations: list[timedelta] = cast(
-            list[timedelta],
-            sequence_run.timer_sequence_durations,  # type: ignore
+        return cls.from_pausable_timer_sequence(
+            now,
+            sequence_run=sequence_run,
+            pausable_timer_sequence=await cache.aget(sequence_run),
+            paused_at=sequence_run.paused_since,
         )
-        pausable_timer_sequence = PausableTimerSequence.from_timers(
-            sequence_run.started_at,
-            durations,
-            usable_pauses,
+
+    @classmethod
+    def from_pausable_timer_sequence(
+        cls,
+        now: datetime,
+        *,
+        sequence_run: TimerSequenceRun,
+        pausable_timer_sequence: PausableTimerSequence,
+        paused_at: datetime | None,
+    ) -> "TimerProjection":
+        assert sequence_run.started_at is not None
+
+        # a paused run stays frozen where the running pause started
+        projection = pausable_timer_sequence.snapshot(
+            now if paused_at is None else min(now, paused_at)
         )
-        projection = pausable_timer_sequence.snapshot(now)
 
         state = TimerState.running
-        if is_paused:
+        if paused_at is not None:
             state = TimerState.paused
-        elif projection.total_remaining_time <= timedelta():
+        elif (
+            projection.total_remaining_time is not None
+            and projection.total_remaining_time <= timedelta()
+        ):
             state = TimerState.ended
 
         ends_at: datetime | None = None
         if state == TimerState.ended:
-            ends_at = sequence_run.started_at + pausable_timer_sequence.total_duration
-        elif state == TimerState.running:
+            ends_at = sequence_run.started_at + cast(
+                timedelta, pausable_timer_sequence.total_duration
+            )
+        elif (
+            state == TimerState.running and projection.total_remaining_time is not None
+        ):
             ends_at = now + projection.total_remaining_time
 
+        current_timer_ends_at: datetime | None = None
+        if state == TimerState.running and projection.current is not None:
+            current_timer_ends_at = now + projection.remaining_time
+
+        future_count = projection.future_count
         return cls(
             state=state,
             ends_at=ends_at,
-            past_timers=projection.past,
-            future_timers=projection.future,
+            current_timer_ends_at=current_timer_ends_at,
+            past_timers=projection.past_timers(TIMERS_LIMIT),
+            future_timers=projection.future_timers(TIMERS_LIMIT),
+            hidden_past_timers=max(projection.past_count - TIMERS_LIMIT, 0),
+            hidden_future_timers=None
+            if future_count is None
+            else max(future_count - TIMERS_LIMIT, 0),
             current_timer=projection.current,
             remaining_time=projection.remaining_time,
             total_remaining_time=projection.total_remaining_time,
         )
+
+
+def _to_json_instant(value: datetime | None) -> int | None:
+    return None if value is None else to_milliseconds(value)
+
+
+def _pausable_timer_sequence(
+    sequence_run: TimerSequenceRun, pauses: Iterable[TimerSequencePause]
+) -> PausableTimerSequence:
+    assert sequence_run.started_at is not None
+
+    # the running pause, if any, is not part of the sequence yet
+    usable_pauses = [
+        DateTimePeriod(x.started_at, x.ended_at)
+        for x in pauses
+        if x.ended_at is not None
+    ]
+    durations: list[timedelta] = cast(
+        list[timedelta],
+        sequence_run.timer_sequence_durations,  # type: ignore
+    )
+
+    # historical models, in data migrations, have no `repeat`
+    return PausableTimerSequence.from_timers(
+        sequence_run.started_at,
+        durations,
+        usable_pauses,
+        getattr(sequence_run, "repeat", None),
+    )
+
+
+class PausableTimerSequenceCache:
+    """
+    Process local LRU of the `PausableTimerSequence` of the runs, keyed by
+    (run id, version). `pause` and `unpause` bump the version, so a cached
+    sequence never goes stale; the previous version of a run is dropped when
+    the new one is cached.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        assert maxsize > 0
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._sequences: OrderedDict[tuple[int, int], PausableTimerSequence] = (
+            OrderedDict()
+        )
+        # run id -> its cached version
+        self._versions: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._sequences)
+
+    def __contains__(self, sequence_run: TimerSequenceRun) -> bool:
+        return (sequence_run.pk, sequence_run.version) in self._sequences
+
+    def get(self, sequence_run: TimerSequenceRun) -> PausableTimerSequence:
+        sequence = self._lookup(sequence_run)
+        if sequence is not None:
+            return sequence
+
+        # built out of the lock, two misses on one run build it twice
+        return self._store(
+            sequence_run,
+            _pausable_timer_sequence(sequence_run, sequence_run.get_pauses()),
+        )
+
+    async def aget(self, sequence_run: TimerSequenceRun) -> PausableTimerSequence:
+        """Like `get`, the pauses are read asynchronously on a miss."""
+        sequence = self._lookup(sequence_run)
+        if sequence is not None:
+            return sequence
+
+        return self._store(
+            sequence_run,
+            _pausable_timer_sequence(sequence_run, await sequence_run.aget_pauses()),
+        )
+
+    def _lookup(self, sequence_run: TimerSequenceRun) -> PausableTimerSequence | None:
+        assert sequence_run.pk is not None, "expected a saved run"
+
+        key = (sequence_run.pk, sequence_run.version)
+        with self._lock:
+            sequence = self._sequences.get(key)
+            if sequence is not None:
+                self._sequences.move_to_end(key)
+                self.hits += 1
+                return sequence
+
+            self.misses += 1
+
+        return None
+
+    def _store(
+        self, sequence_run: TimerSequenceRun, sequence: PausableTimerSequence
+    ) -> PausableTimerSequence:
+        key = (sequence_run.pk, sequence_run.version)
+        with self._lock:
+            previous = self._versions.get(key[0])
+            if previous is not None and previous != key[1]:
+                del self._sequences[(key[0], previous)]
+
+            self._sequences[key] = sequence
+            self._versions[key[0]] = key[1]
+            while len(self._sequences) > self.maxsize:
+                (run_id, _), _ = self._sequences.popitem(last=False)
+                del self._versions[run_id]
+                self.evictions += 1
+
+        return sequence
+
+    def clear(self):
+        with self._lock:
+            self._sequences.clear()
+            self._versions.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def to_prometheus(self, prefix: str = "mzt_") -> str:
+        lines: list[str] = []
+        with self._lock:
+            counters = {
+                "hits": ("Cached sequences found", self.hits),
+                "misses": ("Sequences built from the pauses", self.misses),
+                "evictions": ("Least recently used sequences dropped", self.evictions),
+            }
+            size = len(self._sequences)
+
+        for name, (description, value) in counters.items():
+            metric = f"{prefix}run_sequence_cache_{name}_total"
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+
+        metric = f"{prefix}run_sequence_cache_size"
+        lines.append(f"# HELP {metric} Cached sequences")
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {size}")
+
+        return "\n".join(lines) + "\n"
+
+
+run_timer_sequences = PausableTimerSequenceCache()
@@ -0,0 +1,232 @@
+"""
+Recomputes the run state columns denormalized from `TimerSequencePause`, by
+chunks of runs, for the `recompute_run_state` command and data migrations.
+
+Only the runs and pause models are used, historical ones work as well, e.g.
+in a migration:
+
+    for _ in recompute_run_states(
+        app.get_model("timers", "TimerSequenceRun"),
+        app.get_model("timers", "TimerSequencePause"),
+    ):
+        pass
+"""
+
+from collections import defaultdict, deque
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Iterator
+
+from django.db import transaction
+
+from timers.lib.timerange import Repeat
+
+RUN_STATE_FIELDS = ["paused_since", "total_paused", "ends_at"]
+REPEAT_FIELDS = ["repeat_start", "repeat_end", "repeat_count"]
+
+# (started_at, durations, pauses as (started_at, ended_at), repeat)
+RunRow = tuple[
+    datetime | None,
+    Iterable[timedelta],
+    list[tuple[datetime, Any]],
+    Repeat | None,
+]
+
+
+@dataclass(frozen=True, kw_only=True)
+class RunState:
+    paused_since: datetime | None
+    total_paused: timedelta
+    ends_at: datetime | None
+
+
+def project_run_state(
+    started_at: datetime | None,
+    durations: Iterable[timedelta],
+    pauses: Iterable[tuple[datetime, datetime | None]],
+    repeat: Repeat | None = None,
+) -> RunState:
+    """The state `TimerSequenceRun.pause` and `unpause` maintain."""
+    paused_since: datetime | None = None
+    total_paused = timedelta()
+    for pause_started_at, pause_ended_at in pauses:
+        if pause_ended_at is None:
+            paused_since = pause_started_at
+        else:
+            total_paused += pause_ended_at - pause_started_at
+
+    ends_at: datetime | None = None
+    total = (
+        sum(durations, timedelta()) if repeat is None else repeat.total(list(durations))
+    )
+    # a run repeating indefinitely never ends
+    if started_at is not None and paused_since is None and total is not None:
+        ends_at = started_at + total + total_paused
+
+    return RunState(
+        paused_since=paused_since, total_paused=total_paused, ends_at=ends_at
+    )
+
+
+def project_run_states(rows: list[RunRow]) -> list[RunState]:
+    # module level, so that process pools can pickle it
+    return [project_run_state(*x) for x in rows]
+
+
+@dataclass(frozen=True, kw_only=True)
+class RunStateChunk:
+    last_pk: int
+    runs: int
+    updated: int
+
+
+def recompute_run_states(
+    runs_model: Any,
+    pauses_model: Any,
+    *,
+    after: int = 0,
+    chunk_size: int = 2000,
+    executor: Executor | None = None,
+    in_flight: int = 2,
+    dry_run: bool = False,
+) -> Iterator[RunStateChunk]:
+    """
+    Streams the runs after the `after` primary key, projects their state by
+    chunk, optionally in `executor`, and writes back the runs whose state
+    changed. Yields each chunk once written, its `last_pk` is where to resume.
+    With an `executor`, up to `in_flight` chunks are projected at once.
+
+    A run toggled since its chunk was read is left as is, its state is
+    already maintained by the toggle.
+    """
+    chunks = _read_chunks(runs_model, pauses_model, after, chunk_size)
+
+    pending: deque[tuple[list[Any], Future[list[RunState]] | list[RunState]]] = deque()
+    window = 1 if executor is None else max(in_flight, 1)
+    for runs, rows in chunks:
+        pending.append(
+            (
+                runs,
+                project_run_states(rows)
+                if executor is None
+                else executor.submit(project_run_states, rows),
+            )
+        )
+        while len(pending) >= window:
+            yield _write_chunk(runs_model, *pending.popleft(), dry_run=dry_run)
+
+    while pending:
+        yield _write_chunk(runs_model, *pending.popleft(), dry_run=dry_run)
+
+
+def _read_chunks(
+    runs_model: Any, pauses_model: Any, after: int, chunk_size: int
+) -> Iterator[tuple[list[Any], list[RunRow]]]:
+    # the written columns are not read by this query, and the rows written
+    # are behind its cursor
+    runs = (
+        runs_model.objects.filter(pk__gt=after)
+        .order_by("pk")
+        .only(
+            "pk",
+            "started_at",
+            "timer_sequence_durations",
+            *_version(runs_model),
+            *_repeat(runs_model),
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+    chunk: list[Any] = []
+    for run in runs:
+        chunk.append(run)
+        if len(chunk) == chunk_size:
+            yield chunk, _read_rows(pauses_model, chunk)
+            chunk = []
+    if chunk:
+        yield chunk, _read_rows(pauses_model, chunk)
+
+
+def _read_rows(pauses_model: Any, runs: list[Any]) -> list[RunRow]:
+    # the pauses of a whole chunk in one query
+    pauses: dict[int, list[tuple[datetime, Any]]] = defaultdict(list)
+    for run_id, started_at, ended_at in (
+        pauses_model.objects.filter(timer_sequence_run_id__in=[x.pk for x in runs])
+        .order_by("timer_sequence_run_id", "started_at", "pk")
+        .values_list("timer_sequence_run_id", "started_at", "ended_at")
+    ):
+        pauses[run_id].append((started_at, ended_at))
+
+    return [
+        (
+            x.started_at,
+            x.timer_sequence_durations,
+            pauses[x.pk],
+            _repeat_of(x),
+        )
+        for x in runs
+    ]
+
+
+def _repeat_of(run: Any) -> Repeat | None:
+    # historical models have the columns but not the `repeat` property
+    if getattr(run, "repeat_start", None) is None:
+        return None
+
+    return Repeat(run.repeat_start, run.repeat_end, run.repeat_count)
+
+
+def _write_chunk(
+    runs_model: Any,
+    runs: list[Any],
+    states: Future[list[RunState]] | list[RunState],
+    *,
+    dry_run: bool,
+) -> RunStateChunk:
+    if isinstance(states, Future):
+        states = states.result()
+
+    version = _version(runs_model)
+    # the state columns were deferred, they are read along the versions in the
+    # writing transaction
+    with transaction.atomic(using=runs_model.objects.db):
+        current = {
+            pk: values
+            for pk, *values in runs_model.objects.filter(
+                pk__in=[x.pk for x in runs]
+            ).values_list("pk", *RUN_STATE_FIELDS, *version)
+        }
+
+        changed: list[Any] = []
+        for run, state in zip(runs, states):
+            row = current.get(run.pk)
+            if row is None or (version and row[-1] != run.version):
+                continue
+            if row[:3] == [state.paused_since, state.total_paused, state.ends_at]:
+                continue
+
+            run.paused_since = state.paused_since
+            run.total_paused = state.total_paused
+            run.ends_at = state.ends_at
+            if version:
+                # cached projections and ETags are keyed by version
+                run.version += 1
+            changed.append(run)
+
+        if changed and not dry_run:
+            runs_model.objects.bulk_update(
+                changed, [*RUN_STATE_FIELDS, *version], batch_size=500
+            )
+
+    return RunStateChunk(last_pk=runs[-1].pk, runs=len(runs), updated=len(changed))
+
+
+def _version(runs_model: Any) -> list[str]:
+    # the version column is more recent than the state ones
+    return [x.name for x in runs_model._meta.concrete_fields if x.name == "version"]
+
+
+def _repeat(runs_model: Any) -> list[str]:
+    # as are the repeat ones
+    return [x.name for x in runs_model._meta.concrete_fields if x.name in REPEAT_FIELDS]
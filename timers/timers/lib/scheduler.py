@@ -0,0 +1,269 @@
+import heapq
+import itertools
+import logging
+import threading
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable, Sequence
+
+from django.db import connection
+from django.dispatch import Signal
+from django.utils import timezone
+
+from timers.lib.batch import MILLISECOND, TimerSequenceBatch, to_milliseconds
+from timers.lib.projections import run_timer_sequences
+from timers.lib.timerange import EPOCH, RepeatingPausableTimerSequence
+from timers.models import TimerSequenceRun
+
+logger = logging.getLogger(__name__)
+
+# sent with `run_id`, `timer_index`, `ended_at` and `is_last` when a timer ends
+timer_ended = Signal()
+
+
+@dataclass(frozen=True, kw_only=True)
+class Boundary:
+    run_id: int
+    timer_index: int
+    ends_at: int
+    is_last: bool
+
+
+class BoundaryHeap:
+    """
+    Next timer end of every armed run, in integer milliseconds, in a min-heap.
+
+    Arming a run pushes its next boundary in O(log n), cancelling it is O(1):
+    the heap entry only goes stale, it is skipped once it reaches the top, and
+    stale entries are swept when they outnumber the armed runs.
+    """
+
+    def __init__(self):
+        # (due, token, run id, timer index)
+        self._heap: list[tuple[int, int, int, int]] = []
+        # run id -> (token of its live entry, ends of its timers)
+        self._runs: dict[int, tuple[int, Sequence[int]]] = {}
+        self._tokens = itertools.count()
+        self._stale = 0
+
+    def __len__(self) -> int:
+        return len(self._runs)
+
+    def __contains__(self, run_id: int) -> bool:
+        return run_id in self._runs
+
+    def arm(self, run_id: int, ends: Sequence[int], now: int) -> int | None:
+        """Schedules the first of the `ends` after `now`, returns it."""
+        self.cancel(run_id)
+
+        index = bisect_right(ends, now)
+        if index == len(ends):
+            return None
+
+        token = next(self._tokens)
+        self._runs[run_id] = (token, ends)
+        heapq.heappush(self._heap, (ends[index], token, run_id, index))
+
+        return ends[index]
+
+    def cancel(self, run_id: int):
+        if self._runs.pop(run_id, None) is None:
+            return
+
+        self._stale += 1
+        if self._stale > 1024 and self._stale > len(self._runs):
+            self._heap = [x for x in self._heap if self._is_live(x)]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def _is_live(self, entry: tuple[int, int, int, int]) -> bool:
+        run = self._runs.get(entry[2])
+        return run is not None and run[0] == entry[1]
+
+    def next_due(self) -> int | None:
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+            self._stale -= 1
+
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: int) -> list[Boundary]:
+        boundaries: list[Boundary] = []
+        while (due := self.next_due()) is not None and due <= now:
+            _, token, run_id, index = heapq.heappop(self._heap)
+            ends = self._runs[run_id][1]
+            is_last = index + 1 == len(ends)
+            boundaries.append(
+                Boundary(run_id=run_id, timer_index=index, ends_at=due, is_last=is_last)
+            )
+
+            if is_last:
+                del self._runs[run_id]
+            else:
+                heapq.heappush(self._heap, (ends[index + 1], token, run_id, index + 1))
+
+        return boundaries
+
+
+class BoundaryScheduler:
+    """
+    Fires the boundaries of a `BoundaryHeap` from a daemon thread, which
+    sleeps until the next one is due or until an earlier one is armed.
+    """
+
+    def __init__(self, on_boundary: Callable[[Boundary], None]):
+        self.on_boundary = on_boundary
+        self.boundaries = BoundaryHeap()
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopped = False
+
+    @property
+    def is_started(self) -> bool:
+        return self._thread is not None
+
+    def now(self) -> int:
+        return to_milliseconds(timezone.now())
+
+    def arm(self, run_id: int, ends: Sequence[int]):
+        with self._condition:
+            previous_due = self.boundaries.next_due()
+            due = self.boundaries.arm(run_id, ends, self.now())
+            if due is not None and (previous_due is None or due < previous_due):
+                self._condition.notify()
+
+    def cancel(self, run_id: int):
+        with self._condition:
+            self.boundaries.cancel(run_id)
+
+    def fire_due(self, now: int) -> int:
+        with self._condition:
+            boundaries = self.boundaries.pop_due(now)
+
+        for boundary in boundaries:
+            try:
+                self.on_boundary(boundary)
+            except Exception:
+                logger.exception("Error firing %r", boundary)
+
+        return len(boundaries)
+
+    def start(self):
+        assert self._thread is None, "already started"
+
+        self._thread = threading.Thread(
+            target=self._run, name=type(self).__name__, daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+
+                due = self.boundaries.next_due()
+                now = self.now()
+                if due is None or due > now:
+                    self._condition.wait(None if due is None else (due - now) / 1000)
+                    continue
+
+            self.fire_due(now)
+
+
+class RunBoundaryScheduler(BoundaryScheduler):
+    """
+    Timer ends of the running `TimerSequenceRun`s, sent as `timer_ended`.
+
+    Armed from the runs ending in the future when started, then re-armed by
+    `rearm` after every change of a run. Until started, nothing is armed.
+    """
+
+    def __init__(self):
+        super().__init__(self._send)
+        self._rearmed: set[int] | None = None
+
+    def start(self):
+        # runs re-armed while loading are more recent than their loaded state
+        self._rearmed = set()
+        super().start()
+
+    def _run(self):
+        try:
+            self.load(timezone.now())
+        finally:
+            self._rearmed = None
+            connection.close()
+
+        super()._run()
+
+    def load(self, now: datetime, chunk_size: int = 2000):
+        runs = (
+            TimerSequenceRun.objects.filter(ends_at__gt=now)
+            .with_pauses()
+            .order_by("pk")
+            .iterator(chunk_size=chunk_size)
+        )
+        chunk: list[TimerSequenceRun] = []
+        for run in runs:
+            chunk.append(run)
+            if len(chunk) == chunk_size:
+                self._arm_runs(chunk, skip=self._rearmed)
+                chunk = []
+        self._arm_runs(chunk, skip=self._rearmed)
+
+    def rearm(self, run: TimerSequenceRun):
+        if not self.is_started:
+            return
+        if self._rearmed is not None:
+            self._rearmed.add(run.pk)
+
+        # a run repeating indefinitely has no last boundary, it is not armed
+        if run.started_at is None or run.is_paused() or run.ends_at is None:
+            self.cancel(run.pk)
+        else:
+            self._arm_runs([run])
+
+    def _arm_runs(self, runs: Iterable[TimerSequenceRun], skip: set[int] | None = None):
+        runs = [x for x in runs if skip is None or x.pk not in skip]
+
+        # the batch leaves repeating runs out, their ends are computed one at a
+        # time as they fire
+        for run in runs:
+            if run.repeat is not None:
+                sequence = run_timer_sequences.get(run)
+                assert isinstance(sequence, RepeatingPausableTimerSequence)
+                self.arm(run.pk, sequence.timer_ends(MILLISECOND))
+
+        runs = [x for x in runs if x.repeat is None]
+        if not runs:
+            return
+
+        batch = TimerSequenceBatch.from_timer_sequence_runs(runs)
+        ends = batch.timer_ends()
+        for i, run in enumerate(runs):
+            self.arm(
+                run.pk, ends[batch.duration_offsets[i] : batch.duration_offsets[i + 1]]
+            )
+
+    def _send(self, boundary: Boundary):
+        timer_ended.send(
+            sender=TimerSequenceRun,
+            run_id=boundary.run_id,
+            timer_index=boundary.timer_index,
+            ended_at=EPOCH + boundary.ends_at * MILLISECOND,
+            is_last=boundary.is_last,
+        )
+
+
+run_boundaries = RunBoundaryScheduler()
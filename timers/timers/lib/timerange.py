@@ -1,25 +1,95 @@
-from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from typing import Iterable, Iterator
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import FrozenInstanceError, dataclass
+from datetime import UTC, datetime, timedelta
+from itertools import chain, islice, repeat
+from typing import Iterable, Iterator, NamedTuple, Sequence, TypeVar, cast
 
+_T = TypeVar("_T")
 
-@dataclass(frozen=True)
-class DateTimePeriod:
-    start: datetime
-    end: datetime
+# instants and durations are stored as integer microseconds since the epoch,
+# datetimes and timedeltas only exist at the edges of the public properties
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+MICROSECOND = timedelta(microseconds=1)
+
+
+# repeated timers last at most a century, so that the end of a run started
+# now is a valid datetime
+MAX_TOTAL_DURATION = timedelta(days=100 * 365)
+
+
+def to_microseconds(value: datetime) -> int:
+    return (value - EPOCH) // MICROSECOND
+
+
+def from_microseconds(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=value)
+
+
+class _Immutable:
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: object):
+        raise FrozenInstanceError(f"cannot assign to field {name!r}")
+
+    def __delattr__(self, name: str):
+        raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+
+class DateTimePeriod(_Immutable):
+    __slots__ = ("_start", "_end")
+
+    _start: int
+    _end: int
+
+    def __init__(self, start: datetime, end: datetime):
+        object.__setattr__(self, "_start", to_microseconds(start))
+        object.__setattr__(self, "_end", to_microseconds(end))
+
+        assert self._start < self._end
+
+    @property
+    def start(self) -> datetime:
+        return from_microseconds(self._start)
+
+    @property
+    def end(self) -> datetime:
+        return from_microseconds(self._end)
 
     @property
     def duration(self) -> timedelta:
-        return self.end - self.start
+        return timedelta(microseconds=self._end - self._start)
 
-    def __post_init__(self):
-        assert self.start < self.end
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+
+        return (self._start, self._end) == (other._start, other._end)  # type: ignore
+
+    def __hash__(self) -> int:
+        return hash((self._start, self._end))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(start={self.start!r}, end={self.end!r})"
 
 
-@dataclass(frozen=True, kw_only=True)
 class PausedDateTimePeriod(DateTimePeriod):
+    __slots__ = ("timer", "pauses")
+
     timer: DateTimePeriod
-    pauses: list[DateTimePeriod] = field(default_factory=list[DateTimePeriod])
+    pauses: list[DateTimePeriod]
+
+    def __init__(
+        self,
+        *,
+        start: datetime,
+        end: datetime,
+        timer: DateTimePeriod,
+        pauses: list[DateTimePeriod] | None = None,
+    ):
+        DateTimePeriod.__init__(self, start, end)
+        object.__setattr__(self, "timer", timer)
+        object.__setattr__(self, "pauses", [] if pauses is None else pauses)
 
     def add_pause(self, pause: DateTimePeriod) -> "PausedDateTimePeriod":
         return PausedDateTimePeriod(
@@ -33,95 +103,853 @@ class PausedDateTimePeriod(DateTimePeriod):
     def from_datetime_period(cls, period: DateTimePeriod):
         return PausedDateTimePeriod(start=period.start, end=period.end, timer=period)
 
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
 
-@dataclass(frozen=True, kw_only=True)
-class PausableTimerSequenceSnapshot:
-    current: timedelta | None = None
-    past: list[timedelta]
-    future: list[timedelta]
-    remaining_time: timedelta
-    total_remaining_time: timedelta
+        return (self._start, self._end, self.timer, self.pauses) == (
+            other._start,  # type: ignore
+            other._end,  # type: ignore
+            other.timer,  # type: ignore
+            other.pauses,  # type: ignore
+        )
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(start={self.start!r}, end={self.end!r}, "
+            f"timer={self.timer!r}, pauses={self.pauses!r})"
+        )
+
+
+class Repeat(NamedTuple):
+    """
+    Timers `start:end` of a sequence played `count` times in a row, or
+    indefinitely when `count` is None, in which case they end the sequence.
+    """
+
+    start: int
+    end: int
+    count: int | None = None
+
+    def validate(self, timers: Sequence[timedelta]):
+        if not 0 <= self.start < self.end <= len(timers):
+            raise ValueError(f"{self!r} is out of the {len(timers)} timers")
+        if self.count is not None and self.count < 1:
+            raise ValueError(f"{self!r} is played less than once")
+        if self.count is None and self.end != len(timers):
+            raise ValueError(f"{self!r} is endless, the timers after it are unused")
+
+        # summed in microseconds, a huge count overflows timedelta
+        if self.count is not None:
+            block = sum(x // MICROSECOND for x in timers[self.start : self.end])
+            total = sum(x // MICROSECOND for x in timers) + (self.count - 1) * block
+            if total > MAX_TOTAL_DURATION // MICROSECOND:
+                raise ValueError(f"{self!r} lasts more than {MAX_TOTAL_DURATION}")
+
+    def size(self, timers: int) -> int | None:
+        """Count of timers played, None when endless."""
+        if self.count is None:
+            return None
+
+        return timers + (self.count - 1) * (self.end - self.start)
+
+    def expand(self, timers: Sequence[_T]) -> Iterator[_T]:
+        """Timers in the played order, lazily, endless with an endless repeat."""
+        block = timers[self.start : self.end]
+        blocks = repeat(block) if self.count is None else repeat(block, self.count)
+
+        return chain(
+            timers[: self.start], chain.from_iterable(blocks), timers[self.end :]
+        )
+
+    def total(self, timers: Sequence[timedelta]) -> timedelta | None:
+        if self.count is None:
+            return None
+
+        block = sum(timers[self.start : self.end], timedelta())
+        return sum(timers, timedelta()) + (self.count - 1) * block
+
+
+class RepeatedTimers:
+    """
+    Timers of a sequence with a `Repeat`, in integer microseconds, addressed
+    by their index in the played order: each repetition is computed with a
+    modulo over the block, none is stored.
+    """
+
+    __slots__ = ("repeat", "size", "_timers", "_offsets")
+
+    repeat: Repeat
+    size: int | None
+    _timers: array[int]
+    # `_offsets[i]` sums the stored timers before the i-th one
+    _offsets: array[int]
+
+    def __init__(self, timers: Iterable[int], repeat: Repeat):
+        self._timers = array("q", timers)
+        repeat.validate([timedelta(microseconds=x) for x in self._timers])
+
+        self.repeat = repeat
+        self.size = repeat.size(len(self._timers))
+        self._offsets = array("q", [0])
+        for timer in self._timers:
+            self._offsets.append(self._offsets[-1] + timer)
+        if self._offsets[repeat.end] <= self._offsets[repeat.start]:
+            raise ValueError(f"{repeat!r} repeats timers lasting nothing")
+
+    def __getitem__(self, index: int) -> int:
+        assert index >= 0 and (self.size is None or index < self.size)
+
+        start, end, count = self.repeat
+        if index >= start:
+            index -= start
+            block = end - start
+            if count is None or index < block * count:
+                index = start + index % block
+            else:
+                index = end + index - block * count
+
+        return self._timers[index]
+
+    def offset(self, index: int) -> int:
+        """Sum of the timers played before the `index`-th one."""
+        start, end, count = self.repeat
+        offsets = self._offsets
+        if index <= start:
+            return offsets[index]
+
+        index -= start
+        block = end - start
+        cycle = offsets[end] - offsets[start]
+        if count is None or index <= block * count:
+            cycles, index = divmod(index, block)
+            return offsets[start + index] + cycles * cycle
+
+        return offsets[end + index - block * count] + (count - 1) * cycle
+
+    def count_ended_by(self, offset: int) -> int:
+        """Count of timers played until `offset`, included."""
+        start, end, count = self.repeat
+        offsets = self._offsets
+        if offset < 0:
+            return 0
+
+        ended = bisect_right(offsets, offset, 1, start + 1) - 1
+        if ended < start:
+            return ended
+
+        block = end - start
+        cycle = offsets[end] - offsets[start]
+        cycles, rest = divmod(offset - offsets[start], cycle)
+        ended = cycles * block + (
+            bisect_right(offsets, offsets[start] + rest, start + 1, end + 1)
+            - (start + 1)
+        )
+        if count is None or ended < block * count:
+            return start + ended
+
+        rest = offset - offsets[start] - count * cycle
+        return (
+            start
+            + block * count
+            + bisect_right(offsets, offsets[end] + rest, end + 1, len(offsets))
+            - (end + 1)
+        )
+
+    def key(self) -> tuple[tuple[int, ...], Repeat]:
+        return tuple(self._timers), self.repeat
+
+
+class TimerSlice:
+    """Timers `start:stop` of `RepeatedTimers`, endless when `stop` is None."""
+
+    __slots__ = ("timers", "start", "stop")
+
+    def __init__(self, timers: RepeatedTimers, start: int, stop: int | None):
+        self.timers = timers
+        self.start = start
+        self.stop = stop if stop is None else max(start, stop)
+
+    def __len__(self) -> int:
+        if self.stop is None:
+            raise TypeError("endless timers have no length")
+
+        return self.stop - self.start
+
+    def __getitem__(self, index: int) -> int:
+        assert index >= 0 and (self.stop is None or index < len(self))
+
+        return self.timers[self.start + index]
+
+    def __iter__(self) -> Iterator[int]:
+        index = self.start
+        while self.stop is None or index < self.stop:
+            yield self.timers[index]
+            index += 1
+
+
+def _timers_count(timers: Sequence[int] | TimerSlice) -> int | None:
+    if isinstance(timers, TimerSlice) and timers.stop is None:
+        return None
+
+    return len(timers)
+
+
+def _timers_key(timers: Sequence[int] | TimerSlice) -> object:
+    if isinstance(timers, TimerSlice) and timers.stop is None:
+        return timers.timers.key(), timers.start
+
+    return list(timers)
+
+
+class PausableTimerSequenceSnapshot(_Immutable):
+    __slots__ = (
+        "_current",
+        "_past",
+        "_future",
+        "_remaining_time",
+        "_total_remaining_time",
+    )
+
+    # with a `Repeat`, past and future timers are lazy `TimerSlice`s, and the
+    # total remaining time of an endless sequence is None
+    _current: int | None
+    _past: Sequence[int] | TimerSlice
+    _future: Sequence[int] | TimerSlice
+    _remaining_time: int
+    _total_remaining_time: int | None
+
+    def __init__(
+        self,
+        *,
+        current: timedelta | None = None,
+        past: list[timedelta],
+        future: list[timedelta],
+        remaining_time: timedelta,
+        total_remaining_time: timedelta,
+    ):
+        self._set(
+            current=None if current is None else current // MICROSECOND,
+            past=array("q", (x // MICROSECOND for x in past)),
+            future=array("q", (x // MICROSECOND for x in future)),
+            remaining_time=remaining_time // MICROSECOND,
+            total_remaining_time=total_remaining_time // MICROSECOND,
+        )
+
+    def _set(
+        self,
+        *,
+        current: int | None,
+        past: Sequence[int] | TimerSlice,
+        future: Sequence[int] | TimerSlice,
+        remaining_time: int,
+        total_remaining_time: int | None,
+    ):
+        object.__setattr__(self, "_current", current)
+        object.__setattr__(self, "_past", past)
+        object.__setattr__(self, "_future", future)
+        object.__setattr__(self, "_remaining_time", remaining_time)
+        object.__setattr__(self, "_total_remaining_time", total_remaining_time)
+
+    @property
+    def current(self) -> timedelta | None:
+        return None if self._current is None else timedelta(microseconds=self._current)
+
+    @property
+    def past(self) -> list[timedelta]:
+        return [timedelta(microseconds=x) for x in self._past]
+
+    @property
+    def future(self) -> list[timedelta]:
+        if self.future_count is None:
+            raise ValueError("endless future timers, see `future_timers`")
+
+        return [timedelta(microseconds=x) for x in self._future]
+
+    @property
+    def past_count(self) -> int:
+        return len(self._past)
+
+    @property
+    def future_count(self) -> int | None:
+        return _timers_count(self._future)
+
+    def past_timers(self, limit: int) -> list[timedelta]:
+        """The `limit` last past timers."""
+        count = self.past_count
+        return [
+            timedelta(microseconds=self._past[i])
+            for i in range(max(count - limit, 0), count)
+        ]
+
+    def future_timers(self, limit: int) -> list[timedelta]:
+        """The `limit` next future timers."""
+        return [timedelta(microseconds=x) for x in islice(self._future, limit)]
+
+    @property
+    def remaining_time(self) -> timedelta:
+        return timedelta(microseconds=self._remaining_time)
+
+    @property
+    def total_remaining_time(self) -> timedelta | None:
+        if self._total_remaining_time is None:
+            return None
+
+        return timedelta(microseconds=self._total_remaining_time)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PausableTimerSequenceSnapshot):
+            return NotImplemented
+
+        return (
+            self._current == other._current
+            and _timers_key(self._past) == _timers_key(other._past)
+            and _timers_key(self._future) == _timers_key(other._future)
+            and self._remaining_time == other._remaining_time
+            and self._total_remaining_time == other._total_remaining_time
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(current={self.current!r}, past={self.past!r}, "
+            f"future={self.future_timers(8)!r}, remaining_time={self.remaining_time!r}, "
+            f"total_remaining_time={self.total_remaining_time!r})"
+        )
 
 
-@dataclass(frozen=True, kw_only=True)
 class PausableTimerSequence:
-    pausable_timers: list[PausedDateTimePeriod]
+    __slots__ = (
+        "_started_at",
+        "_timers",
+        "_ends",
+        "_remaining",
+        "_pause_starts",
+        "_pause_ends",
+        "_pause_offsets",
+    )
+
+    # in the order of the timers, `_remaining[i]` sums the spans of the
+    # pausable timers, their pauses included, from the i-th timer to the last
+    # one, the pauses of the i-th timer are
+    # `_pause_offsets[i]:_pause_offsets[i + 1]`
+    _started_at: int
+    _timers: array[int]
+    _ends: array[int]
+    _remaining: array[int]
+    _pause_starts: array[int]
+    _pause_ends: array[int]
+    _pause_offsets: array[int]
+
+    def __init__(self, *, pausable_timers: list[PausedDateTimePeriod]):
+        assert len(pausable_timers) > 0
+
+        self._started_at = pausable_timers[0]._start
+        self._timers = array(
+            "q", (x.timer._end - x.timer._start for x in pausable_timers)
+        )
+        self._ends = array("q", (x._end for x in pausable_timers))
+        self._pause_starts = array("q")
+        self._pause_ends = array("q")
+        self._pause_offsets = array("q", [0])
+        for timer in pausable_timers:
+            self._pause_starts.extend(x._start for x in timer.pauses)
+            self._pause_ends.extend(x._end for x in timer.pauses)
+            self._pause_offsets.append(len(self._pause_starts))
+
+        self._set_remaining()
+
+    def _set_remaining(self):
+        remaining = array("q", bytes(8 * (len(self._ends) + 1)))
+        for i in range(len(self._ends) - 1, -1, -1):
+            remaining[i] = remaining[i + 1] + self._ends[i] - self._start_of(i)
+
+        self._remaining = remaining
+
+    def _start_of(self, index: int) -> int:
+        return self._ends[index - 1] if index > 0 else self._started_at
+
+    @property
+    def pausable_timers(self) -> list[PausedDateTimePeriod]:
+        return list(self)
 
     @property
     def ends_at(self) -> datetime:
-        return self.pausable_timers[-1].end
+        return from_microseconds(self._ends[-1])
 
     @property
     def total_duration(self) -> timedelta:
-        total_duration = timedelta()
-        for period in self.pausable_timers:
-            total_duration += period.duration
-
-        return total_duration
+        return timedelta(microseconds=self._remaining[0])
 
     def snapshot(self, now: datetime) -> PausableTimerSequenceSnapshot:
-        past: list[timedelta] = []
-        future: list[timedelta] = []
-        current: timedelta | None = None
-
-        remaining_time = timedelta()
-        total_remaining_time = timedelta()
-
-        for pausable in self.pausable_timers:
-            if now > pausable.end:
-                past.append(pausable.timer.duration)
-            elif now < pausable.start:
-                future.append(pausable.timer.duration)
-                total_remaining_time += pausable.duration
-            elif current is None and pausable.start <= now <= pausable.end:
-                current = pausable.timer.duration
-                remaining_time = pausable.end - now
-                total_remaining_time += pausable.end - now
-
-        return PausableTimerSequenceSnapshot(
-            past=past,
+        instant = to_microseconds(now)
+
+        # past timers ended strictly before now, future ones start strictly after
+        current_index = bisect_left(self._ends, instant)
+        future_index = (
+            0
+            if instant < self._started_at
+            else min(bisect_right(self._ends, instant) + 1, len(self._ends))
+        )
+
+        current = -1
+        remaining_time = 0
+        if current_index < len(self._ends) and self._start_of(current_index) <= instant:
+            current = current_index
+            remaining_time = self._ends[current_index] - instant
+
+        return self._snapshot_of(
+            past_end=current_index,
             current=current,
-            future=future,
+            future_start=future_index,
+            remaining_time=remaining_time,
+            total_remaining_time=remaining_time + self._remaining[future_index],
+        )
+
+    def snapshot_many(
+        self, nows: Iterable[datetime]
+    ) -> "PausableTimerSequenceTimeline":
+        """
+        Snapshots at each of the sorted `nows`, in one sweep over the timer
+        ends, whose pauses are already folded in: O(timers + instants).
+        """
+        instants = array("q", (to_microseconds(x) for x in nows))
+        size = len(self._ends)
+        current = array("q", [-1] * len(instants))
+        remaining_time = array("q", bytes(8 * len(instants)))
+        total_remaining_time = array("q", bytes(8 * len(instants)))
+        past_end = array("q", bytes(8 * len(instants)))
+        future_start = array("q", bytes(8 * len(instants)))
+
+        # timers ended strictly before the instant, and until it included
+        ended = ended_by = 0
+        for i, instant in enumerate(instants):
+            if i > 0 and instant < instants[i - 1]:
+                raise ValueError("instants are not sorted")
+
+            while ended < size and self._ends[ended] < instant:
+                ended += 1
+            ended_by = max(ended_by, ended)
+            while ended_by < size and self._ends[ended_by] <= instant:
+                ended_by += 1
+
+            future = 0 if instant < self._started_at else min(ended_by + 1, size)
+            past_end[i] = ended
+            future_start[i] = future
+
+            remaining = 0
+            if ended < size and self._start_of(ended) <= instant:
+                current[i] = ended
+                remaining = self._ends[ended] - instant
+            remaining_time[i] = remaining
+            total_remaining_time[i] = remaining + self._remaining[future]
+
+        return PausableTimerSequenceTimeline(
+            sequence=self,
+            instants=instants,
+            current=current,
+            remaining_time=remaining_time,
+            total_remaining_time=total_remaining_time,
+            past_end=past_end,
+            future_start=future_start,
+        )
+
+    def _snapshot_of(
+        self,
+        *,
+        past_end: int,
+        current: int,
+        future_start: int,
+        remaining_time: int,
+        total_remaining_time: int | None,
+    ) -> PausableTimerSequenceSnapshot:
+        snapshot = PausableTimerSequenceSnapshot.__new__(PausableTimerSequenceSnapshot)
+        snapshot._set(
+            past=self._timers[:past_end],
+            current=self._timers[current] if current >= 0 else None,
+            future=self._timers[future_start:],
             remaining_time=remaining_time,
             total_remaining_time=total_remaining_time,
         )
 
+        return snapshot
+
     @classmethod
     def from_timers(
         cls,
         started_at: datetime,
         durations: Iterable[timedelta],
         pauses: Iterable[DateTimePeriod],
+        repeat: Repeat | None = None,
     ) -> "PausableTimerSequence":
+        if repeat is not None:
+            return RepeatingPausableTimerSequence(started_at, durations, pauses, repeat)
+
         usable_pauses = list(pauses)
 
-        elapsed_time = timedelta()
-        pausable_timers: list[PausedDateTimePeriod] = []
+        sequence = cls.__new__(cls)
+        sequence._started_at = to_microseconds(started_at)
+        sequence._timers = array("q", (x // MICROSECOND for x in durations))
+        sequence._ends = array("q")
+        sequence._pause_starts = array("q")
+        sequence._pause_ends = array("q")
+        sequence._pause_offsets = array("q", [0])
 
-        for duration in durations:
-            elapsed_time += duration
-            end = started_at + elapsed_time
-            start = end - duration
+        assert len(sequence._timers) > 0
 
-            timer = PausedDateTimePeriod.from_datetime_period(
-                DateTimePeriod(start, end)
-            )
+        end = sequence._started_at
+        for duration in sequence._timers:
+            end += duration
 
             unused_pauses: list[DateTimePeriod] = []
             for pause in usable_pauses:
-                if pause.start <= timer.end:
-                    timer = timer.add_pause(pause)
-                    elapsed_time += pause.duration
+                if pause._start <= end:
+                    sequence._pause_starts.append(pause._start)
+                    sequence._pause_ends.append(pause._end)
+                    end += pause._end - pause._start
                 else:
                     unused_pauses.append(pause)
 
             usable_pauses = unused_pauses
-            pausable_timers.append(timer)
+            sequence._ends.append(end)
+            sequence._pause_offsets.append(len(sequence._pause_starts))
+
+        sequence._set_remaining()
+
+        return sequence
+
+    def __iter__(self) -> Iterator[PausedDateTimePeriod]:
+        for i, end in enumerate(self._ends):
+            start = from_microseconds(self._start_of(i))
+            pauses = range(self._pause_offsets[i], self._pause_offsets[i + 1])
+
+            yield PausedDateTimePeriod(
+                start=start,
+                end=from_microseconds(end),
+                timer=DateTimePeriod(
+                    start, start + timedelta(microseconds=self._timers[i])
+                ),
+                pauses=[
+                    DateTimePeriod(
+                        from_microseconds(self._pause_starts[j]),
+                        from_microseconds(self._pause_ends[j]),
+                    )
+                    for j in pauses
+                ],
+            )
+
+
+@dataclass(frozen=True, kw_only=True)
+class PausableTimerSequenceTimeline:
+    """
+    Snapshots of a sequence at sorted instants, as parallel arrays in integer
+    microseconds, one item per instant. `current` is the index of the current
+    timer (-1 when there is none), past timers end at `past_end` and future
+    ones start at `future_start`. `total_remaining_time` is None when the
+    sequence repeats indefinitely.
+    """
+
+    sequence: "PausableTimerSequence"
+    instants: Sequence[int]
+    current: Sequence[int]
+    remaining_time: Sequence[int]
+    total_remaining_time: Sequence[int] | None
+    past_end: Sequence[int]
+    future_start: Sequence[int]
+
+    def __len__(self) -> int:
+        return len(self.instants)
+
+    def __getitem__(self, i: int) -> PausableTimerSequenceSnapshot:
+        return self.sequence._snapshot_of(
+            past_end=self.past_end[i],
+            current=self.current[i],
+            future_start=self.future_start[i],
+            remaining_time=self.remaining_time[i],
+            total_remaining_time=None
+            if self.total_remaining_time is None
+            else self.total_remaining_time[i],
+        )
+
+
+class RepeatingPausableTimerSequence(PausableTimerSequence):
+    """
+    `PausableTimerSequence` of timers with a `Repeat`, in memory linear in
+    the stored timers and the pauses only: the end of a timer is its offset in
+    the repeated timers shifted by the pauses up to it, both found by bisection.
+    """
+
+    __slots__ = (
+        "_repeated",
+        "_pause_timers",
+        "_shift_timers",
+        "_shifts",
+        "_shift_ends",
+    )
+
+    # the i-th pause is absorbed by the `_pause_timers[i]`-th timer, timers
+    # from `_shift_timers[j]` on end `_shifts[j]` later, the first of them at
+    # `_shift_ends[j]`
+    _repeated: RepeatedTimers
+    _pause_timers: array[int]
+    _shift_timers: array[int]
+    _shifts: array[int]
+    _shift_ends: array[int]
+
+    def __init__(
+        self,
+        started_at: datetime,
+        durations: Iterable[timedelta],
+        pauses: Iterable[DateTimePeriod],
+        repeat: Repeat,
+    ):
+        self._started_at = to_microseconds(started_at)
+        self._repeated = RepeatedTimers((x // MICROSECOND for x in durations), repeat)
+        self._pause_starts = array("q")
+        self._pause_ends = array("q")
+        self._pause_timers = array("q")
+        self._shift_timers = array("q")
+        self._shifts = array("q")
+        self._shift_ends = array("q")
+
+        # as in `from_timers`, a pause is absorbed by the first timer ending
+        # at or after its start, the pauses before it included
+        size = self._repeated.size
+        timer = shift = 0
+        for pause in pauses:
+            timer = max(
+                timer,
+                self._repeated.count_ended_by(
+                    pause._start - self._started_at - shift - 1
+                ),
+            )
+            if size is not None and timer >= size:
+                break
+
+            shift += pause._end - pause._start
+            self._pause_starts.append(pause._start)
+            self._pause_ends.append(pause._end)
+            self._pause_timers.append(timer)
+            if self._shift_timers and self._shift_timers[-1] == timer:
+                self._shifts[-1] = shift
+            else:
+                self._shift_timers.append(timer)
+                self._shifts.append(shift)
+
+        for timer, shift in zip(self._shift_timers, self._shifts):
+            self._shift_ends.append(
+                self._started_at + self._repeated.offset(timer + 1) + shift
+            )
+
+    def _shift_of(self, index: int) -> int:
+        j = bisect_right(self._shift_timers, index) - 1
+        return self._shifts[j] if j >= 0 else 0
+
+    def _end_of(self, index: int) -> int:
+        return (
+            self._started_at + self._repeated.offset(index + 1) + self._shift_of(index)
+        )
+
+    def _start_of(self, index: int) -> int:
+        return self._end_of(index - 1) if index > 0 else self._started_at
+
+    def _count_ended_by(self, instant: int) -> int:
+        # timers of the j-th shift all end at or after `_shift_ends[j]`
+        j = bisect_right(self._shift_ends, instant) - 1
+        low = self._shift_timers[j] if j >= 0 else 0
+        high = (
+            self._shift_timers[j + 1]
+            if j + 1 < len(self._shift_timers)
+            else self._repeated.size
+        )
+        shift = self._shifts[j] if j >= 0 else 0
+
+        count = self._repeated.count_ended_by(instant - self._started_at - shift)
+        count = max(count, low)
+        return count if high is None else min(count, high)
+
+    @property
+    def repeat(self) -> Repeat:
+        return self._repeated.repeat
+
+    def timer_ends(self, unit: timedelta = MICROSECOND) -> "RepeatedTimerEnds":
+        """Ends of the timers, in `unit`s, each computed when read."""
+        if self._repeated.size is None:
+            raise ValueError("endless timers have no last end")
+
+        return RepeatedTimerEnds(self, unit)
+
+    @property
+    def pausable_timers(self) -> list[PausedDateTimePeriod]:
+        if self._repeated.size is None:
+            raise ValueError("endless timers, iterate them instead")
+
+        return list(self)
+
+    @property
+    def ends_at(self) -> datetime | None:  # type: ignore[override]
+        if self._repeated.size is None:
+            return None
+
+        return from_microseconds(self._end_of(self._repeated.size - 1))
+
+    @property
+    def total_duration(self) -> timedelta | None:  # type: ignore[override]
+        if self._repeated.size is None:
+            return None
+
+        return timedelta(
+            microseconds=self._end_of(self._repeated.size - 1) - self._started_at
+        )
+
+    def snapshot(self, now: datetime) -> PausableTimerSequenceSnapshot:
+        past_end, current, future_start, remaining_time, total_remaining_time = (
+            self._sample(to_microseconds(now))
+        )
+
+        return self._snapshot_of(
+            past_end=past_end,
+            current=current,
+            future_start=future_start,
+            remaining_time=remaining_time,
+            total_remaining_time=total_remaining_time,
+        )
+
+    def snapshot_many(
+        self, nows: Iterable[datetime]
+    ) -> "PausableTimerSequenceTimeline":
+        """
+        The timers are not swept, there may be millions of them: each instant
+        is bisected, in O(log(timers + pauses)).
+        """
+        instants = array("q", (to_microseconds(x) for x in nows))
+        columns = [array("q", bytes(8 * len(instants))) for _ in range(5)]
+        for i, instant in enumerate(instants):
+            if i > 0 and instant < instants[i - 1]:
+                raise ValueError("instants are not sorted")
+
+            for column, value in zip(columns, self._sample(instant)):
+                column[i] = value or 0
+
+        past_end, current, future_start, remaining_time, total_remaining_time = columns
+        return PausableTimerSequenceTimeline(
+            sequence=self,
+            instants=instants,
+            current=current,
+            remaining_time=remaining_time,
+            total_remaining_time=None
+            if self._repeated.size is None
+            else total_remaining_time,
+            past_end=past_end,
+            future_start=future_start,
+        )
+
+    def _sample(self, instant: int) -> tuple[int, int, int, int, int | None]:
+        """Past end, current index (or -1), future start and remaining times."""
+        size = self._repeated.size
+
+        # past timers ended strictly before now, future ones start strictly after
+        current_index = self._count_ended_by(instant - 1)
+        future_index = 0
+        if instant >= self._started_at:
+            future_index = self._count_ended_by(instant) + 1
+            if size is not None:
+                future_index = min(future_index, size)
+
+        current = -1
+        remaining_time = 0
+        if (size is None or current_index < size) and self._start_of(
+            current_index
+        ) <= instant:
+            current = current_index
+            remaining_time = self._end_of(current_index) - instant
+
+        total_remaining_time: int | None = None
+        if size is not None:
+            total_remaining_time = remaining_time
+            if future_index < size:
+                total_remaining_time += self._end_of(size - 1) - self._start_of(
+                    future_index
+                )
+
+        return (
+            current_index,
+            current,
+            future_index,
+            remaining_time,
+            total_remaining_time,
+        )
+
+    def _snapshot_of(
+        self,
+        *,
+        past_end: int,
+        current: int,
+        future_start: int,
+        remaining_time: int,
+        total_remaining_time: int | None,
+    ) -> PausableTimerSequenceSnapshot:
+        snapshot = PausableTimerSequenceSnapshot.__new__(PausableTimerSequenceSnapshot)
+        snapshot._set(
+            past=TimerSlice(self._repeated, 0, past_end),
+            current=self._repeated[current] if current >= 0 else None,
+            future=TimerSlice(self._repeated, future_start, self._repeated.size),
+            remaining_time=remaining_time,
+            total_remaining_time=total_remaining_time,
+        )
+
+        return snapshot
+
+    def __iter__(self) -> Iterator[PausedDateTimePeriod]:
+        index = pause = 0
+        start = self._started_at
+        while self._repeated.size is None or index < self._repeated.size:
+            end = self._end_of(index)
+            pauses: list[DateTimePeriod] = []
+            while (
+                pause < len(self._pause_timers) and self._pause_timers[pause] == index
+            ):
+                pauses.append(
+                    DateTimePeriod(
+                        from_microseconds(self._pause_starts[pause]),
+                        from_microseconds(self._pause_ends[pause]),
+                    )
+                )
+                pause += 1
+
+            yield PausedDateTimePeriod(
+                start=from_microseconds(start),
+                end=from_microseconds(end),
+                timer=DateTimePeriod(
+                    from_microseconds(start),
+                    from_microseconds(start + self._repeated[index]),
+                ),
+                pauses=pauses,
+            )
+            start = end
+            index += 1
+
+
+class RepeatedTimerEnds(Sequence[int]):
+    """
+    Ends of the timers of a finite `RepeatingPausableTimerSequence`, in
+    integer `unit`s since the epoch, bisectable without laying out the cycles.
+    """
+
+    __slots__ = ("_sequence", "_unit")
+
+    def __init__(self, sequence: RepeatingPausableTimerSequence, unit: timedelta):
+        assert sequence._repeated.size is not None
+
+        self._sequence = sequence
+        self._unit = unit // MICROSECOND
 
-        return cls(pausable_timers=pausable_timers)
+    def __len__(self) -> int:
+        return cast(int, self._sequence._repeated.size)
 
-    def __post_init__(self):
-        assert len(self.pausable_timers) > 0
+    def __getitem__(self, index: int) -> int:  # type: ignore[override]
+        if not 0 <= index < len(self):
+            raise IndexError(index)
 
-    def __iter__(self) -> Iterator[DateTimePeriod]:
-        return iter(self.pausable_timers)
+        return self._sequence._end_of(index) // self._unit
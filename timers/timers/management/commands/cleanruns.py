@@ -1,15 +1,130 @@
-from django.core.management.base import BaseCommand
+import time
+from datetime import timedelta
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection, models, transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_duration
 
-from timers.models import TimerSequenceRun
+from timers.models import TimerSequencePause, TimerSequenceRun
 
 
 class Command(BaseCommand):
     help = "Delete ended runs to save on storage space"
 
-    def handle(self):
-        now = timezone.now()
-        runs = TimerSequenceRun.objects.filter(ends_at__lt=now).delete()
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Runs deleted per transaction",
+        )
+        parser.add_argument(
+            "--sleep-between",
+            type=float,
+            default=0.0,
+            help="Seconds to wait between two batches, releasing the write lock",
+        )
+        parser.add_argument(
+            "--older-than",
+            type=parse_duration,
+            default=timedelta(),
+            help='Only delete runs ended for at least this long, e.g. "7 00:00:00"',
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the rows that would be deleted without deleting them",
+        )
+
+    def handle(
+        self,
+        *args: Any,
+        batch_size: int,
+        sleep_between: float,
+        older_than: timedelta | None,
+        dry_run: bool,
+        **options: Any,
+    ):
+        if batch_size <= 0:
+            raise CommandError("--batch-size must be positive")
+        if older_than is None:
+            raise CommandError("--older-than expects a duration")
+
+        before = timezone.now() - older_than
+        runs = pauses = batches = 0
+        started = time.perf_counter()
+
+        # walks the `ends_at` index by (ends_at, pk) keyset, only one batch of
+        # primary keys is held in memory at a time
+        cursor: tuple[Any, int] | None = None
+        while True:
+            ended = TimerSequenceRun.objects.filter(ends_at__lt=before)
+            if cursor is not None:
+                ended = ended.filter(
+                    models.Q(ends_at__gt=cursor[0])
+                    | models.Q(ends_at=cursor[0], pk__gt=cursor[1])
+                )
+            batch = list(
+                ended.order_by("ends_at", "pk").values_list("ends_at", "pk")[
+                    :batch_size
+                ]
+            )
+            if not batch:
+                break
+
+            cursor = batch[-1]
+            pks = [pk for _, pk in batch]
+            batch_runs, batch_pauses = self._delete(pks, dry_run=dry_run)
+            runs += batch_runs
+            pauses += batch_pauses
+            batches += 1
+
+            if options["verbosity"] >= 2:
+                self.stdout.write(
+                    f"batch {batches}: {batch_runs} runs, {batch_pauses} pauses"
+                )
+            if sleep_between > 0 and len(batch) == batch_size:
+                time.sleep(sleep_between)
+
+        elapsed = time.perf_counter() - started
+        throughput = runs / elapsed if elapsed > 0 else 0.0
+        verb = "Would delete" if dry_run else "Deleted"
         self.stdout.write(
-            self.style.SUCCESS(f"Deleted {len(runs)} obsolete runs, ended before {now}")
+            self.style.SUCCESS(
+                f"{verb} {runs} obsolete runs and {pauses} pauses, ended before "
+                f"{before}, in {batches} batches ({elapsed:.2f}s, "
+                f"{throughput:.0f} runs/s)"
+            )
+        )
+
+    def _delete(self, pks: list[int], *, dry_run: bool) -> tuple[int, int]:
+        pauses = TimerSequencePause.objects.filter(timer_sequence_run_id__in=pks)
+
+        if dry_run:
+            return len(pks), pauses.count()
+
+        # plain deletes skip the collector, which would load every run to
+        # cascade on its pauses, those are deleted explicitly first
+        placeholders = ", ".join(["%s"] * len(pks))
+        quote = connection.ops.quote_name
+        pause_table = quote(TimerSequencePause._meta.db_table)
+        pause_run = quote(
+            TimerSequencePause._meta.get_field("timer_sequence_run").column
         )
+        run_table = quote(TimerSequenceRun._meta.db_table)
+        run_pk = quote(TimerSequenceRun._meta.pk.column)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {pause_table} WHERE {pause_run} IN ({placeholders})",
+                pks,
+            )
+            deleted_pauses = cursor.rowcount
+            cursor.execute(
+                f"DELETE FROM {run_table} WHERE {run_pk} IN ({placeholders})",
+                pks,
+            )
+            deleted_runs = cursor.rowcount
+
+        return deleted_runs, deleted_pauses
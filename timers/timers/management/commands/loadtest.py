@@ -0,0 +1,317 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from http.cookiejar import CookieJar
+from typing import Any, Protocol
+from urllib.error import HTTPError
+from urllib.parse import urlencode, urlsplit
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, build_opener
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection
+from django.test import Client
+from django.urls import Resolver404, resolve, reverse
+
+RUN_LOCATION = re.compile(r"/sequences/(\d+)/runs/(\d+)$")
+SEQUENCE_ACTION = re.compile(r'action="/sequences/(\d+)/runs"')
+
+
+@dataclass(frozen=True, kw_only=True)
+class Response:
+    status: int
+    location: str
+    body: str
+
+
+class Transport(Protocol):
+    def request(
+        self, method: str, path: str, data: dict[str, str] | None = None
+    ) -> Response: ...
+
+
+class ClientTransport:
+    """In process, through the Django test client."""
+
+    def __init__(self, remote_addr: str):
+        # with DEBUG and no ALLOWED_HOSTS, Django accepts localhost
+        host = next(
+            (x.lstrip(".") for x in settings.ALLOWED_HOSTS if x != "*"), "localhost"
+        )
+        # a distinct address per visitor, the debug toolbar stays off
+        self.client = Client(
+            raise_request_exception=False,
+            HTTP_HOST=host,
+            REMOTE_ADDR=remote_addr,
+        )
+
+    def request(
+        self, method: str, path: str, data: dict[str, str] | None = None
+    ) -> Response:
+        response = getattr(self.client, method)(path, data)
+
+        return Response(
+            status=response.status_code,
+            location=response.get("Location", ""),
+            body=response.content.decode() if response.status_code == 200 else "",
+        )
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, *args: Any, **kwargs: Any):
+        return None
+
+
+class HTTPTransport:
+    """Against a running server, e.g. `manage.py runserver`."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies), _NoRedirect)
+
+    def request(
+        self, method: str, path: str, data: dict[str, str] | None = None
+    ) -> Response:
+        body = None
+        if method == "post":
+            csrf_token = next(
+                (x.value for x in self.cookies if x.name == "csrftoken"), ""
+            )
+            body = urlencode({**(data or {}), "csrfmiddlewaretoken": csrf_token})
+
+        try:
+            with self.opener.open(
+                self.base_url + path,
+                data=None if body is None else body.encode(),
+                timeout=30,
+            ) as response:
+                return Response(
+                    status=response.status,
+                    location=response.headers.get("Location", ""),
+                    body=response.read().decode(),
+                )
+        except HTTPError as e:
+            return Response(
+                status=e.code, location=e.headers.get("Location", ""), body=""
+            )
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def request(
+        self,
+        transport: Transport,
+        method: str,
+        path: str,
+        data: dict[str, str] | None = None,
+    ) -> Response:
+        started = time.perf_counter()
+        response = transport.request(method, path, data)
+        elapsed = time.perf_counter() - started
+
+        try:
+            endpoint = f"{method.upper()} {resolve(urlsplit(path).path).url_name}"
+        except Resolver404:
+            endpoint = f"{method.upper()} {path}"
+
+        with self.lock:
+            self.latencies[endpoint].append(elapsed)
+            if response.status >= 400:
+                self.errors[endpoint] += 1
+
+        return response
+
+
+def percentile(values: list[float], rank: float) -> float:
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(rank / 100 * len(ordered)) - 1))
+
+    return ordered[index]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict[str, Any]:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1e3,
+        "p95_ms": percentile(latencies, 95) * 1e3,
+        "p99_ms": percentile(latencies, 99) * 1e3,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate concurrent visitors going through the timers flows, and "
+        "report the latency and throughput of each endpoint. In process, the "
+        "visitors write into the configured database."
+    )
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--sessions", type=int, default=10)
+        parser.add_argument(
+            "--toggles", type=int, default=10, help="Pause toggles per run"
+        )
+        parser.add_argument(
+            "--think-time",
+            type=float,
+            default=1.0,
+            help="Mean pause between two actions of a visitor, in seconds",
+        )
+        parser.add_argument(
+            "--base-url",
+            help="Server to load, the test client is used in process otherwise",
+        )
+        parser.add_argument("--output", help="JSON file to write the results to")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(
+        self,
+        *args: Any,
+        sessions: int,
+        toggles: int,
+        think_time: float,
+        base_url: str | None,
+        output: str | None,
+        seed: int | None,
+        **options: Any,
+    ):
+        if sessions <= 0:
+            raise CommandError("--sessions must be positive")
+
+        recorder = Recorder()
+        failures: list[BaseException] = []
+        rng = random.Random(seed)
+        seeds = [rng.random() for _ in range(sessions)]
+
+        def visit(i: int):
+            transport: Transport = (
+                ClientTransport(f"10.0.{i // 256}.{i % 256}")
+                if base_url is None
+                else HTTPTransport(base_url)
+            )
+            try:
+                self._visit(
+                    transport,
+                    recorder,
+                    name=f"loadtest {i}",
+                    toggles=toggles,
+                    think_time=think_time,
+                    rng=random.Random(seeds[i]),
+                )
+            except Exception as e:
+                failures.append(e)
+            finally:
+                connection.close()
+
+        visitors = [threading.Thread(target=visit, args=(i,)) for i in range(sessions)]
+        started = time.perf_counter()
+        for visitor in visitors:
+            visitor.start()
+        for visitor in visitors:
+            visitor.join()
+        elapsed = time.perf_counter() - started
+
+        results = {
+            "sessions": sessions,
+            "toggles": toggles,
+            "think_time": think_time,
+            "target": base_url or "test client",
+            "elapsed": elapsed,
+            "failed_sessions": len(failures),
+            "endpoints": {
+                endpoint: summarize(latencies, recorder.errors[endpoint], elapsed)
+                for endpoint, latencies in sorted(recorder.latencies.items())
+            },
+            "total": summarize(
+                [x for latencies in recorder.latencies.values() for x in latencies],
+                sum(recorder.errors.values()),
+                elapsed,
+            ),
+        }
+
+        self._report(results)
+        for failure in failures[:3]:
+            self.stderr.write(f"session failed: {failure!r}")
+        if output:
+            with open(output, "w") as f:
+                json.dump(results, f, indent=2)
+
+    def _visit(
+        self,
+        transport: Transport,
+        recorder: Recorder,
+        *,
+        name: str,
+        toggles: int,
+        think_time: float,
+        rng: random.Random,
+    ):
+        def think():
+            if think_time > 0:
+                time.sleep(rng.expovariate(1 / think_time))
+
+        recorder.request(transport, "get", reverse("sequences"))
+        think()
+        recorder.request(transport, "get", reverse("create_sequence"))
+        think()
+        recorder.request(
+            transport,
+            "post",
+            reverse("create_sequence"),
+            {
+                "name": name,
+                "form-TOTAL_FORMS": "2",
+                "form-INITIAL_FORMS": "0",
+                "form-0-duration": "00:25:00",
+                "form-1-duration": "00:05:00",
+            },
+        )
+        think()
+
+        listing = recorder.request(transport, "get", reverse("sequences"))
+        sequence_ids = SEQUENCE_ACTION.findall(listing.body)
+        if not sequence_ids:
+            raise CommandError("the created sequence is not listed")
+        think()
+
+        started = recorder.request(
+            transport,
+            "post",
+            reverse("run_sequence", kwargs={"sequence_id": sequence_ids[-1]}),
+        )
+        location = RUN_LOCATION.search(started.location)
+        if location is None:
+            raise CommandError(f"unexpected run location {started.location!r}")
+        run_url = location.group(0)
+
+        recorder.request(transport, "get", run_url)
+        for _ in range(toggles):
+            think()
+            recorder.request(transport, "post", run_url)
+            recorder.request(transport, "get", run_url + "/state")
+
+    def _report(self, results: dict[str, Any]):
+        self.stdout.write(
+            f"{results['sessions']} sessions in {results['elapsed']:.1f}s, "
+            f"{results['failed_sessions']} failed"
+        )
+        self.stdout.write(
+            f"{'endpoint':<28}{'requests':>10}{'errors':>8}{'rps':>9}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        )
+        rows = {**results["endpoints"], "total": results["total"]}
+        for endpoint, x in rows.items():
+            self.stdout.write(
+                f"{endpoint:<28}{x['requests']:>10}{x['errors']:>8}{x['rps']:>9.1f}"
+                f"{x['p50_ms']:>9.1f}{x['p95_ms']:>9.1f}{x['p99_ms']:>9.1f}"
+            )
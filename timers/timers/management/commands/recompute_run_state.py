@@ -0,0 +1,107 @@
+import json
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import django
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from timers.lib.run_state import RUN_STATE_FIELDS, recompute_run_states
+from timers.models import TimerSequencePause, TimerSequenceRun
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the state columns of the runs ({}) from their pauses, by "
+        "chunks, resuming from a checkpoint file when one is given"
+    ).format(", ".join(RUN_STATE_FIELDS))
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Runs read, projected and written at once",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=Path,
+            help="JSON file recording the last written run, to resume from",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=0,
+            help="Project the chunks in a pool of processes, 0 to stay in process",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the runs that would be updated without writing them",
+        )
+
+    def handle(
+        self,
+        *args: Any,
+        chunk_size: int,
+        checkpoint: Path | None,
+        processes: int,
+        dry_run: bool,
+        **options: Any,
+    ):
+        if chunk_size <= 0:
+            raise CommandError("--chunk-size must be positive")
+        if processes < 0:
+            raise CommandError("--processes must be positive")
+
+        after = 0
+        if checkpoint is not None and checkpoint.exists():
+            after = json.loads(checkpoint.read_text())["last_pk"]
+            self.stdout.write(f"Resuming after run {after}")
+
+        executor: Executor | None = None
+        if processes > 0:
+            executor = ProcessPoolExecutor(processes, initializer=django.setup)
+
+        runs = updated = chunks = 0
+        started = time.perf_counter()
+        try:
+            for chunk in recompute_run_states(
+                TimerSequenceRun,
+                TimerSequencePause,
+                after=after,
+                chunk_size=chunk_size,
+                executor=executor,
+                in_flight=2 * processes,
+                dry_run=dry_run,
+            ):
+                runs += chunk.runs
+                updated += chunk.updated
+                chunks += 1
+
+                # written once the chunk is committed, a killed run redoes
+                # at most the chunks in flight
+                if checkpoint is not None and not dry_run:
+                    checkpoint.write_text(json.dumps({"last_pk": chunk.last_pk}))
+                if options["verbosity"] >= 2:
+                    self.stdout.write(
+                        f"chunk {chunks}: {chunk.updated}/{chunk.runs} runs updated, "
+                        f"up to run {chunk.last_pk}"
+                    )
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        if checkpoint is not None and not dry_run:
+            checkpoint.unlink(missing_ok=True)
+
+        elapsed = time.perf_counter() - started
+        throughput = runs / elapsed if elapsed > 0 else 0.0
+        verb = "Would update" if dry_run else "Updated"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {updated} of {runs} runs in {chunks} chunks "
+                f"({elapsed:.2f}s, {throughput:.0f} runs/s)"
+            )
+        )
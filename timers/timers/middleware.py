@@ -0,0 +1,155 @@
+import mimetypes
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, HttpRequest, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import sync_and_async_middleware
+
+from timers.lib.metrics import RequestSample, current_sample, request_metrics
+from timers.storage import ENCODINGS
+
+
+def _is_sampled() -> bool:
+    rate: float = settings.METRICS_SAMPLE_RATE
+    return rate > 0 and (rate >= 1 or random.random() < rate)
+
+
+def _view_name(request: HttpRequest) -> str:
+    match = request.resolver_match
+    return (match.url_name or match.view_name) if match else "unmatched"
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response: Callable[[HttpRequest], Any]) -> Any:
+    """
+    Records the latency, SQL queries and template rendering time of a
+    sample of the requests, see `timers.lib.metrics`.
+    """
+    if iscoroutinefunction(get_response):
+        aget_response: Callable[[HttpRequest], Awaitable[HttpResponse]] = get_response
+
+        async def amiddleware(request: HttpRequest) -> HttpResponse:
+            if not _is_sampled():
+                return await aget_response(request)
+
+            sample = RequestSample()
+            token = current_sample.set(sample)
+            try:
+                response = await aget_response(request)
+            finally:
+                current_sample.reset(token)
+
+            request_metrics.observe(_view_name(request), sample, time.perf_counter())
+            return response
+
+        return amiddleware
+
+    def middleware(request: HttpRequest) -> HttpResponse:
+        if not _is_sampled():
+            return get_response(request)
+
+        sample = RequestSample()
+        token = current_sample.set(sample)
+        try:
+            response = get_response(request)
+        finally:
+            current_sample.reset(token)
+
+        request_metrics.observe(_view_name(request), sample, time.perf_counter())
+        return response
+
+    return middleware
+
+
+def _accepted_encodings(request: HttpRequest) -> set[str]:
+    encodings: set[str] = set()
+    for value in request.headers.get("Accept-Encoding", "").split(","):
+        encoding, _, params = value.partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if params and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        encodings.add(encoding.strip().lower())
+
+    return encodings
+
+
+@sync_and_async_middleware
+def static_files_middleware(get_response: Callable[[HttpRequest], Any]) -> Any:
+    """
+    Serves the collected static files out of STATIC_ROOT, in their brotli or
+    gzip sibling written by `timers.storage` when the client accepts it.
+    Content hashed names never change, they are cached as immutable.
+
+    Off with DEBUG, where `runserver` serves the static files unhashed.
+    """
+    if settings.DEBUG or not settings.STATIC_ROOT:
+        raise MiddlewareNotUsed()
+
+    root = os.fspath(settings.STATIC_ROOT)
+    prefix: str = settings.STATIC_URL
+    # the manifest is read once, the files are collected before starting
+    hashed_names = set(getattr(staticfiles_storage, "hashed_files", {}).values())
+
+    def serve(request: HttpRequest) -> HttpResponse | None:
+        if request.method not in ("GET", "HEAD") or not request.path.startswith(prefix):
+            return None
+
+        name = request.path.removeprefix(prefix)
+        try:
+            path = safe_join(root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        content_type, _ = mimetypes.guess_type(name)
+        accepted = _accepted_encodings(request)
+        encoding = next(
+            (
+                (x, suffix)
+                for x, suffix in ENCODINGS
+                if x in accepted and os.path.isfile(path + suffix)
+            ),
+            None,
+        )
+
+        response = FileResponse(
+            open(path if encoding is None else path + encoding[1], "rb"),
+            content_type=content_type or "application/octet-stream",
+        )
+        if encoding is not None:
+            response["Content-Encoding"] = encoding[0]
+        patch_vary_headers(response, ["Accept-Encoding"])
+        response["Cache-Control"] = (
+            "public, max-age=31536000, immutable"
+            if name in hashed_names
+            else "no-cache"
+        )
+
+        return response
+
+    if iscoroutinefunction(get_response):
+        aget_response: Callable[[HttpRequest], Awaitable[HttpResponse]] = get_response
+
+        async def amiddleware(request: HttpRequest) -> HttpResponse:
+            response = serve(request)
+            return response if response is not None else await aget_response(request)
+
+        return amiddleware
+
+    def middleware(request: HttpRequest) -> HttpResponse:
+        response = serve(request)
+        return response if response is not None else get_response(request)
+
+    return middleware
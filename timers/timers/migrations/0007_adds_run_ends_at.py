@@ -7,7 +7,6 @@ from django.db import migrations, models
 from django.utils import timezone
 
 from timers.lib.projections import TimerProjection
-from timers.models import TimerSequencePause, TimerSequenceRun
 
 forward_created_by_sql = """
 UPDATE timers_timersequencerun
@@ -18,15 +17,37 @@ WHERE sequence.id = timers_timersequencerun.timer_sequence_id
 
 
 def forward_ends_at(app: Any, state_editor: Any):
+    # historical models: the current ones may hold columns added afterwards
+    TimerSequenceRun = app.get_model("timers", "TimerSequenceRun")
+    TimerSequencePause = app.get_model("timers", "TimerSequencePause")
+
+    # the pauses are prefetched per chunk of runs, which are written back in
+    # bulk, later state columns go through `timers.lib.run_state`
     now = timezone.now()
-    for run in TimerSequenceRun.objects.prefetch_related("pauses").all():
-        pauses = TimerSequencePause.objects.filter(timer_sequence_run=run).all()
-        state = TimerProjection.from_timer_sequence_run(
-            now, sequence_run=run, pauses=pauses
+    runs = (
+        TimerSequenceRun.objects.prefetch_related(
+            models.Prefetch(
+                "pauses",
+                queryset=TimerSequencePause.objects.order_by("started_at", "pk"),
+            )
         )
+        .order_by("pk")
+        .iterator(chunk_size=2000)
+    )
 
+    chunk: list[Any] = []
+    for run in runs:
+        state = TimerProjection.from_timer_sequence_run(
+            now, sequence_run=run, pauses=run.pauses.all()
+        )
         run.ends_at = state.ends_at
-        run.save()
+        chunk.append(run)
+
+        if len(chunk) == 2000:
+            TimerSequenceRun.objects.bulk_update(chunk, ["ends_at"], batch_size=500)
+            chunk = []
+
+    TimerSequenceRun.objects.bulk_update(chunk, ["ends_at"], batch_size=500)
 
 
 def backward_ends_at(app: Any, state_editor: Any):
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:00
+
+import datetime
+from collections import defaultdict
+from typing import Any
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def forward_pause_state(app: Any, state_editor: Any):
+    TimerSequenceRun = app.get_model("timers", "TimerSequenceRun")
+    TimerSequencePause = app.get_model("timers", "TimerSequencePause")
+
+    paused_since: dict[int, datetime.datetime] = {}
+    total_paused: dict[int, datetime.timedelta] = defaultdict(datetime.timedelta)
+    for pause in TimerSequencePause.objects.order_by(
+        "timer_sequence_run_id", "started_at"
+    ).iterator():
+        if pause.ended_at is None:
+            paused_since[pause.timer_sequence_run_id] = pause.started_at
+        else:
+            total_paused[pause.timer_sequence_run_id] += (
+                pause.ended_at - pause.started_at
+            )
+
+    runs: list[Any] = []
+    for run in TimerSequenceRun.objects.filter(
+        pk__in=set(paused_since) | set(total_paused)
+    ).iterator():
+        run.paused_since = paused_since.get(run.pk)
+        run.total_paused = total_paused[run.pk]
+        runs.append(run)
+
+    TimerSequenceRun.objects.bulk_update(
+        runs, ["paused_since", "total_paused"], batch_size=500
+    )
+
+
+def backward_pause_state(app: Any, state_editor: Any):
+    pass
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("timers", "0007_adds_run_ends_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="timersequencerun",
+            name="paused_since",
+            field=models.DateTimeField(default=None, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="timersequencerun",
+            name="total_paused",
+            field=models.DurationField(default=datetime.timedelta, editable=False),
+        ),
+        migrations.RunPython(forward_pause_state, reverse_code=backward_pause_state),
+        migrations.AlterField(
+            model_name="timersequencepause",
+            name="started_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("timers", "0008_adds_run_pause_state"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="timersequencerun",
+            name="version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
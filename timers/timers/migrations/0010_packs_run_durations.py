@@ -0,0 +1,77 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:40
+
+from typing import Any
+
+from django.db import migrations
+
+from timers.lib.packing import PackedDurations
+from timers.models import TimerSequenceRun
+
+
+def forward_packed_durations(app: Any, state_editor: Any):
+    Run = app.get_model("timers", "TimerSequenceRun")
+
+    runs: list[Any] = []
+    for run in Run.objects.only("pk", "timer_sequence_durations").iterator(
+        chunk_size=2000
+    ):
+        run.packed_durations = PackedDurations.from_durations(
+            run.timer_sequence_durations
+        )
+        runs.append(run)
+
+        if len(runs) >= 2000:
+            Run.objects.bulk_update(runs, ["packed_durations"])
+            runs = []
+
+    Run.objects.bulk_update(runs, ["packed_durations"])
+
+
+def backward_packed_durations(app: Any, state_editor: Any):
+    Run = app.get_model("timers", "TimerSequenceRun")
+
+    runs: list[Any] = []
+    for run in Run.objects.only("pk", "packed_durations").iterator(chunk_size=2000):
+        run.timer_sequence_durations = list(run.packed_durations)
+        runs.append(run)
+
+        if len(runs) >= 2000:
+            Run.objects.bulk_update(runs, ["timer_sequence_durations"])
+            runs = []
+
+    Run.objects.bulk_update(runs, ["timer_sequence_durations"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("timers", "0009_adds_run_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="timersequencerun",
+            name="packed_durations",
+            field=TimerSequenceRun.PackedTimerSequenceDurationsField(
+                blank=True, null=True
+            ),
+        ),
+        migrations.RunPython(
+            forward_packed_durations, reverse_code=backward_packed_durations
+        ),
+        migrations.RemoveField(
+            model_name="timersequencerun",
+            name="timer_sequence_durations",
+        ),
+        migrations.RenameField(
+            model_name="timersequencerun",
+            old_name="packed_durations",
+            new_name="timer_sequence_durations",
+        ),
+        migrations.AlterField(
+            model_name="timersequencerun",
+            name="timer_sequence_durations",
+            field=TimerSequenceRun.PackedTimerSequenceDurationsField(
+                blank=False, null=False, editable=False
+            ),
+        ),
+    ]
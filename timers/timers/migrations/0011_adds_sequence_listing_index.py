@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sessions", "0001_initial"),
+        ("timers", "0010_packs_run_durations"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="timersequence",
+            index=models.Index(
+                fields=["created_by", "created_at", "id"],
+                name="timers_time_created_c6fe44_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sessions", "0001_initial"),
+        ("timers", "0011_adds_sequence_listing_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="timersequence",
+            name="repeat_count",
+            field=models.PositiveIntegerField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name="timersequence",
+            name="repeat_end",
+            field=models.PositiveSmallIntegerField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name="timersequence",
+            name="repeat_start",
+            field=models.PositiveSmallIntegerField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name="timersequencerun",
+            name="repeat_count",
+            field=models.PositiveIntegerField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name="timersequencerun",
+            name="repeat_end",
+            field=models.PositiveSmallIntegerField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name="timersequencerun",
+            name="repeat_start",
+            field=models.PositiveSmallIntegerField(default=None, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="timersequence",
+            constraint=models.CheckConstraint(
+                condition=models.Q(
+                    models.Q(
+                        ("repeat_count__isnull", True),
+                        ("repeat_end__isnull", True),
+                        ("repeat_start__isnull", True),
+                    ),
+                    models.Q(
+                        ("repeat_end__gt", models.F("repeat_start")),
+                        ("repeat_start__isnull", False),
+                        models.Q(
+                            ("repeat_count__isnull", True),
+                            ("repeat_count__gte", 1),
+                            _connector="OR",
+                        ),
+                    ),
+                    _connector="OR",
+                ),
+                name="timers_timersequence_repeat",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="timersequencerun",
+            constraint=models.CheckConstraint(
+                condition=models.Q(
+                    models.Q(
+                        ("repeat_count__isnull", True),
+                        ("repeat_end__isnull", True),
+                        ("repeat_start__isnull", True),
+                    ),
+                    models.Q(
+                        ("repeat_end__gt", models.F("repeat_start")),
+                        ("repeat_start__isnull", False),
+                        models.Q(
+                            ("repeat_count__isnull", True),
+                            ("repeat_count__gte", 1),
+                            _connector="OR",
+                        ),
+                    ),
+                    _connector="OR",
+                ),
+                name="timers_timersequencerun_repeat",
+            ),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:45
+
+from datetime import timedelta
+from typing import Any
+
+from django.db import migrations, models
+
+from timers.lib.timerange import Repeat
+
+
+def forward_total_duration(app: Any, state_editor: Any):
+    TimerSequenceRun = app.get_model("timers", "TimerSequenceRun")
+
+    runs = (
+        TimerSequenceRun.objects.order_by("pk")
+        .only(
+            "pk",
+            "timer_sequence_durations",
+            "repeat_start",
+            "repeat_end",
+            "repeat_count",
+        )
+        .iterator(chunk_size=2000)
+    )
+
+    chunk: list[Any] = []
+    for run in runs:
+        durations = list(run.timer_sequence_durations)
+        if run.repeat_start is None:
+            run.total_duration = sum(durations, timedelta())
+        else:
+            run.total_duration = Repeat(
+                run.repeat_start, run.repeat_end, run.repeat_count
+            ).total(durations)
+        chunk.append(run)
+
+        if len(chunk) == 2000:
+            TimerSequenceRun.objects.bulk_update(
+                chunk, ["total_duration"], batch_size=500
+            )
+            chunk = []
+
+    TimerSequenceRun.objects.bulk_update(chunk, ["total_duration"], batch_size=500)
+
+
+def backward_total_duration(app: Any, state_editor: Any):
+    pass
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("timers", "0012_adds_repeats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="timersequencerun",
+            name="total_duration",
+            field=models.DurationField(default=None, editable=False, null=True),
+        ),
+        migrations.RunPython(
+            forward_total_duration, reverse_code=backward_total_duration
+        ),
+    ]
@@ -1,18 +1,75 @@
+from base64 import b64decode, b64encode
 from datetime import datetime, timedelta
 from typing import Any, Iterable
 
+from asgiref.sync import sync_to_async
 from django.contrib.sessions.models import Session
 from django.core.exceptions import ValidationError
 from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext as _
 
+from timers.lib.packing import PackedDurations
+from timers.lib.timerange import Repeat
 
-class TimerSequence(models.Model):
+
+class Repeatable(models.Model):
+    """
+    Timers `repeat_start:repeat_end` played `repeat_count` times, or
+    indefinitely when the count is null, see `timers.lib.timerange.Repeat`.
+    """
+
+    repeat_start = models.PositiveSmallIntegerField(null=True, default=None)
+    repeat_end = models.PositiveSmallIntegerField(null=True, default=None)
+    repeat_count = models.PositiveIntegerField(null=True, default=None)
+
+    class Meta:
+        abstract = True
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(  # type: ignore
+                    repeat_start__isnull=True,
+                    repeat_end__isnull=True,
+                    repeat_count__isnull=True,
+                )
+                | (
+                    models.Q(
+                        repeat_start__isnull=False,
+                        repeat_end__gt=models.F("repeat_start"),
+                    )
+                    & (
+                        models.Q(repeat_count__isnull=True)
+                        | models.Q(repeat_count__gte=1)
+                    )
+                ),
+                name="%(app_label)s_%(class)s_repeat",
+            ),
+        ]
+
+    @property
+    def repeat(self) -> Repeat | None:
+        if self.repeat_start is None or self.repeat_end is None:
+            return None
+
+        return Repeat(self.repeat_start, self.repeat_end, self.repeat_count)
+
+    @repeat.setter
+    def repeat(self, value: Repeat | None):
+        self.repeat_start, self.repeat_end, self.repeat_count = (
+            (None, None, None) if value is None else value
+        )
+
+
+class TimerSequence(Repeatable):
     name = models.TextField(null=False, blank=False)
     created_by = models.ForeignKey(Session, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta(Repeatable.Meta):
+        # keyset pagination of the sequences list
+        indexes = [models.Index(fields=["created_by", "created_at", "id"])]
+
     def run(self, now: datetime, session_key: str) -> "TimerSequenceRun":
         durations: Iterable["TimerSequenceDuration"] = (
             TimerSequenceDuration.objects.filter(timer_sequence=self)
@@ -21,13 +78,67 @@ class TimerSequence(models.Model):
         )
         return TimerSequenceRun.create(self, durations, now, session_key=session_key)
 
-    def update_timers(self, timers: Iterable[timedelta]):
+    async def arun(self, now: datetime, session_key: str) -> "TimerSequenceRun":
+        durations = [
+            x
+            async for x in TimerSequenceDuration.objects.filter(
+                timer_sequence=self
+            ).order_by("index")
+        ]
+        return await TimerSequenceRun.acreate(
+            self, durations, now, session_key=session_key
+        )
+
+    def update_timers(
+        self,
+        timers: Iterable[timedelta],
+        current: Iterable["TimerSequenceDuration"] | None = None,
+    ):
+        """
+        Only writes the indexes that changed, `current` are the stored
+        durations when the caller already loaded them.
+        """
         with transaction.atomic():
-            TimerSequenceDuration.objects.filter(timer_sequence=self).delete()
+            stored = {
+                x.index: x
+                for x in (
+                    TimerSequenceDuration.objects.filter(timer_sequence=self)
+                    if current is None
+                    else current
+                )
+            }
+
+            created: list[TimerSequenceDuration] = []
+            updated: list[TimerSequenceDuration] = []
+            length = 0
             for index, duration in enumerate(timers):
-                TimerSequenceDuration(
-                    index=index, duration=duration, timer_sequence=self
-                ).save()
+                length = index + 1
+                previous = stored.get(index)
+                if previous is None:
+                    created.append(
+                        TimerSequenceDuration(
+                            index=index, duration=duration, timer_sequence=self
+                        )
+                    )
+                elif previous.duration != duration:
+                    previous.duration = duration
+                    updated.append(previous)
+
+            if any(x >= length for x in stored):
+                TimerSequenceDuration.objects.filter(
+                    timer_sequence=self, index__gte=length
+                ).delete()
+            if updated:
+                TimerSequenceDuration.objects.bulk_update(updated, ["duration"])
+            if created:
+                TimerSequenceDuration.objects.bulk_create(created)
+
+            # `updated_at` keys the cached sequence cards
+            if created or updated or length < len(stored):
+                self.updated_at = timezone.now()
+                TimerSequence.objects.filter(pk=self.pk).update(
+                    updated_at=self.updated_at
+                )
 
     @classmethod
     def create(
@@ -36,15 +147,20 @@ class TimerSequence(models.Model):
         timers: list[timedelta],
         session_key: str,
         now: datetime,
+        repeat: Repeat | None = None,
     ) -> "TimerSequence":
         assert len(timers) > 0, "expected a non empty list of timers"
+        if repeat is not None:
+            repeat.validate(timers)
 
         with transaction.atomic():
-            session = Session.objects.get(session_key=session_key)
-            sequence = TimerSequence(name=name, created_by=session, created_at=now)
+            sequence = TimerSequence(
+                name=name, created_by_id=session_key, created_at=now
+            )
+            sequence.repeat = repeat
             sequence.save()
 
-            sequence.update_timers(timers)
+            sequence.update_timers(timers, current=[])
 
             return sequence
 
@@ -69,7 +185,66 @@ class TimerSequenceDuration(models.Model):
         ]
 
 
-class TimerSequenceRun(models.Model):
+class TimerSequenceRunQuerySet(models.QuerySet["TimerSequenceRun"]):
+    def with_state(self, now: datetime) -> "TimerSequenceRunQuerySet":
+        """
+        Annotates the state of the runs at `now`, in SQL from the state
+        columns, so that they can be filtered and ordered by it:
+
+        - `state`, a `TimerState` value
+        - `paused_duration`, the pauses total, the running one included
+        - `effective_ends_at`, when the run ends if it runs from `now` on,
+          null when it repeats indefinitely
+        """
+        at = models.Value(now, output_field=models.DateTimeField())
+        is_paused = models.Q(paused_since__isnull=False)
+
+        return self.annotate(
+            # the values of `TimerState`, in the order of `from_timer_sequence_run`
+            state=models.Case(
+                models.When(is_paused, then=models.Value("paused")),
+                models.When(ends_at__lte=now, then=models.Value("ended")),
+                default=models.Value("running"),
+                output_field=models.CharField(),
+            ),
+            paused_duration=models.Case(
+                models.When(
+                    is_paused,
+                    then=models.F("total_paused") + (at - models.F("paused_since")),
+                ),
+                default=models.F("total_paused"),
+                output_field=models.DurationField(),
+            ),
+            effective_ends_at=models.Case(
+                models.When(
+                    is_paused,
+                    then=at
+                    + (
+                        (models.F("started_at") - models.F("paused_since"))
+                        + models.F("total_duration")
+                        + models.F("total_paused")
+                    ),
+                ),
+                default=models.F("ends_at"),
+                output_field=models.DateTimeField(),
+            ),
+        )
+
+    def ending(self, now: datetime, within: timedelta) -> "TimerSequenceRunQuerySet":
+        """Running runs ending within `within` after `now`, by the `ends_at` index."""
+        return self.filter(ends_at__gt=now, ends_at__lte=now + within)
+
+    def with_pauses(self) -> "TimerSequenceRunQuerySet":
+        return self.prefetch_related(
+            models.Prefetch(
+                "pauses",
+                queryset=TimerSequencePause.objects.order_by("started_at", "pk"),
+                to_attr="loaded_pauses",
+            )
+        )
+
+
+class TimerSequenceRun(Repeatable):
     class TimerSequenceDurationsField(models.Field):  # type: ignore
         def db_type(self, connection: Any):
             return "text"
@@ -96,18 +271,62 @@ class TimerSequenceRun(models.Model):
 
             raise ValidationError("Invalid durations")
 
+    class PackedTimerSequenceDurationsField(models.BinaryField):
+        # varint encoded milliseconds, see `timers.lib.packing`
+        def from_db_value(
+            self, value: bytes | memoryview | None, _expression: Any, _connection: Any
+        ) -> PackedDurations:
+            return PackedDurations(bytes(value) if value else b"")
+
+        def get_prep_value(self, value: Any) -> Any:
+            return self.to_python(value).packed
+
+        def to_python(self, value: Any) -> PackedDurations:
+            if isinstance(value, PackedDurations):
+                return value
+            if isinstance(value, (bytes, memoryview)):
+                return PackedDurations(bytes(value))
+            if isinstance(value, str):
+                # serialized through `value_to_string`
+                return PackedDurations(b64decode(value.encode("ascii")))
+            if value is None:
+                return PackedDurations(b"")
+            if isinstance(value, list) and all(isinstance(x, timedelta) for x in value):  # type: ignore
+                return PackedDurations.from_durations(value)  # type: ignore
+
+            raise ValidationError("Invalid durations")
+
+        def value_to_string(self, obj: models.Model) -> str:
+            return b64encode(self.get_prep_value(self.value_from_object(obj))).decode(
+                "ascii"
+            )
+
     created_by = models.ForeignKey(Session, on_delete=models.CASCADE, editable=False)
     timer_sequence = models.ForeignKey(
         TimerSequence, null=True, on_delete=models.SET_NULL, related_name="runs"
     )
     timer_sequence_name = models.TextField()
     started_at = models.DateTimeField(null=True)
-    timer_sequence_durations = TimerSequenceDurationsField(
+    timer_sequence_durations = PackedTimerSequenceDurationsField(
         blank=False, null=False, editable=False
     )
     ends_at = models.DateTimeField(null=True, default=None, editable=False)
-
-    class Meta:
+    # of the timers, repeats included, null when they repeat indefinitely
+    total_duration = models.DurationField(null=True, default=None, editable=False)
+    # running pause and total duration of the ended ones, denormalized from
+    # `TimerSequencePause` so that the run state never needs a pause scan
+    paused_since = models.DateTimeField(null=True, default=None, editable=False)
+    total_paused = models.DurationField(default=timedelta, editable=False)
+    # bumped on every state change, identifies a run state for caches and ETags
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = TimerSequenceRunQuerySet.as_manager()
+
+    # pauses ordered by start, loaded once by `TimerSequenceRunQuerySet.with_pauses`
+    # (or lazily by `get_pauses`) and kept in sync by `pause` and `unpause`
+    loaded_pauses: list["TimerSequencePause"]
+
+    class Meta(Repeatable.Meta):
         indexes = [models.Index(fields=["ends_at"])]
 
     @classmethod
@@ -118,60 +337,85 @@ class TimerSequenceRun(models.Model):
         now: datetime,
         session_key: str,
     ):
+        run = cls._new(sequence, durations, now, session_key)
+        run.save()
+
+        return run
+
+    @classmethod
+    async def acreate(
+        cls,
+        sequence: TimerSequence,
+        durations: Iterable[TimerSequenceDuration],
+        now: datetime,
+        session_key: str,
+    ):
+        run = cls._new(sequence, durations, now, session_key)
+        await run.asave()
+
+        return run
+
+    @classmethod
+    def _new(
+        cls,
+        sequence: TimerSequence,
+        durations: Iterable[TimerSequenceDuration],
+        now: datetime,
+        session_key: str,
+    ) -> "TimerSequenceRun":
         run = TimerSequenceRun(
             timer_sequence=sequence,
             timer_sequence_name=sequence.name,
             started_at=now,
             timer_sequence_durations=[d.duration for d in durations],
-            created_by=Session.objects.get(pk=session_key),
+            created_by_id=session_key,
         )
-        run.ends_at = run._get_ends_at(durations, [])
-        run.save()
+        # snapshot like the durations, editing the sequence leaves its runs as is
+        run.repeat = sequence.repeat
+        run.total_duration = run._get_total_duration()
+        run.ends_at = run._get_ends_at()
+        run.loaded_pauses = []
 
         return run
 
-    def is_paused(self):
-        try:
-            TimerSequencePause.objects.filter(
-                timer_sequence_run=self, ended_at__isnull=True
-            ).get()
-            return True
-        except TimerSequencePause.DoesNotExist:
-            return False
+    def get_pauses(self) -> list["TimerSequencePause"]:
+        if not hasattr(self, "loaded_pauses"):
+            self.loaded_pauses = list(self.pauses.order_by("started_at", "pk"))  # type: ignore
 
-    def _get_ends_at(
-        self,
-        durations: Iterable[TimerSequenceDuration] | Iterable[timedelta],
-        pauses: Iterable["TimerSequencePause"],
-    ) -> datetime | None:
-        if self.started_at is None:
-            return None
+        return self.loaded_pauses
 
-        total_duration: timedelta = timedelta()
-        for sequence in durations:
-            total_duration += (
-                sequence if isinstance(sequence, timedelta) else sequence.duration
-            )
+    async def aget_pauses(self) -> list["TimerSequencePause"]:
+        if not hasattr(self, "loaded_pauses"):
+            self.loaded_pauses = [
+                x
+                async for x in self.pauses.order_by("started_at", "pk")  # type: ignore
+            ]
 
-        for pause in pauses:
-            if pause.ended_at is None:
-                continue
-            total_duration += pause.ended_at - pause.started_at
+        return self.loaded_pauses
 
-        return self.started_at + total_duration
+    def is_paused(self) -> bool:
+        return self.paused_since is not None
 
-    def is_ended(self, now: datetime) -> bool:
+    def _get_total_duration(self) -> timedelta | None:
+        durations: list[timedelta] = list(self.timer_sequence_durations)  # type: ignore
+        if self.repeat is not None:
+            return self.repeat.total(durations)
+
+        return sum(durations, timedelta())
+
+    def _get_ends_at(self) -> datetime | None:
         if self.started_at is None or self.is_paused():
-            return False
+            return None
 
-        ends_at = self._get_ends_at(
-            durations=TimerSequenceDuration.objects.filter(
-                timer_sequence=self.timer_sequence
-            ),
-            pauses=TimerSequencePause.objects.filter(timer_sequence_run=self).all(),
-        )
+        # a run repeating indefinitely never ends
+        total_duration = self._get_total_duration()
+        if total_duration is None:
+            return None
+
+        return self.started_at + total_duration + self.total_paused
 
-        return ends_at <= now if ends_at is not None else False
+    def is_ended(self, now: datetime) -> bool:
+        return self.ends_at is not None and self.ends_at <= now
 
     def toggle(self, now: datetime):
         if self.is_ended(now):
@@ -183,22 +427,26 @@ class TimerSequenceRun(models.Model):
         return self.pause(now)
 
     def unpause(self, now: datetime):
-        if self.is_ended(now):
-            raise ValidationError(_("timer {id} ended") % {"id": self.pk})
-
-        running_pause = TimerSequencePause.objects.get(
-            timer_sequence_run=self, ended_at__isnull=True
-        )
+        if self.paused_since is None:
+            raise ValidationError(_('timer "{id}" is not paused') % {"id": self.pk})
 
-        running_pause.ended_at = now
-        running_pause.save()
+        with transaction.atomic():
+            TimerSequencePause.objects.filter(
+                timer_sequence_run=self, ended_at__isnull=True
+            ).update(ended_at=now)
+
+            self.total_paused += now - self.paused_since
+            self.paused_since = None
+            self.ends_at = self._get_ends_at()
+            self.version += 1
+            self.save(
+                update_fields=["paused_since", "total_paused", "ends_at", "version"]
+            )
 
-        pauses = TimerSequencePause.objects.filter(timer_sequence_run=self).all()
-        self.ends_at = self._get_ends_at(
-            self.timer_sequence_durations,  # type: ignore
-            pauses,
-        )
-        self.save()
+        if hasattr(self, "loaded_pauses"):
+            for pause in self.loaded_pauses:
+                if pause.ended_at is None:
+                    pause.ended_at = now
 
     def pause(self, now: datetime):
         if self.is_paused():
@@ -207,12 +455,29 @@ class TimerSequenceRun(models.Model):
         if self.is_ended(now):
             raise ValidationError(_('timer "{id}" ended') % {"id": self.pk})
 
-        TimerSequencePause.objects.create(
-            started_at=now, timer_sequence_run=self
-        ).save()
+        with transaction.atomic():
+            pause = TimerSequencePause.objects.create(
+                started_at=now, timer_sequence_run=self
+            )
+
+            self.paused_since = now
+            self.ends_at = None
+            self.version += 1
+            self.save(update_fields=["paused_since", "ends_at", "version"])
+
+        if hasattr(self, "loaded_pauses"):
+            self.loaded_pauses.append(pause)
+
+    # transactions are sync only in Django, the async variants run the sync
+    # methods in a thread
+    async def atoggle(self, now: datetime):
+        return await sync_to_async(self.toggle)(now)
+
+    async def aunpause(self, now: datetime):
+        return await sync_to_async(self.unpause)(now)
 
-        self.ends_at = None
-        self.save()
+    async def apause(self, now: datetime):
+        return await sync_to_async(self.pause)(now)
 
 
 class TimerSequencePause(models.Model):
@@ -220,7 +485,7 @@ class TimerSequencePause(models.Model):
         TimerSequenceRun, on_delete=models.CASCADE, related_name="pauses"
     )
 
-    started_at = models.DateTimeField(null=False, auto_now_add=True)
+    started_at = models.DateTimeField(null=False, default=timezone.now)
     ended_at = models.DateTimeField(null=True)
 
     class Meta:
@@ -0,0 +1,54 @@
+import time
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+
+class SessionStore(CachedDBStore):
+    """
+    Cached, database backed sessions, read from the cache. Saving a session
+    that did not change only refreshes its expiry in the cache, the database
+    row is written behind, at most once per `SESSION_EXPIRY_WRITE_INTERVAL`
+    seconds. The row is written to expire that interval after the session,
+    so it exists for as long as the session does in the cache, neither
+    `clearsessions` nor the `created_by` foreign keys see it missing.
+    """
+
+    cache_key_prefix = "timers.sessions"
+
+    @property
+    def written_at_cache_key(self) -> str:
+        return self.cache_key + ".written_at"
+
+    def _is_written_recently(self) -> bool:
+        written_at: float | None = self._cache.get(self.written_at_cache_key)
+
+        return (
+            written_at is not None
+            and time.time() - written_at < settings.SESSION_EXPIRY_WRITE_INTERVAL
+        )
+
+    def create_model_instance(self, data: dict[str, Any]) -> Any:
+        instance = super().create_model_instance(data)
+        instance.expire_date += timedelta(
+            seconds=settings.SESSION_EXPIRY_WRITE_INTERVAL
+        )
+
+        return instance
+
+    def save(self, must_create: bool = False):
+        if (
+            must_create
+            or self.modified
+            or self.session_key is None
+            or not self._is_written_recently()
+        ):
+            super().save(must_create)
+            self._cache.set(
+                self.written_at_cache_key, time.time(), self.get_expiry_age()
+            )
+            return
+
+        self._cache.set(self.cache_key, self._session, self.get_expiry_age())
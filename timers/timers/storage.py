@@ -0,0 +1,57 @@
+import gzip
+from typing import Any, Iterator
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+# brotli is optional, without it only the gzip siblings are written
+try:
+    import brotli  # pyright: ignore[reportMissingImports]
+except ImportError:
+    brotli = None
+
+COMPRESSED_EXTENSIONS = (".css", ".js", ".mjs", ".json", ".map", ".svg", ".txt")
+
+# (Content-Encoding, file suffix), by order of preference
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+def _compress(encoding: str, content: bytes) -> bytes | None:
+    if encoding == "gzip":
+        return gzip.compress(content, compresslevel=9, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(content, quality=11)
+    return None
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Content hashed file names, each text file also written gzip and brotli
+    compressed next to itself, e.g. `main.3f2a.css.gz`, for
+    `timers.middleware.static_files_middleware` to serve as is.
+
+    A compressed sibling is only kept when it saves at least 5% of the size.
+    """
+
+    def post_process(
+        self, paths: dict[str, Any], dry_run: bool = False, **options: Any
+    ) -> Iterator[tuple[str, str | None, bool | Exception]]:
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        for name in sorted(set(self.hashed_files.values())):
+            if not name.endswith(COMPRESSED_EXTENSIONS):
+                continue
+
+            with self.open(name) as f:
+                content = f.read()
+            for encoding, suffix in ENCODINGS:
+                compressed = _compress(encoding, content)
+                if compressed is None or len(compressed) > 0.95 * len(content):
+                    continue
+
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(compressed))
+                yield name, name + suffix, True
@@ -0,0 +1,156 @@
+import random
+from datetime import datetime, timedelta
+
+from timers.lib.batch import EPOCH, TimerSequenceBatch, snapshot_timer_sequence_runs
+from timers.lib.timerange import DateTimePeriod, PausableTimerSequence
+from timers.models import TimerSequencePause, TimerSequenceRun
+
+
+def at(milliseconds: int) -> datetime:
+    return EPOCH + timedelta(milliseconds=milliseconds)
+
+
+def random_run(rng: random.Random) -> tuple[int, list[int], list[tuple[int, int]]]:
+    started_at = rng.randrange(1_700_000_000_000, 1_800_000_000_000)
+    durations = [rng.randrange(1, 5_000) for _ in range(rng.randrange(1, 12))]
+
+    pauses: list[tuple[int, int]] = []
+    cursor = started_at
+    for _ in range(rng.randrange(0, 8)):
+        start = cursor + rng.randrange(0, 3_000)
+        end = start + rng.randrange(1, 2_000)
+        pauses.append((start, end))
+        cursor = end
+
+    return started_at, durations, pauses
+
+
+def sample_instants(
+    rng: random.Random, sequence: PausableTimerSequence, started_at: int
+) -> list[int]:
+    boundaries = [int((x.end - EPOCH) / timedelta(milliseconds=1)) for x in sequence]
+    return [
+        started_at - 1,
+        started_at,
+        *boundaries,
+        *(x + 1 for x in boundaries),
+        *(rng.randrange(started_at, boundaries[-1] + 2) for _ in range(10)),
+    ]
+
+
+def test_batch_matches_pausable_timer_sequence():
+    rng = random.Random(20250501)
+
+    for _ in range(200):
+        runs = [random_run(rng) for _ in range(rng.randrange(1, 6))]
+        sequences = [
+            PausableTimerSequence.from_timers(
+                at(started_at),
+                [timedelta(milliseconds=x) for x in durations],
+                [DateTimePeriod(at(start), at(end)) for start, end in pauses],
+            )
+            for started_at, durations, pauses in runs
+        ]
+
+        duration_offsets, pause_offsets = [0], [0]
+        for _, durations, pauses in runs:
+            duration_offsets.append(duration_offsets[-1] + len(durations))
+            pause_offsets.append(pause_offsets[-1] + len(pauses))
+
+        batch = TimerSequenceBatch(
+            started_at=[x for x, _, _ in runs],
+            durations=[x for _, durations, _ in runs for x in durations],
+            duration_offsets=duration_offsets,
+            pause_starts=[x for _, _, pauses in runs for x, _ in pauses],
+            pause_ends=[x for _, _, pauses in runs for _, x in pauses],
+            pause_offsets=pause_offsets,
+        )
+
+        instants = [
+            sample_instants(rng, sequence, started_at)
+            for sequence, (started_at, _, _) in zip(sequences, runs)
+        ]
+        for samples in zip(*(rng.sample(x, len(x)) for x in instants)):
+            snapshots = batch.snapshot(list(samples))
+
+            for i, sequence in enumerate(sequences):
+                assert snapshots[i] == sequence.snapshot(at(samples[i]))
+
+
+def test_batch_of_timer_sequence_runs():
+    now = datetime.fromisoformat("2025-05-01T10:00:00Z")
+    running = TimerSequenceRun(
+        started_at=now,
+        timer_sequence_durations=[timedelta(seconds=60)],
+    )
+    running.loaded_pauses = [
+        TimerSequencePause(
+            started_at=now + timedelta(seconds=15),
+            ended_at=now + timedelta(seconds=20),
+        ),
+        TimerSequencePause(
+            started_at=now + timedelta(seconds=25),
+            ended_at=now + timedelta(seconds=30),
+        ),
+    ]
+    paused = TimerSequenceRun(
+        started_at=now,
+        timer_sequence_durations=[timedelta(seconds=10), timedelta(seconds=20)],
+        paused_since=now + timedelta(seconds=15),
+    )
+    paused.loaded_pauses = [
+        TimerSequencePause(started_at=now + timedelta(seconds=15), ended_at=None)
+    ]
+
+    snapshots = snapshot_timer_sequence_runs(
+        [running, paused], now + timedelta(seconds=40)
+    )
+
+    assert len(snapshots) == 2
+    assert snapshots[0].remaining_time == timedelta(seconds=30)
+    assert snapshots[0].total_remaining_time == timedelta(seconds=30)
+
+    assert snapshots[1].past == [timedelta(seconds=10)]
+    assert snapshots[1].current == timedelta(seconds=20)
+    assert snapshots[1].remaining_time == timedelta(seconds=15)
+    assert snapshots[1].future == []
+
+
+def test_snapshot_runs_projects_repeating_runs_one_by_one():
+    now = EPOCH + timedelta(days=20_000)
+    durations = [timedelta(seconds=10), timedelta(seconds=20)]
+    runs = [
+        TimerSequenceRun(started_at=now, timer_sequence_durations=durations),
+        TimerSequenceRun(
+            started_at=now,
+            timer_sequence_durations=durations,
+            repeat_start=0,
+            repeat_end=2,
+            repeat_count=None,
+        ),
+        TimerSequenceRun(
+            started_at=now,
+            timer_sequence_durations=durations,
+            repeat_start=0,
+            repeat_end=2,
+            repeat_count=1_000_000,
+        ),
+    ]
+    for run in runs:
+        run.loaded_pauses = []
+
+    snapshots = snapshot_timer_sequence_runs(runs, now + timedelta(seconds=65))
+
+    # the repetitions are not laid out in the batch
+    assert len(snapshots.batch.durations) == 2
+    assert snapshots[0].total_remaining_time == timedelta()
+
+    assert snapshots[1].current == timedelta(seconds=10)
+    assert snapshots[1].remaining_time == timedelta(seconds=5)
+    assert snapshots[1].total_remaining_time is None
+    assert snapshots[1].past_count == 4
+
+    assert snapshots[2].remaining_time == timedelta(seconds=5)
+    assert snapshots[2].total_remaining_time == 1_000_000 * timedelta(
+        seconds=30
+    ) - timedelta(seconds=65)
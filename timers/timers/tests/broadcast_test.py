@@ -0,0 +1,65 @@
+import asyncio
+import json
+from datetime import timedelta
+
+from django.utils import timezone
+
+from timers.lib.broadcast import RunBroadcaster, RunChange, run_changes
+from timers.models import TimerSequencePause, TimerSequenceRun
+from timers.views.sequences import _stream_run_changes
+
+
+def make_change(*, paused: bool) -> RunChange:
+    now = timezone.now()
+    sequence_run = TimerSequenceRun(
+        pk=1,
+        started_at=now - timedelta(minutes=1),
+        timer_sequence_durations=[timedelta(minutes=25), timedelta(minutes=5)],
+    )
+    pause = TimerSequencePause(
+        timer_sequence_run=sequence_run,
+        started_at=now - timedelta(seconds=30),
+        ended_at=None if paused else now - timedelta(seconds=10),
+    )
+
+    return RunChange(sequence_run=sequence_run, pauses=[pause])
+
+
+def test_subscribers_only_keep_the_latest_change():
+    broadcaster = RunBroadcaster()
+
+    async def scenario():
+        with broadcaster.subscribe(1) as queue:
+            assert broadcaster.subscribers_count(1) == 1
+
+            broadcaster.publish(make_change(paused=True))
+            latest = make_change(paused=False)
+            broadcaster.publish(latest)
+            await asyncio.sleep(0)
+
+            assert queue.qsize() == 1
+            assert queue.get_nowait() is latest
+
+        assert broadcaster.subscribers_count() == 0
+
+    asyncio.run(scenario())
+
+
+def test_run_changes_are_streamed():
+    async def scenario():
+        events = _stream_run_changes(make_change(paused=True))
+
+        first = await anext(events)
+        assert first.startswith("event: state\n")
+        assert json.loads(first.split("data: ")[1])["state"] == "paused"
+
+        next_event = asyncio.ensure_future(anext(events))
+        await asyncio.sleep(0)
+        run_changes.publish(make_change(paused=False))
+        second = await asyncio.wait_for(next_event, 1)
+        assert json.loads(second.split("data: ")[1])["state"] == "running"
+
+        await events.aclose()
+        assert run_changes.subscribers_count() == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,61 @@
+from datetime import timedelta
+from io import StringIO
+from uuid import uuid4
+
+import pytest
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management import call_command
+from django.utils import timezone
+
+from timers.models import TimerSequence, TimerSequencePause, TimerSequenceRun
+
+
+@pytest.fixture
+def runs() -> list[TimerSequenceRun]:
+    now = timezone.now()
+
+    s = SessionStore()
+    s.create()
+    session_key = s.session_key
+
+    sequence = TimerSequence.create(
+        now=now,
+        session_key=session_key,
+        name=("sequence_" + str(uuid4())),
+        timers=[timedelta(minutes=10)],
+    )
+
+    runs: list[TimerSequenceRun] = []
+    for days in [30, 20, 10, 0]:
+        started_at = now - timedelta(days=days, minutes=20)
+        run = TimerSequenceRun.create(
+            sequence=sequence,
+            durations=sequence.durations.all(),
+            session_key=session_key,
+            now=started_at,
+        )
+        run.pause(started_at + timedelta(minutes=1))
+        run.unpause(started_at + timedelta(minutes=2))
+        runs.append(run)
+
+    return runs
+
+
+@pytest.mark.django_db
+def test_cleanruns_deletes_in_batches(runs: list[TimerSequenceRun]):
+    out = StringIO()
+    call_command("cleanruns", "--batch-size=1", "--older-than=5 00:00:00", stdout=out)
+
+    assert "Deleted 3 obsolete runs and 3 pauses" in out.getvalue()
+    assert "in 3 batches" in out.getvalue()
+    assert list(TimerSequenceRun.objects.values_list("pk", flat=True)) == [runs[-1].pk]
+    assert TimerSequencePause.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_cleanruns_dry_run(runs: list[TimerSequenceRun]):
+    out = StringIO()
+    call_command("cleanruns", "--dry-run", "--batch-size=2", stdout=out)
+
+    assert "Would delete 4 obsolete runs and 4 pauses" in out.getvalue()
+    assert TimerSequenceRun.objects.count() == 4
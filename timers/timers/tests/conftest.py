@@ -0,0 +1,9 @@
+import pytest
+
+from timers.lib.projections import run_timer_sequences
+
+
+@pytest.fixture(autouse=True)
+def clear_run_timer_sequences():
+    # run ids are reused once a test transaction is rolled back
+    run_timer_sequences.clear()
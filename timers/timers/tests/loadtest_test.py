@@ -0,0 +1,37 @@
+import json
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from timers.models import TimerSequencePause
+
+
+@pytest.mark.django_db(transaction=True)
+def test_loadtest_goes_through_the_flows(tmp_path: Path):
+    output = tmp_path / "results.json"
+
+    call_command(
+        "loadtest",
+        "--sessions=1",
+        "--toggles=3",
+        "--think-time=0",
+        f"--output={output}",
+        stdout=StringIO(),
+    )
+
+    results = json.loads(output.read_text())
+    assert results["failed_sessions"] == 0
+    assert results["total"]["errors"] == 0
+    assert results["endpoints"]["POST detail_sequence_run"]["requests"] == 3
+    assert set(results["endpoints"]) == {
+        "GET create_sequence",
+        "GET detail_sequence_run",
+        "GET sequence_run_state",
+        "GET sequences",
+        "POST create_sequence",
+        "POST detail_sequence_run",
+        "POST run_sequence",
+    }
+    assert TimerSequencePause.objects.count() == 2
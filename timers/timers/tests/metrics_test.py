@@ -0,0 +1,80 @@
+import asyncio
+import re
+
+import pytest
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from timers.lib.metrics import Histogram, request_metrics
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    request_metrics.clear()
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram([1, 2, 4])
+    for value in [0.5, 1, 3, 10]:
+        histogram.observe(value)
+
+    assert list(histogram.cumulative()) == [("1", 2), ("2", 2), ("4", 3), ("+Inf", 4)]
+    assert histogram.count == 4
+    assert histogram.sum == 14.5
+
+
+@pytest.mark.django_db
+def test_sampled_requests_are_exported(client: Client, settings):
+    settings.METRICS_SAMPLE_RATE = 1.0
+    client.get(reverse("sequences"))
+
+    response = client.get(reverse("metrics"), REMOTE_ADDR="127.0.0.1")
+    body = response.content.decode()
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert 'mzt_request_duration_seconds_count{view="sequences"} 1' in body
+    assert 'mzt_request_sql_queries_count{view="sequences"} 1' in body
+    assert (
+        'mzt_request_template_duration_seconds_bucket{view="sequences",le="+Inf"} 1'
+        in body
+    )
+
+
+def sql_queries_sum(client: Client, view: str) -> float:
+    body = client.get(reverse("metrics"), REMOTE_ADDR="127.0.0.1").content.decode()
+    match = re.search(rf'mzt_request_sql_queries_sum{{view="{view}"}} (\S+)', body)
+    assert match is not None
+
+    return float(match.group(1))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sql_queries_are_recorded_under_wsgi_and_asgi(client: Client, settings):
+    settings.METRICS_SAMPLE_RATE = 1.0
+
+    client.get(reverse("sequences"))
+    wsgi = sql_queries_sum(client, "sequences")
+    assert wsgi > 0
+
+    # the ORM queries from a `sync_to_async` thread, on another connection
+    request_metrics.clear()
+    asyncio.run(AsyncClient().get(reverse("sequences")))
+
+    assert sql_queries_sum(client, "sequences") == wsgi
+
+
+@pytest.mark.django_db
+def test_nothing_is_recorded_without_sampling(client: Client, settings):
+    settings.METRICS_SAMPLE_RATE = 0
+    client.get(reverse("sequences"))
+
+    body = client.get(reverse("metrics"), REMOTE_ADDR="127.0.0.1").content.decode()
+
+    assert 'view="sequences"' not in body
+
+
+def test_metrics_are_restricted_to_internal_ips(client: Client):
+    response = client.get(reverse("metrics"), REMOTE_ADDR="10.0.0.1")
+
+    assert response.status_code == 404
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from timers.lib.packing import PackedDurations, pack_milliseconds, unpack_milliseconds
+
+
+def test_milliseconds_round_trip():
+    values = [0, 1, 127, 128, 25 * 60 * 1000, 2**40]
+
+    packed = pack_milliseconds(values)
+
+    assert len(pack_milliseconds([25 * 60 * 1000])) == 3
+    assert unpack_milliseconds(packed) == values
+
+
+def test_durations_are_decoded_lazily():
+    durations = [timedelta(minutes=25), timedelta(minutes=5)]
+    packed = PackedDurations.from_durations(durations)
+
+    loaded = PackedDurations(packed.packed)
+    assert loaded._durations is None
+
+    assert loaded == durations
+    assert list(loaded) == durations
+    assert loaded[1] == timedelta(minutes=5)
+    assert loaded.milliseconds() == [25 * 60 * 1000, 5 * 60 * 1000]
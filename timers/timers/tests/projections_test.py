@@ -6,7 +6,11 @@ import pytest
 from django.contrib.sessions.backends.db import SessionStore
 from django.contrib.sessions.models import Session
 
-from timers.lib.projections import TimerProjection, TimerState
+from timers.lib.projections import (
+    PausableTimerSequenceCache,
+    TimerProjection,
+    TimerState,
+)
 from timers.models import (
     TimerSequence,
     TimerSequencePause,
@@ -105,3 +109,94 @@ def test_ended_state(state: State):
 
     assert projection.state == TimerState.ended
     assert projection.ends_at == datetime.fromisoformat("2025-05-01T10:06:05Z")
+
+
+@pytest.mark.django_db
+def test_paused_state_is_frozen(state: State):
+    state.pauses.append(
+        TimerSequencePause(
+            timer_sequence_run=state.sequence_run,
+            started_at=state.now + timedelta(minutes=5, seconds=20),
+            ended_at=None,
+        )
+    )
+
+    projection = TimerProjection.from_timer_sequence_run(
+        now=state.now + timedelta(minutes=8),
+        sequence_run=state.sequence_run,
+        pauses=state.pauses,
+    )
+
+    assert projection.state == TimerState.paused
+    assert projection.current_timer == timedelta(seconds=20)
+    assert projection.remaining_time == timedelta(seconds=15)
+    assert projection.total_remaining_time == timedelta(seconds=45)
+
+
+def cached_run(state: State, pk: int) -> TimerSequenceRun:
+    sequence_run = TimerSequenceRun(
+        pk=pk,
+        timer_sequence_durations=state.sequence_run.timer_sequence_durations,
+        started_at=state.sequence_run.started_at,
+    )
+    sequence_run.loaded_pauses = list(state.pauses)
+
+    return sequence_run
+
+
+@pytest.mark.django_db
+def test_cached_projection_matches_the_built_one(state: State):
+    cache = PausableTimerSequenceCache()
+    sequence_run = cached_run(state, 1)
+    now = state.now + timedelta(minutes=5, seconds=16)
+
+    expected = TimerProjection.from_timer_sequence_run(
+        now=now, sequence_run=sequence_run, pauses=state.pauses
+    )
+    for _ in range(2):
+        projection = TimerProjection.from_cached_timer_sequence_run(
+            now, sequence_run, cache
+        )
+        assert projection == expected
+
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.django_db
+def test_cache_is_invalidated_by_a_new_version(state: State):
+    cache = PausableTimerSequenceCache()
+    sequence_run = cached_run(state, 1)
+    first = cache.get(sequence_run)
+
+    # what `pause` then `unpause` do to the run
+    sequence_run.loaded_pauses.append(
+        TimerSequencePause(
+            started_at=state.now + timedelta(minutes=5, seconds=20),
+            ended_at=state.now + timedelta(minutes=5, seconds=50),
+        )
+    )
+    sequence_run.version += 2
+
+    assert sequence_run not in cache
+    second = cache.get(sequence_run)
+
+    assert second is not first
+    assert second.total_duration == first.total_duration + timedelta(seconds=30)
+    assert len(cache) == 1
+
+
+@pytest.mark.django_db
+def test_cache_evicts_the_least_recently_used(state: State):
+    cache = PausableTimerSequenceCache(maxsize=2)
+    runs = [cached_run(state, pk) for pk in (1, 2, 3)]
+
+    cache.get(runs[0])
+    cache.get(runs[1])
+    cache.get(runs[0])
+    cache.get(runs[2])
+
+    assert runs[0] in cache
+    assert runs[1] not in cache
+    assert runs[2] in cache
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 3, 1)
+    assert "mzt_run_sequence_cache_evictions_total 1" in cache.to_prometheus()
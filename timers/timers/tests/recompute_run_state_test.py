@@ -0,0 +1,149 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management import call_command
+from django.utils import timezone
+
+from timers.lib.run_state import project_run_state
+from timers.lib.timerange import Repeat
+from timers.models import TimerSequence, TimerSequenceRun
+
+
+@pytest.fixture
+def runs() -> list[TimerSequenceRun]:
+    now = timezone.now()
+
+    s = SessionStore()
+    s.create()
+    session_key = s.session_key
+
+    sequence = TimerSequence.create(
+        now=now,
+        session_key=session_key,
+        name=("sequence_" + str(uuid4())),
+        timers=[timedelta(minutes=10), timedelta(minutes=5)],
+    )
+
+    runs: list[TimerSequenceRun] = []
+    for i in range(5):
+        started_at = now - timedelta(minutes=5)
+        run = sequence.run(started_at, session_key)
+        run.pause(started_at + timedelta(minutes=1))
+        if i % 2 == 0:
+            run.unpause(started_at + timedelta(minutes=1, seconds=i))
+        runs.append(run)
+
+    return runs
+
+
+def states() -> list[tuple]:
+    return list(
+        TimerSequenceRun.objects.order_by("pk").values_list(
+            "paused_since", "total_paused", "ends_at"
+        )
+    )
+
+
+def corrupt():
+    TimerSequenceRun.objects.update(
+        paused_since=None, total_paused=timedelta(), ends_at=None
+    )
+
+
+def test_project_run_state_matches_pause_and_unpause():
+    started_at = timezone.now()
+    pauses = [
+        (started_at + timedelta(minutes=1), started_at + timedelta(minutes=2)),
+        (started_at + timedelta(minutes=3), None),
+    ]
+
+    paused = project_run_state(started_at, [timedelta(minutes=10)], pauses)
+    running = project_run_state(started_at, [timedelta(minutes=10)], pauses[:1])
+
+    assert paused.paused_since == pauses[1][0]
+    assert paused.ends_at is None
+    assert running.total_paused == timedelta(minutes=1)
+    assert running.ends_at == started_at + timedelta(minutes=11)
+
+
+def test_project_run_state_of_repeats():
+    started_at = timezone.now()
+    durations = [timedelta(minutes=25), timedelta(minutes=5)]
+
+    finite = project_run_state(started_at, durations, [], Repeat(0, 2, count=4))
+    endless = project_run_state(started_at, durations, [], Repeat(0, 2))
+
+    assert finite.ends_at == started_at + timedelta(hours=2)
+    assert endless.ends_at is None
+
+
+@pytest.mark.django_db
+def test_recompute_run_state_restores_the_state(runs: list[TimerSequenceRun]):
+    expected = states()
+    versions = {x.pk: x.version for x in runs}
+    corrupt()
+
+    out = StringIO()
+    call_command("recompute_run_state", "--chunk-size=2", stdout=out)
+
+    assert states() == expected
+    assert "Updated 5 of 5 runs in 3 chunks" in out.getvalue()
+    for run in TimerSequenceRun.objects.all():
+        assert run.version == versions[run.pk] + 1
+
+    out = StringIO()
+    call_command("recompute_run_state", stdout=out)
+
+    assert "Updated 0 of 5 runs in 1 chunks" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_recompute_run_state_resumes_from_checkpoint(
+    runs: list[TimerSequenceRun], tmp_path: Path
+):
+    expected = states()
+    corrupt()
+    checkpoint = tmp_path / "checkpoint.json"
+    checkpoint.write_text(json.dumps({"last_pk": runs[2].pk}))
+
+    out = StringIO()
+    call_command(
+        "recompute_run_state",
+        "--chunk-size=1",
+        f"--checkpoint={checkpoint}",
+        stdout=out,
+    )
+
+    assert f"Resuming after run {runs[2].pk}" in out.getvalue()
+    assert states()[:3] != expected[:3]
+    assert states()[3:] == expected[3:]
+    assert not checkpoint.exists()
+
+
+@pytest.mark.django_db
+def test_recompute_run_state_in_a_process_pool(runs: list[TimerSequenceRun]):
+    expected = states()
+    corrupt()
+
+    call_command(
+        "recompute_run_state", "--chunk-size=2", "--processes=2", stdout=StringIO()
+    )
+
+    assert states() == expected
+
+
+@pytest.mark.django_db
+def test_recompute_run_state_dry_run(runs: list[TimerSequenceRun]):
+    corrupt()
+    corrupted = states()
+
+    out = StringIO()
+    call_command("recompute_run_state", "--dry-run", stdout=out)
+
+    assert "Would update 5 of 5 runs" in out.getvalue()
+    assert states() == corrupted
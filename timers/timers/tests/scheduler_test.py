@@ -0,0 +1,161 @@
+import threading
+from datetime import timedelta
+from uuid import uuid4
+
+import pytest
+from django.contrib.sessions.backends.db import SessionStore
+from django.utils import timezone
+
+from timers.lib.batch import to_milliseconds
+from timers.lib.scheduler import (
+    Boundary,
+    BoundaryHeap,
+    BoundaryScheduler,
+    RunBoundaryScheduler,
+    timer_ended,
+)
+from timers.lib.timerange import Repeat
+from timers.models import TimerSequence, TimerSequenceRun
+
+
+class StartedRunBoundaryScheduler(RunBoundaryScheduler):
+    """Re-armed without a thread, the boundaries are fired by the test."""
+
+    @property
+    def is_started(self) -> bool:
+        return True
+
+
+def test_boundaries_are_popped_in_order():
+    heap = BoundaryHeap()
+    heap.arm(1, [10, 20, 30], now=0)
+    heap.arm(2, [15, 25], now=0)
+    heap.arm(3, [5, 50], now=12)
+
+    assert heap.next_due() == 10
+    assert [(x.run_id, x.timer_index) for x in heap.pop_due(25)] == [
+        (1, 0),
+        (2, 0),
+        (1, 1),
+        (2, 1),
+    ]
+    assert 2 not in heap
+    assert heap.pop_due(30)[0] == Boundary(
+        run_id=1, timer_index=2, ends_at=30, is_last=True
+    )
+    assert len(heap) == 1
+
+
+def test_cancelled_and_rearmed_runs_skip_their_stale_entries():
+    heap = BoundaryHeap()
+    heap.arm(1, [10, 20], now=0)
+    heap.arm(2, [10, 20], now=0)
+
+    heap.cancel(1)
+    heap.arm(2, [40], now=0)
+
+    assert heap.next_due() == 40
+    assert heap.pop_due(39) == []
+    assert [x.run_id for x in heap.pop_due(40)] == [2]
+    assert len(heap) == 0
+
+
+def test_scheduler_thread_fires_due_boundaries():
+    fired = threading.Event()
+    scheduler = BoundaryScheduler(lambda boundary: fired.set())
+    scheduler.start()
+    try:
+        now = scheduler.now()
+        scheduler.arm(1, [now + 20])
+
+        assert fired.wait(2)
+    finally:
+        scheduler.stop()
+
+
+@pytest.mark.django_db
+def test_run_boundaries_are_loaded_and_rearmed():
+    now = timezone.now()
+    s = SessionStore()
+    s.create()
+    sequence = TimerSequence.create(
+        now=now,
+        session_key=s.session_key,  # type: ignore
+        name=("sequence_" + str(uuid4())),
+        timers=[timedelta(minutes=10), timedelta(minutes=5)],
+    )
+    run = TimerSequenceRun.create(
+        sequence=sequence,
+        durations=sequence.durations.all(),
+        session_key=s.session_key,  # type: ignore
+        now=now,
+    )
+
+    scheduler = StartedRunBoundaryScheduler()
+    scheduler.load(now)
+    assert scheduler.boundaries.next_due() == to_milliseconds(
+        now + timedelta(minutes=10)
+    )
+
+    received: list[dict] = []
+
+    def receiver(**kwargs):
+        received.append(kwargs)
+
+    timer_ended.connect(receiver)
+    try:
+        scheduler.fire_due(to_milliseconds(now + timedelta(minutes=15)))
+    finally:
+        timer_ended.disconnect(receiver)
+
+    assert [(x["run_id"], x["timer_index"], x["is_last"]) for x in received] == [
+        (run.pk, 0, False),
+        (run.pk, 1, True),
+    ]
+
+    scheduler.load(now)
+    run.pause(now + timedelta(minutes=1))
+    scheduler.rearm(run)
+    assert run.pk not in scheduler.boundaries
+
+    run.unpause(now + timedelta(minutes=3))
+    scheduler.rearm(run)
+    assert scheduler.boundaries.next_due() == to_milliseconds(
+        now + timedelta(minutes=12)
+    )
+
+
+@pytest.mark.django_db
+def test_repeating_run_boundaries_are_computed_as_they_fire():
+    now = timezone.now()
+    s = SessionStore()
+    s.create()
+    sequence = TimerSequence.create(
+        now=now,
+        session_key=s.session_key,  # type: ignore
+        name=("sequence_" + str(uuid4())),
+        timers=[timedelta(minutes=25), timedelta(minutes=5)],
+        repeat=Repeat(0, 2, count=10_000),
+    )
+    run = sequence.run(now, s.session_key)  # type: ignore
+    run.pause(now + timedelta(minutes=1))
+    run.unpause(now + timedelta(minutes=2))
+
+    scheduler = RunBoundaryScheduler()
+    scheduler.load(now)
+    assert scheduler.boundaries.next_due() == to_milliseconds(
+        now + timedelta(minutes=26)
+    )
+
+    # 12 cycles, shifted by the pause
+    boundaries = scheduler.boundaries.pop_due(
+        to_milliseconds(now + timedelta(hours=6, minutes=1))
+    )
+    assert [x.timer_index for x in boundaries] == list(range(24))
+    assert boundaries[-1].ends_at == to_milliseconds(
+        now + timedelta(hours=6, minutes=1)
+    )
+    assert not boundaries[-1].is_last
+    assert scheduler.boundaries.next_due() == to_milliseconds(
+        now + timedelta(hours=6, minutes=26)
+    )
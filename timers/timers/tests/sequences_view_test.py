@@ -0,0 +1,358 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import timedelta
+from uuid import uuid4
+
+import pytest
+from django.contrib.messages.storage import default_storage
+from django.db import connection
+from django.http import HttpRequest
+from django.test import AsyncRequestFactory, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from timers.lib.batch import to_milliseconds
+from timers.lib.projections import TIMERS_LIMIT, run_timer_sequences
+from timers.lib.timerange import Repeat
+from timers.models import TimerSequence, TimerSequencePause, TimerSequenceRun
+from timers.sessions import SessionStore
+from timers.views import sequences
+
+
+@dataclass(frozen=True, kw_only=True)
+class State:
+    client: Client
+    sequence: TimerSequence
+    sequence_run: TimerSequenceRun
+
+    @property
+    def run_url(self) -> str:
+        return reverse(
+            "detail_sequence_run",
+            kwargs={"sequence_id": self.sequence.pk, "run_id": self.sequence_run.pk},
+        )
+
+
+@pytest.fixture
+def state(client: Client) -> State:
+    client.get(reverse("sequences"))
+    session_key = client.session.session_key
+    assert session_key is not None
+
+    now = timezone.now()
+    sequence = TimerSequence.create(
+        now=now,
+        session_key=session_key,
+        name=("sequence_" + str(uuid4())),
+        timers=[timedelta(minutes=25), timedelta(minutes=5)],
+    )
+    sequence_run = sequence.run(now, session_key)
+
+    return State(client=client, sequence=sequence, sequence_run=sequence_run)
+
+
+def add_pauses(sequence_run: TimerSequenceRun, count: int):
+    assert sequence_run.started_at is not None
+
+    TimerSequencePause.objects.bulk_create(
+        TimerSequencePause(
+            timer_sequence_run=sequence_run,
+            started_at=sequence_run.started_at - timedelta(milliseconds=2 * i + 2),
+            ended_at=sequence_run.started_at - timedelta(milliseconds=2 * i + 1),
+        )
+        for i in range(count)
+    )
+
+
+def count_queries(client: Client, method: str, url: str) -> int:
+    with CaptureQueriesContext(connection) as queries:
+        response = getattr(client, method)(url)
+
+    assert response.status_code == 200
+    return len([x for x in queries if "SAVEPOINT" not in x["sql"]])
+
+
+@pytest.mark.django_db
+def test_detail_sequence_run_toggles(state: State):
+    response = state.client.post(state.run_url)
+
+    assert response.status_code == 200
+    assert response.context["timer"].state == "paused"
+    assert TimerSequenceRun.objects.get(pk=state.sequence_run.pk).is_paused()
+
+    response = state.client.post(state.run_url)
+
+    assert response.context["timer"].state == "running"
+    assert not TimerSequenceRun.objects.get(pk=state.sequence_run.pk).is_paused()
+
+
+@pytest.mark.django_db
+def test_detail_sequence_run_toggles_in_place(state: State):
+    fragment = state.client.post(state.run_url, headers={"Mzt-Fragment": "1"})
+    body = fragment.content.decode()
+
+    assert fragment.status_code == 200
+    assert [x.name for x in fragment.templates] == ["sequences/run-timer.html"]
+    assert body.lstrip().startswith('<div class="mzt-run">')
+    assert 'id="mzt-data"' in body
+    assert "<svg" in body and "icon.play_filled" in body
+    assert "<html" not in body
+    assert "Mzt-Fragment" in fragment["Vary"]
+
+    projection = state.client.post(
+        state.run_url, headers={"Accept": "application/json"}
+    )
+
+    assert projection.status_code == 200
+    assert projection.json()["state"] == "running"
+    assert projection.json()["futureTimers"] == [5 * 60 * 1000]
+
+
+@pytest.mark.django_db
+def test_detail_sequence_run_query_count_does_not_depend_on_pauses(state: State):
+    add_pauses(state.sequence_run, 1)
+    get_few = count_queries(state.client, "get", state.run_url)
+    pause_few = count_queries(state.client, "post", state.run_url)
+    unpause_few = count_queries(state.client, "post", state.run_url)
+
+    # the bulk created pauses do not bump the version of the run
+    add_pauses(state.sequence_run, 200)
+    run_timer_sequences.clear()
+    get_many = count_queries(state.client, "get", state.run_url)
+    pause_many = count_queries(state.client, "post", state.run_url)
+    unpause_many = count_queries(state.client, "post", state.run_url)
+
+    assert get_few == get_many == 2
+    assert pause_few == pause_many == 4
+    assert unpause_few == unpause_many == 4
+
+
+@pytest.mark.django_db
+def test_detail_sequence_run_reads_pauses_only_when_not_cached(state: State):
+    add_pauses(state.sequence_run, 10)
+
+    assert count_queries(state.client, "get", state.run_url) == 2
+    assert count_queries(state.client, "get", state.run_url) == 1
+    assert run_timer_sequences.hits == 1
+
+    # a toggle bumps the version, the paused run is built again
+    count_queries(state.client, "post", state.run_url)
+    assert count_queries(state.client, "get", state.run_url) == 1
+    assert count_queries(state.client, "get", state.run_url) == 1
+    assert len(run_timer_sequences) == 1
+
+
+@pytest.mark.django_db
+def test_sequence_run_state_is_revalidated_with_etag(state: State):
+    url = reverse(
+        "sequence_run_state",
+        kwargs={"sequence_id": state.sequence.pk, "run_id": state.sequence_run.pk},
+    )
+
+    response = state.client.get(url)
+    etag = response["ETag"]
+    timer = response.json()
+
+    assert response.status_code == 200
+    assert etag.startswith("W/")
+    assert timer["state"] == "running"
+    # instants instead of durations from now, stable for the version
+    assert timer["remainingTime"] is None
+    assert timer["endsAt"] == to_milliseconds(state.sequence_run.ends_at)
+    assert timer["currentTimerIndex"] == 0
+    assert timer["currentTimerEndsAt"] == to_milliseconds(
+        state.sequence_run.started_at + timedelta(minutes=25)
+    )
+    assert state.client.get(url).json() == timer
+
+    with CaptureQueriesContext(connection) as queries:
+        response = state.client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert len(queries) == 1
+
+    state.client.post(state.run_url)
+    response = state.client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert response.json()["state"] == "paused"
+    assert response.json()["remainingTime"] is not None
+    assert response.json()["currentTimerEndsAt"] is None
+
+
+@pytest.mark.django_db
+def test_list_sequences_is_paginated_by_keyset(state: State):
+    session_key = state.client.session.session_key
+    assert session_key is not None
+
+    for i in range(26):
+        TimerSequence.create(
+            now=timezone.now(),
+            session_key=session_key,
+            name=f"sequence_{i}",
+            timers=[timedelta(minutes=x + 1) for x in range(10)],
+        )
+
+    with CaptureQueriesContext(connection) as queries:
+        response = state.client.get(reverse("sequences"))
+
+    # the sequences and their previewed durations
+    assert len(queries) == 2
+    first_page = response.context["sequences"]
+    assert len(first_page) == 25
+    assert all(len(x.preview_durations) <= 6 for x in first_page)
+    assert response.context["next_cursor"] is not None
+
+    response = state.client.get(
+        reverse("sequences"), {"after": response.context["next_cursor"]}
+    )
+    second_page = response.context["sequences"]
+
+    assert [x.name for x in second_page] == ["sequence_24", "sequence_25"]
+    assert response.context["next_cursor"] is None
+    assert not {x.pk for x in first_page} & {x.pk for x in second_page}
+
+
+@pytest.mark.django_db
+def test_list_sequences_caches_cards(state: State):
+    url = reverse("sequences")
+    response = state.client.get(url)
+    assert "25:00" in response.content.decode()
+
+    state.sequence.update_timers([timedelta(minutes=42)])
+    response = state.client.get(url)
+
+    assert "42:00" in response.content.decode()
+    assert "25:00" not in response.content.decode()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_views_run_and_toggle(state: State):
+    factory = AsyncRequestFactory()
+    session = SessionStore(state.client.session.session_key)
+
+    async def request(method: str, path: str) -> HttpRequest:
+        request = getattr(factory, method)(path)
+        request.session = session
+        request._messages = default_storage(request)
+        return request
+
+    async def scenario():
+        response = await sequences.arun_sequence(
+            await request("post", "/"), state.sequence.pk
+        )
+        run_id = int(response["Location"].rsplit("/", 1)[1])
+
+        response = await sequences.adetail_sequence_run(
+            await request("post", "/"), state.sequence.pk, run_id
+        )
+        assert response.status_code == 200
+
+        run = await TimerSequenceRun.objects.aget(pk=run_id)
+        assert run.is_paused()
+
+        # the pauses of an uncached run are read asynchronously
+        run_timer_sequences.clear()
+        response = await sequences.adetail_sequence_run(
+            await request("get", "/"), state.sequence.pk, run_id
+        )
+        assert response.status_code == 200
+        assert run_timer_sequences.misses == 1
+
+        await run.aunpause(timezone.now())
+        response = await sequences.alist_sequences(await request("get", "/"))
+        assert state.sequence.name in response.content.decode()
+
+    asyncio.run(scenario())
+
+    assert not TimerSequenceRun.objects.filter(paused_since__isnull=False).exists()
+
+
+@pytest.mark.django_db
+def test_create_sequence_with_a_repeat(state: State):
+    def create(**repeat: str):
+        return state.client.post(
+            reverse("create_sequence"),
+            {
+                "name": "pomodoro",
+                "form-TOTAL_FORMS": "2",
+                "form-INITIAL_FORMS": "0",
+                "form-0-duration": "00:25:00",
+                "form-1-duration": "00:05:00",
+                **repeat,
+            },
+        )
+
+    invalid = create(repeat_from="1", repeat_to="1")
+
+    assert invalid.status_code == 200
+    assert invalid.context["form"].errors == {
+        "repeat_count": ["only a repeat ending with the last timer can be indefinite"]
+    }
+
+    too_long = create(repeat_from="1", repeat_to="2", repeat_count="2000000000")
+
+    assert too_long.status_code == 200
+    assert "repeat_count" in too_long.context["form"].errors
+
+    create(repeat_from="1", repeat_to="2", repeat_count="4")
+    create(repeat_from="1", repeat_to="2")
+
+    sequences = TimerSequence.objects.filter(name="pomodoro").order_by("pk")
+    assert [x.repeat for x in sequences] == [Repeat(0, 2, 4), Repeat(0, 2)]
+
+    cards = state.client.get(reverse("sequences")).content.decode()
+    assert "×4" in cards and "∞" in cards
+
+
+@pytest.mark.django_db
+def test_detail_sequence_run_lists_the_next_repeated_timers(state: State):
+    TimerSequenceRun.objects.filter(pk=state.sequence_run.pk).update(
+        repeat_start=0, repeat_end=2
+    )
+
+    response = state.client.get(state.run_url)
+    timer = response.context["timer"]
+
+    assert response.status_code == 200
+    assert timer.total_remaining_time is None
+    assert timer.hidden_future_timers is None
+    assert len(timer.future_timers) == TIMERS_LIMIT
+    assert "repeats indefinitely" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_update_sequence_only_writes_in_a_transaction(state: State, monkeypatch):
+    url = reverse("update_sequence", kwargs={"sequence_id": state.sequence.pk})
+    outer = len(connection.atomic_blocks)
+    rendered_in: list[int] = []
+
+    def render(*args, **kwargs):
+        rendered_in.append(len(connection.atomic_blocks))
+        return sequences.render.__wrapped__(*args, **kwargs)
+
+    render.__wrapped__ = sequences.render  # type: ignore
+    monkeypatch.setattr(sequences, "render", render)
+
+    # a GET takes no write lock under IMMEDIATE transactions
+    assert state.client.get(url).status_code == 200
+    assert rendered_in == [outer]
+
+    response = state.client.post(
+        url,
+        {
+            "name": "renamed",
+            "form-TOTAL_FORMS": "1",
+            "form-INITIAL_FORMS": "2",
+            "form-0-duration": "00:42:00",
+        },
+    )
+
+    assert response.status_code == 307
+    state.sequence.refresh_from_db()
+    assert state.sequence.name == "renamed"
+    assert [x.duration for x in state.sequence.durations.all()] == [
+        timedelta(minutes=42)
+    ]
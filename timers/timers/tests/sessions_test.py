@@ -0,0 +1,109 @@
+import time
+from datetime import timedelta
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from timers.models import TimerSequence
+from timers.sessions import SessionStore
+
+
+def session_queries(queries: CaptureQueriesContext) -> list[str]:
+    return [x["sql"] for x in queries if "django_session" in x["sql"]]
+
+
+@pytest.mark.django_db
+def test_toggles_do_not_query_sessions(client: Client):
+    client.get(reverse("sequences"))
+    session_key = client.session.session_key
+    assert session_key is not None
+
+    sequence = TimerSequence.create(
+        now=timezone.now(),
+        session_key=session_key,
+        name="sequence",
+        timers=[timedelta(minutes=25)],
+    )
+    response = client.post(reverse("run_sequence", kwargs={"sequence_id": sequence.pk}))
+
+    with CaptureQueriesContext(connection) as queries:
+        client.post(response["Location"])
+        client.post(response["Location"])
+
+    assert session_queries(queries) == []
+
+
+@pytest.mark.django_db
+def test_expiry_is_written_behind():
+    store = SessionStore()
+    store.create()
+    session_key = store.session_key
+    assert session_key is not None
+    expire_date = Session.objects.get(pk=session_key).expire_date
+
+    with CaptureQueriesContext(connection) as queries:
+        SessionStore(session_key).save()
+
+    assert session_queries(queries) == []
+
+    # once the interval has passed, the row is written again
+    store._cache.delete(store.written_at_cache_key)
+    SessionStore(session_key).save()
+
+    assert Session.objects.get(pk=session_key).expire_date > expire_date
+
+
+@pytest.mark.django_db
+def test_written_behind_sessions_outlive_clearsessions(settings, monkeypatch):
+    started = time.time()
+    now = timezone.now()
+    elapsed = timedelta()
+
+    def travel(delta: timedelta):
+        nonlocal elapsed
+        elapsed = delta
+        monkeypatch.setattr(time, "time", lambda: started + elapsed.total_seconds())
+        monkeypatch.setattr(timezone, "now", lambda: now + elapsed)
+
+    travel(timedelta())
+    store = SessionStore()
+    store.create()
+    session_key = store.session_key
+    assert session_key is not None
+
+    # only the cache is refreshed, the row keeps its expiry
+    interval = timedelta(seconds=settings.SESSION_EXPIRY_WRITE_INTERVAL)
+    travel(interval - timedelta(hours=1))
+    SessionStore(session_key).save()
+
+    # past the expiry first written, the session is still alive in the cache
+    travel(timedelta(seconds=settings.SESSION_COOKIE_AGE) + interval / 2)
+    assert SessionStore(session_key).exists(session_key)
+    call_command("clearsessions")
+
+    assert Session.objects.filter(pk=session_key).exists()
+
+
+@pytest.mark.django_db
+def test_unknown_sessions_are_replaced(client: Client):
+    sequence_owner = SessionStore()
+    sequence_owner.create()
+    sequence = TimerSequence.create(
+        now=timezone.now(),
+        session_key=sequence_owner.session_key,  # type: ignore
+        name="sequence",
+        timers=[timedelta(minutes=25)],
+    )
+    client.cookies["sessionid"] = "unknown"
+
+    response = client.post(reverse("run_sequence", kwargs={"sequence_id": sequence.pk}))
+
+    assert response.status_code == 302
+    assert client.cookies["sessionid"].value != "unknown"
+    assert Session.objects.filter(pk=client.cookies["sessionid"].value).exists()
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+import pytest
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from website.settings import database_profile_settings
+
+
+def test_development_profile_keeps_the_defaults():
+    assert database_profile_settings("development") == {}
+
+
+@pytest.mark.django_db
+def test_production_profile_tunes_sqlite_for_concurrent_writers(tmp_path: Path):
+    settings = database_profile_settings("production")
+
+    assert settings["OPTIONS"]["transaction_mode"] == "IMMEDIATE"
+    assert settings["OPTIONS"]["timeout"] == 20
+
+    settings_dict = {**connection.settings_dict, **settings}
+    settings_dict["NAME"] = tmp_path / "db.sqlite3"
+    wrapper = DatabaseWrapper(settings_dict, alias="production")
+    try:
+        with wrapper.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            assert cursor.fetchone() == ("wal",)
+            # NORMAL
+            cursor.execute("PRAGMA synchronous")
+            assert cursor.fetchone() == (1,)
+            cursor.execute("PRAGMA busy_timeout")
+            assert cursor.fetchone() == (20_000,)
+    finally:
+        wrapper.close()
@@ -0,0 +1,69 @@
+import gzip
+from pathlib import Path
+
+import pytest
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import Client
+
+SCRIPT = "const answer = 42;\n" * 200
+
+
+@pytest.fixture
+def collected(settings, tmp_path: Path) -> str:
+    source = tmp_path / "source"
+    (source / "js").mkdir(parents=True)
+    (source / "js" / "main.mjs").write_text(SCRIPT)
+    (source / "tailwind.css").write_text("@import 'tailwindcss';\n")
+
+    settings.STATICFILES_DIRS = [source]
+    settings.STATIC_ROOT = tmp_path / "static"
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "staticfiles": {
+            "BACKEND": "timers.storage.CompressedManifestStaticFilesStorage"
+        },
+    }
+    call_command("collectstatic", interactive=False, verbosity=0)
+
+    return staticfiles_storage.url("js/main.mjs")
+
+
+def test_collected_files_are_hashed_and_compressed(collected: str, settings):
+    root: Path = settings.STATIC_ROOT
+    hashed = collected.removeprefix(settings.STATIC_URL)
+
+    assert hashed != "js/main.mjs"
+    assert gzip.decompress((root / f"{hashed}.gz").read_bytes()).decode() == SCRIPT
+    assert not (root / "tailwind.css").exists()
+
+
+def test_serves_the_compressed_sibling(collected: str, client: Client):
+    response = client.get(collected, HTTP_ACCEPT_ENCODING="br;q=0, gzip, deflate")
+
+    assert response.status_code == 200
+    assert response["Content-Encoding"] == "gzip"
+    assert response["Content-Type"] == "text/javascript"
+    assert response["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert response["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(b"".join(response.streaming_content)).decode() == SCRIPT
+
+
+def test_serves_identity_without_accepted_encoding(collected: str, client: Client):
+    response = client.get(collected)
+
+    assert "Content-Encoding" not in response
+    assert b"".join(response.streaming_content).decode() == SCRIPT
+
+
+def test_unhashed_names_are_revalidated(collected: str, client: Client, settings):
+    response = client.get(f"{settings.STATIC_URL}js/main.mjs")
+
+    assert response.status_code == 200
+    assert response["Cache-Control"] == "no-cache"
+
+
+def test_paths_outside_static_root_are_not_served(collected: str, client: Client):
+    response = client.get("/static/../../source/js/main.mjs")
+
+    assert response.status_code == 404
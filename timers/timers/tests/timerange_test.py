@@ -1,8 +1,12 @@
+from dataclasses import FrozenInstanceError
 from datetime import datetime, timedelta
 
+import pytest
+
 from timers.lib.timerange import (
     DateTimePeriod,
     PausableTimerSequence,
+    Repeat,
 )
 
 
@@ -52,3 +56,171 @@ def test_pauses():
 
     assert snapshot.remaining_time == timedelta(seconds=30)
     assert snapshot.total_remaining_time == timedelta(seconds=30)
+
+
+def test_snapshots_around_the_sequence():
+    pausable_sequence = PausableTimerSequence.from_timers(
+        started_at=datetime.fromisoformat("2025-05-01T10:00:00Z"),
+        durations=[timedelta(seconds=10), timedelta(seconds=20)],
+        pauses=[
+            DateTimePeriod(
+                datetime.fromisoformat("2025-05-01T10:00:05Z"),
+                datetime.fromisoformat("2025-05-01T10:00:10Z"),
+            ),
+        ],
+    )
+
+    before = pausable_sequence.snapshot(datetime.fromisoformat("2025-05-01T09:59:00Z"))
+
+    assert before.past == []
+    assert before.current is None
+    assert before.future == [timedelta(seconds=10), timedelta(seconds=20)]
+    assert before.total_remaining_time == timedelta(seconds=35)
+
+    during = pausable_sequence.snapshot(datetime.fromisoformat("2025-05-01T10:00:20Z"))
+
+    assert during.past == [timedelta(seconds=10)]
+    assert during.current == timedelta(seconds=20)
+    assert during.future == []
+    assert during.remaining_time == timedelta(seconds=15)
+
+    after = pausable_sequence.snapshot(datetime.fromisoformat("2025-05-01T10:01:00Z"))
+
+    assert after.past == [timedelta(seconds=10), timedelta(seconds=20)]
+    assert after.current is None
+    assert after.total_remaining_time == timedelta()
+
+
+def test_periods_keep_their_instants():
+    period = DateTimePeriod(
+        datetime.fromisoformat("2025-05-01T12:00:00.000123+02:00"),
+        datetime.fromisoformat("2025-05-01T10:00:10Z"),
+    )
+
+    assert period.start == datetime.fromisoformat("2025-05-01T10:00:00.000123Z")
+    assert period.end == datetime.fromisoformat("2025-05-01T10:00:10Z")
+    assert period.duration == timedelta(seconds=9, microseconds=999877)
+    assert period == DateTimePeriod(period.start, period.end)
+
+    with pytest.raises(FrozenInstanceError):
+        period.start = period.end  # type: ignore
+
+
+def test_repeats_project_like_the_expanded_timers():
+    started_at = datetime.fromisoformat("2025-05-01T10:00:00Z")
+    durations = [timedelta(seconds=3), timedelta(seconds=10), timedelta(seconds=2)]
+    repeat = Repeat(1, 3, count=4)
+    pauses = [
+        DateTimePeriod(
+            started_at - timedelta(seconds=1), started_at + timedelta(seconds=1)
+        ),
+        DateTimePeriod(
+            started_at + timedelta(seconds=15), started_at + timedelta(seconds=19)
+        ),
+        DateTimePeriod(
+            started_at + timedelta(seconds=19), started_at + timedelta(seconds=20)
+        ),
+        DateTimePeriod(
+            started_at + timedelta(seconds=50), started_at + timedelta(seconds=51)
+        ),
+    ]
+
+    repeated = PausableTimerSequence.from_timers(started_at, durations, pauses, repeat)
+    expanded = PausableTimerSequence.from_timers(
+        started_at, list(repeat.expand(durations)), pauses
+    )
+
+    assert repeated.total_duration == expanded.total_duration
+    assert repeated.ends_at == expanded.ends_at
+    assert repeated.pausable_timers == expanded.pausable_timers
+    for second in range(-2, 70):
+        now = started_at + timedelta(seconds=second)
+        assert repeated.snapshot(now) == expanded.snapshot(now), now
+
+
+def test_indefinite_repeats():
+    started_at = datetime.fromisoformat("2025-05-01T10:00:00Z")
+    sequence = PausableTimerSequence.from_timers(
+        started_at,
+        [timedelta(seconds=10), timedelta(minutes=25), timedelta(minutes=5)],
+        [
+            DateTimePeriod(
+                started_at + timedelta(seconds=5), started_at + timedelta(seconds=10)
+            )
+        ],
+        Repeat(1, 3),
+    )
+
+    assert sequence.total_duration is None
+    assert sequence.ends_at is None
+
+    # a year later, 17520 cycles and some after the first timer
+    snapshot = sequence.snapshot(
+        started_at + timedelta(days=365, seconds=15, minutes=26)
+    )
+
+    assert snapshot.past_count == 1 + 2 * 17520 + 1
+    assert snapshot.current == timedelta(minutes=5)
+    assert snapshot.remaining_time == timedelta(minutes=4)
+    assert snapshot.total_remaining_time is None
+    assert snapshot.future_count is None
+    assert snapshot.past_timers(2) == [timedelta(minutes=5), timedelta(minutes=25)]
+    assert snapshot.future_timers(3) == [
+        timedelta(minutes=25),
+        timedelta(minutes=5),
+        timedelta(minutes=25),
+    ]
+
+
+def test_invalid_repeats():
+    timers = [timedelta(minutes=25), timedelta(minutes=5), timedelta(minutes=15)]
+
+    with pytest.raises(ValueError):
+        Repeat(1, 4, count=2).validate(timers)
+    with pytest.raises(ValueError):
+        Repeat(0, 2).validate(timers)
+    # its end would not be a datetime
+    with pytest.raises(ValueError):
+        Repeat(0, 2, count=2_000_000_000).validate(timers)
+
+    Repeat(0, 2, count=2).validate(timers)
+    Repeat(1, 3).validate(timers)
+
+
+@pytest.mark.parametrize("repeat", [None, Repeat(1, 3, count=50), Repeat(1, 3)])
+def test_snapshot_many_matches_snapshots(repeat: Repeat | None):
+    started_at = datetime.fromisoformat("2025-05-01T10:00:00Z")
+    sequence = PausableTimerSequence.from_timers(
+        started_at,
+        [timedelta(seconds=10), timedelta(seconds=20), timedelta(seconds=30)],
+        [
+            DateTimePeriod(
+                started_at + timedelta(seconds=5), started_at + timedelta(seconds=10)
+            ),
+            DateTimePeriod(
+                started_at + timedelta(seconds=40), started_at + timedelta(seconds=42)
+            ),
+        ],
+        repeat,
+    )
+    nows = [started_at + timedelta(seconds=x) for x in range(-5, 120, 3)]
+
+    timeline = sequence.snapshot_many(nows)
+
+    assert len(timeline) == len(nows)
+    assert [timeline[i] for i in range(len(nows))] == [
+        sequence.snapshot(x) for x in nows
+    ]
+    assert (timeline.total_remaining_time is None) == (
+        repeat is not None and repeat.count is None
+    )
+
+
+def test_snapshot_many_needs_sorted_instants():
+    started_at = datetime.fromisoformat("2025-05-01T10:00:00Z")
+    sequence = PausableTimerSequence.from_timers(
+        started_at, [timedelta(seconds=10)], []
+    )
+
+    with pytest.raises(ValueError):
+        sequence.snapshot_many([started_at, started_at - timedelta(seconds=1)])
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from timers.models import TimerSequence
+
+MINUTE = timedelta(minutes=1)
+
+
+@pytest.fixture
+def sequence() -> TimerSequence:
+    s = SessionStore()
+    s.create()
+
+    return TimerSequence.create(
+        now=datetime.fromisoformat("2025-05-01T10:00:00Z"),
+        session_key=s.session_key,
+        name=("sequence_" + str(uuid4())),
+        timers=[MINUTE * x for x in range(1, 51)],
+    )
+
+
+@pytest.mark.django_db
+def test_update_timers_only_writes_changes(sequence: TimerSequence):
+    updated_at = sequence.updated_at
+    unchanged = {x.index: x.pk for x in sequence.durations.all()}
+    timers = [MINUTE * x for x in range(1, 51)]
+    timers[3] = 42 * MINUTE
+    timers.extend([MINUTE * 60, MINUTE * 70])
+
+    with CaptureQueriesContext(connection) as queries:
+        sequence.update_timers(timers)
+
+    writes = [x["sql"] for x in queries if "SAVEPOINT" not in x["sql"]]
+    assert [x.split()[0] for x in writes] == ["SELECT", "UPDATE", "INSERT", "UPDATE"]
+
+    durations = list(sequence.durations.all())
+    assert [x.duration for x in durations] == timers
+    assert all(unchanged[x.index] == x.pk for x in durations if x.index < 50)
+    assert TimerSequence.objects.get(pk=sequence.pk).updated_at > updated_at
+
+
+@pytest.mark.django_db
+def test_update_timers_without_changes(sequence: TimerSequence):
+    updated_at = sequence.updated_at
+
+    with CaptureQueriesContext(connection) as queries:
+        sequence.update_timers([MINUTE * x for x in range(1, 51)])
+
+    assert [x["sql"].split()[0] for x in queries if "SAVEPOINT" not in x["sql"]] == [
+        "SELECT"
+    ]
+    assert sequence.updated_at == updated_at
+
+
+@pytest.mark.django_db
+def test_update_timers_truncates(sequence: TimerSequence):
+    sequence.update_timers([MINUTE * 25, MINUTE * 5])
+
+    assert [(x.index, x.duration) for x in sequence.durations.all()] == [
+        (0, MINUTE * 25),
+        (1, MINUTE * 5),
+    ]
@@ -5,6 +5,8 @@ from uuid import uuid4
 import pytest
 from django.contrib.sessions.backends.db import SessionStore
 
+from timers.lib.projections import TimerProjection, TimerState
+from timers.lib.timerange import Repeat
 from timers.models import TimerSequence, TimerSequenceRun
 
 
@@ -29,7 +31,10 @@ def state() -> State:
         timers=[timedelta(minutes=10), timedelta(minutes=25)],
     )
     sequence_run = TimerSequenceRun.create(
-        sequence=sequence, durations=[], session_key=session_key, now=now
+        sequence=sequence,
+        durations=sequence.durations.all(),
+        session_key=session_key,
+        now=now,
     )
 
     return State(now=now, sequence_run=sequence_run)
@@ -50,3 +55,92 @@ def test_is_paused(state: State):
 
     paused = TimerSequenceRun.objects.get(pk=state.sequence_run.pk)
     assert paused.is_paused()
+
+
+@pytest.mark.django_db
+def test_pause_state_is_stored_on_the_run(state: State):
+    run = state.sequence_run
+    run.pause(state.now + timedelta(minutes=5))
+
+    paused = TimerSequenceRun.objects.get(pk=run.pk)
+    assert paused.paused_since == state.now + timedelta(minutes=5)
+    assert paused.ends_at is None
+    assert not paused.is_ended(state.now + timedelta(hours=1))
+
+    paused.unpause(state.now + timedelta(minutes=7))
+
+    running = TimerSequenceRun.objects.get(pk=run.pk)
+    assert not running.is_paused()
+    assert running.total_paused == timedelta(minutes=2)
+    assert running.ends_at == state.now + timedelta(minutes=37)
+    assert not running.is_ended(state.now + timedelta(minutes=36))
+    assert running.is_ended(state.now + timedelta(minutes=37))
+
+
+@pytest.mark.django_db
+def test_runs_snapshot_the_sequence_repeat(state: State):
+    sequence = state.sequence_run.timer_sequence
+    assert sequence is not None
+
+    sequence.repeat = Repeat(0, 2, count=3)
+    sequence.save()
+    finite = sequence.run(state.now, sequence.created_by_id)  # type: ignore
+
+    sequence.repeat = Repeat(1, 2)
+    sequence.save()
+    endless = sequence.run(state.now, sequence.created_by_id)  # type: ignore
+
+    assert finite.repeat == Repeat(0, 2, count=3)
+    assert finite.total_duration == timedelta(minutes=3 * 35)
+    assert finite.ends_at == state.now + timedelta(minutes=3 * 35)
+    assert endless.repeat == Repeat(1, 2)
+    assert endless.total_duration is None
+    assert endless.ends_at is None
+
+    endless.pause(state.now + timedelta(days=2))
+    endless.unpause(state.now + timedelta(days=3))
+
+    assert endless.ends_at is None
+    assert not endless.is_ended(state.now + timedelta(days=365))
+
+
+@pytest.mark.django_db
+def test_with_state_matches_the_projections(state: State):
+    sequence = state.sequence_run.timer_sequence
+    assert sequence is not None
+    session_key: str = sequence.created_by_id  # type: ignore
+
+    paused = sequence.run(state.now, session_key)
+    paused.pause(state.now + timedelta(minutes=5))
+    resumed = sequence.run(state.now, session_key)
+    resumed.pause(state.now + timedelta(minutes=1))
+    resumed.unpause(state.now + timedelta(minutes=3))
+    ended = sequence.run(state.now - timedelta(hours=1), session_key)
+
+    now = state.now + timedelta(minutes=20)
+    runs = {x.pk: x for x in TimerSequenceRun.objects.with_state(now)}
+
+    for run in [state.sequence_run, paused, resumed, ended]:
+        projection = TimerProjection.from_timer_sequence_run(
+            now, run, run.pauses.order_by("started_at")
+        )
+        assert runs[run.pk].state == projection.state
+        assert runs[run.pk].state == TimerState.from_timer_sequence_run(now, run)
+
+    assert runs[resumed.pk].paused_duration == timedelta(minutes=2)
+    assert runs[resumed.pk].effective_ends_at == state.now + timedelta(minutes=37)
+    # 15 minutes paused so far, the 30 left would end from now on
+    assert runs[paused.pk].paused_duration == timedelta(minutes=15)
+    assert runs[paused.pk].effective_ends_at == now + timedelta(minutes=30)
+
+    assert list(
+        TimerSequenceRun.objects.with_state(now)
+        .filter(state=TimerState.running)
+        .order_by("effective_ends_at")
+        .values_list("pk", flat=True)
+    ) == [state.sequence_run.pk, resumed.pk]
+    assert list(
+        TimerSequenceRun.objects.ending(now, timedelta(minutes=16)).values_list(
+            "pk", flat=True
+        )
+    ) == [state.sequence_run.pk]
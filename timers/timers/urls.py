@@ -1,9 +1,20 @@
+from django.conf import settings
 from django.urls import path
 
-from timers.views import sequences
+from timers.views import metrics, sequences
+
+# native async views, for ASGI serving
+if settings.ASYNC_VIEWS:
+    list_sequences = sequences.alist_sequences
+    run_sequence = sequences.arun_sequence
+    detail_sequence_run = sequences.adetail_sequence_run
+else:
+    list_sequences = sequences.listSequences
+    run_sequence = sequences.run_sequence
+    detail_sequence_run = sequences.detail_sequence_run
 
 urlpatterns = [
-    path("", view=sequences.listSequences, name="sequences"),
+    path("", view=list_sequences, name="sequences"),
     path("sequences", view=sequences.createSequence, name="create_sequence"),
     path(
         "sequences/<int:sequence_id>",
@@ -12,12 +23,23 @@ urlpatterns = [
     ),
     path(
         "sequences/<int:sequence_id>/runs",
-        view=sequences.run_sequence,
+        view=run_sequence,
         name="run_sequence",
     ),
     path(
         "sequences/<int:sequence_id>/runs/<int:run_id>",
-        view=sequences.detail_sequence_run,
+        view=detail_sequence_run,
         name="detail_sequence_run",
     ),
+    path(
+        "sequences/<int:sequence_id>/runs/<int:run_id>/state",
+        view=sequences.sequence_run_state,
+        name="sequence_run_state",
+    ),
+    path(
+        "sequences/<int:sequence_id>/runs/<int:run_id>/events",
+        view=sequences.sequence_run_events,
+        name="sequence_run_events",
+    ),
+    path("metrics", view=metrics.metrics, name="metrics"),
 ]
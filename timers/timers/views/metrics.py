@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseNotFound
+
+from timers.lib.metrics import request_metrics
+from timers.lib.projections import run_timer_sequences
+
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    if request.META.get("REMOTE_ADDR") not in settings.INTERNAL_IPS:
+        return HttpResponseNotFound()
+
+    return HttpResponse(
+        request_metrics.to_prometheus() + run_timer_sequences.to_prometheus(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -1,65 +1,167 @@
-from typing import Iterable
+import asyncio
+import json
+from datetime import datetime, timedelta
+from functools import partial
+from typing import AsyncIterator
 
+from asgiref.sync import sync_to_async
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db import transaction
-from django.http import HttpRequest, HttpResponse, HttpResponseNotFound
+from django.db import models, transaction
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseNotFound,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import redirect, render
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
 from django.utils.dateparse import parse_duration
 from django.utils.translation import gettext as _
 
 from timers.forms import TimerSequenceDurationFormSet, TimerSequenceForm
-from timers.lib.projections import TimerProjection
+from timers.lib.broadcast import RunChange, run_changes
+from timers.lib.projections import TimerProjection, TimerState
+from timers.lib.scheduler import run_boundaries
+from timers.lib.timerange import from_microseconds, to_microseconds
 from timers.models import (
     TimerSequence,
     TimerSequenceDuration,
-    TimerSequencePause,
     TimerSequenceRun,
 )
 
+RUN_EVENTS_KEEPALIVE = timedelta(seconds=15)
+# sent by the run page to only get the timer block back
+RUN_FRAGMENT_HEADER = "Mzt-Fragment"
+
+
+SEQUENCES_PAGE_SIZE = 25
+# a card only has room for its first timers
+SEQUENCE_PREVIEW_TIMERS = 6
+
+
+def _ensure_session(request: HttpRequest, *, stored: bool = False) -> str:
+    """
+    Key of the visitor session, created on their first visit. With `stored`,
+    an unknown key (expired or forged) is replaced too, as the `created_by`
+    foreign keys need a stored session.
+    """
+    session = request.session
+    if not session.session_key or (stored and not session.exists(session.session_key)):
+        session.create()
+
+    return session.session_key  # type: ignore
+
+
+async def _aensure_session(request: HttpRequest, *, stored: bool = False) -> str:
+    session = request.session
+    if not session.session_key or (
+        stored and not await session.aexists(session.session_key)
+    ):
+        await session.acreate()
+
+    return session.session_key  # type: ignore
+
 
 def listSequences(request: HttpRequest):
-    session_key = request.session.session_key
-    if not session_key:
-        request.session.create()
-        request.session.save()
-        session_key = request.session.session_key
-
-    paginator = Paginator(
-        TimerSequence.objects.filter(created_by=session_key).prefetch_related(
-            "durations"
-        ),
-        25,
+    session_key = _ensure_session(request)
+    cursor = _parse_sequences_cursor(request.GET.get("after"))
+    page = list(_sequences_page(session_key, cursor))
+
+    return _render_sequences(request, page, cursor)
+
+
+async def alist_sequences(request: HttpRequest):
+    session_key = await _aensure_session(request)
+    cursor = _parse_sequences_cursor(request.GET.get("after"))
+    page = [x async for x in _sequences_page(session_key, cursor)]
+
+    return _render_sequences(request, page, cursor)
+
+
+def _sequences_page(
+    session_key: str, cursor: tuple[datetime, int] | None
+) -> models.QuerySet[TimerSequence]:
+    """
+    Keyset pagination over the (created_by, created_at, id) index, there is
+    no COUNT and deep pages cost the same as the first one. One more sequence
+    than the page size tells whether there is a next page.
+    """
+    sequences = TimerSequence.objects.filter(created_by=session_key)
+    if cursor is not None:
+        created_at, pk = cursor
+        sequences = sequences.filter(
+            models.Q(created_at__gt=created_at)
+            | models.Q(created_at=created_at, pk__gt=pk)
+        )
+
+    return sequences.order_by("created_at", "pk").prefetch_related(
+        models.Prefetch(
+            "durations",
+            queryset=TimerSequenceDuration.objects.filter(
+                index__lt=SEQUENCE_PREVIEW_TIMERS
+            ).order_by("index"),
+            to_attr="preview_durations",
+        )
+    )[: SEQUENCES_PAGE_SIZE + 1]
+
+
+def _render_sequences(
+    request: HttpRequest,
+    page: list[TimerSequence],
+    cursor: tuple[datetime, int] | None,
+) -> HttpResponse:
+    next_cursor = None
+    if len(page) > SEQUENCES_PAGE_SIZE:
+        page = page[:SEQUENCES_PAGE_SIZE]
+        next_cursor = f"{to_microseconds(page[-1].created_at)}.{page[-1].pk}"
+
+    return render(
+        request,
+        "sequences/list.html",
+        {
+            "sequences": page,
+            "next_cursor": next_cursor,
+            "is_first_page": cursor is None,
+        },
     )
-    page = request.GET.get("page")
-    sequences = paginator.get_page(page)
 
-    return render(request, "sequences/list.html", {"sequences": sequences})
+
+def _parse_sequences_cursor(value: str | None) -> tuple[datetime, int] | None:
+    created_at, _, pk = (value or "").partition(".")
+    if not created_at.isdigit() or not pk.isdigit():
+        return None
+
+    return from_microseconds(int(created_at)), int(pk)
 
 
 def createSequence(request: HttpRequest):
-    if not request.session.session_key:
-        request.session.create()
-        request.session.save()
+    session_key = _ensure_session(request, stored=request.method == "POST")
 
     if request.method == "POST":
         form = TimerSequenceForm(request.POST)
         formset = TimerSequenceDurationFormSet(request.POST)
 
+        timers: list[timedelta] = []
+        repeat = None
         if form.is_valid() and formset.is_valid():
-            name: str = form["name"].value()
             timers = [
                 duration
                 for x in formset
                 if (duration := parse_duration(x["duration"].value())) is not None
             ]
+            repeat = form.repeat(timers)
 
+        # `repeat` adds its errors to the form
+        if form.is_valid() and formset.is_valid():
+            name: str = form["name"].value()
             TimerSequence.create(
                 name=name,
                 timers=timers,
-                session_key=request.session.session_key,
+                session_key=session_key,
                 now=timezone.now(),
+                repeat=repeat,
             )
             messages.add_message(
                 request,
@@ -82,28 +184,44 @@ def createSequence(request: HttpRequest):
     return render(request, "sequences/create.html", {"form": form, "formset": formset})
 
 
-@transaction.atomic
 def update_sequence(request: HttpRequest, sequence_id: int) -> HttpResponse:
     sequence = TimerSequence.objects.get(pk=sequence_id)
     durations = TimerSequenceDuration.objects.filter(timer_sequence=sequence)
 
+    initial = {
+        "name": sequence.name,
+        **TimerSequenceForm.repeat_initial(sequence.repeat),
+    }
+
     if request.method == "POST":
-        form = TimerSequenceForm(request.POST, initial={"name": sequence.name})
+        form = TimerSequenceForm(request.POST, initial=initial)
         formset = TimerSequenceDurationFormSet(
             request.POST, initial=[{"duration": x.duration} for x in durations]
         )
 
+        timers: list[timedelta] = []
+        repeat = None
         if form.is_valid() and formset.is_valid():
-            if form.has_changed():
-                sequence.name = form["name"].value()
-                sequence.save()
+            timers = [
+                duration
+                for x in formset
+                if (duration := parse_duration(x["duration"].value())) is not None
+            ]
+            repeat = form.repeat(timers)
 
-            if formset.has_changed():
-                sequence.update_timers(
-                    duration
-                    for x in formset
-                    if (duration := parse_duration(x["duration"].value())) is not None
-                )
+        # `repeat` adds its errors to the form
+        if form.is_valid() and formset.is_valid():
+            # only the write holds the write lock, not the validation nor the
+            # rendering, the stored durations are read again under it
+            with transaction.atomic():
+                # saving moves `updated_at`, which keys the cached sequence cards
+                if form.has_changed():
+                    sequence.name = form["name"].value()
+                    sequence.repeat = repeat
+                    sequence.save()
+
+                if formset.has_changed():
+                    sequence.update_timers(timers)
 
             messages.add_message(
                 request,
@@ -121,7 +239,7 @@ def update_sequence(request: HttpRequest, sequence_id: int) -> HttpResponse:
             )
 
     else:
-        form = TimerSequenceForm(data={"name": sequence.name})
+        form = TimerSequenceForm(data=initial)
         formset = TimerSequenceDurationFormSet(
             initial=[{"duration": x.duration} for x in durations]
         )
@@ -137,42 +255,192 @@ def run_sequence(request: HttpRequest, sequence_id: int):
     if request.method != "POST":
         return HttpResponseNotFound()
 
-    session_key = request.session.session_key
-    if not session_key:
-        request.session.create()
-        request.session.save()
-        session_key = request.session.session_key
-
+    session_key = _ensure_session(request, stored=True)
     sequence = TimerSequence.objects.get(pk=sequence_id)
     run = sequence.run(timezone.now(), session_key)
+    run_boundaries.rearm(run)
+
+    return redirect("detail_sequence_run", sequence_id=sequence_id, run_id=run.pk)
+
+
+async def arun_sequence(request: HttpRequest, sequence_id: int):
+    if request.method != "POST":
+        return HttpResponseNotFound()
+
+    session_key = await _aensure_session(request, stored=True)
+    sequence = await TimerSequence.objects.aget(pk=sequence_id)
+    run = await sequence.arun(timezone.now(), session_key)
+    run_boundaries.rearm(run)
 
     return redirect("detail_sequence_run", sequence_id=sequence_id, run_id=run.pk)
 
 
-@transaction.atomic
 def detail_sequence_run(request: HttpRequest, sequence_id: int, run_id: int):
-    session_key = request.session.session_key
-    if not session_key:
-        request.session.create()
-        request.session.save()
-        session_key = request.session.session_key
+    session_key = _ensure_session(request)
+    runs = TimerSequenceRun.objects.filter(
+        pk=run_id, timer_sequence_id=sequence_id, created_by=session_key
+    )
+
+    # the pauses are published to the live updates on a toggle, otherwise
+    # they are only read when the run sequence is not cached
+    now = timezone.now()
+    run = (
+        _toggle_run(runs.with_pauses(), now) if request.method == "POST" else runs.get()
+    )
 
-    run = TimerSequenceRun.objects.get(
+    return _render_run(
+        request, run, TimerProjection.from_cached_timer_sequence_run(now, run)
+    )
+
+
+async def adetail_sequence_run(request: HttpRequest, sequence_id: int, run_id: int):
+    session_key = await _aensure_session(request)
+    runs = TimerSequenceRun.objects.filter(
         pk=run_id, timer_sequence_id=sequence_id, created_by=session_key
     )
 
+    now = timezone.now()
     if request.method == "POST":
-        run.toggle(timezone.now())  # type: ignore
-        run.refresh_from_db()
-
-    pauses: Iterable[TimerSequencePause] = TimerSequencePause.objects.filter(
-        timer_sequence_run=run
-    ).all()
-    timer = TimerProjection.from_timer_sequence_run(
-        now=timezone.now(), pauses=pauses, sequence_run=run
+        run = await sync_to_async(_toggle_run)(runs.with_pauses(), now)
+    else:
+        run = await runs.aget()
+
+    # looked up and built at once, the sequence cannot be evicted in between
+    timer = await TimerProjection.afrom_cached_timer_sequence_run(now, run)
+
+    return _render_run(request, run, timer)
+
+
+def _toggle_run(
+    runs: models.QuerySet[TimerSequenceRun], now: datetime
+) -> TimerSequenceRun:
+    # the run is read in the transaction that toggles it, and only the toggle
+    # holds the write lock, not the rendering
+    with transaction.atomic():
+        run = runs.get()
+        run.toggle(now)
+        transaction.on_commit(
+            partial(
+                run_changes.publish,
+                RunChange(sequence_run=run, pauses=list(run.get_pauses())),
+            )
+        )
+        transaction.on_commit(partial(run_boundaries.rearm, run))
+
+    return run
+
+
+def _render_run(
+    request: HttpRequest, run: TimerSequenceRun, timer: TimerProjection
+) -> HttpResponse:
+    """
+    The run page, only its timer block with the `RUN_FRAGMENT_HEADER` header,
+    or the projection when JSON is preferred, so that a toggle from the page
+    updates it in place.
+    """
+    if request.get_preferred_type(["text/html", "application/json"]) == (
+        "application/json"
+    ):
+        response: HttpResponse = JsonResponse(timer.to_json())
+    else:
+        response = render(
+            request,
+            "sequences/run-timer.html"
+            if RUN_FRAGMENT_HEADER in request.headers
+            else "sequences/run.html",
+            {
+                "timer": timer,
+                "sequence_id": run.timer_sequence_id,  # type: ignore
+                "run_id": run.pk,
+            },
+        )
+    patch_vary_headers(response, ["Accept", RUN_FRAGMENT_HEADER])
+    response["Cache-Control"] = "no-store"
+
+    return response
+
+
+def sequence_run_state(request: HttpRequest, sequence_id: int, run_id: int):
+    if request.method != "GET":
+        return HttpResponseNotFound()
+
+    try:
+        run = TimerSequenceRun.objects.get(
+            pk=run_id,
+            timer_sequence_id=sequence_id,
+            created_by=request.session.session_key,
+        )
+    except TimerSequenceRun.DoesNotExist:
+        return HttpResponseNotFound()
+
+    # the times of a running run are sent as instants, so the body only
+    # changes with the version, the state is part of the tag as a run ends
+    # without being mutated
+    now = timezone.now()
+    etag = 'W/"{id}-{version}-{state}"'.format(
+        id=run.pk,
+        version=run.version,
+        state=TimerState.from_timer_sequence_run(now, run),
     )
 
-    response = render(request, "sequences/run.html", {"timer": timer})
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        timer = TimerProjection.from_cached_timer_sequence_run(now, run)
+        response = JsonResponse(timer.to_anchored_json())
+
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+
+    return response
+
+
+async def sequence_run_events(request: HttpRequest, sequence_id: int, run_id: int):
+    try:
+        run = await TimerSequenceRun.objects.with_pauses().aget(
+            pk=run_id,
+            timer_sequence_id=sequence_id,
+            created_by=request.session.session_key,
+        )
+    except TimerSequenceRun.DoesNotExist:
+        return HttpResponseNotFound()
+
+    response = StreamingHttpResponse(
+        _stream_run_changes(RunChange(sequence_run=run, pauses=run.get_pauses())),
+        content_type="text/event-stream",
+    )
     response["Cache-Control"] = "no-store"
+    response["X-Accel-Buffering"] = "no"
 
     return response
+
+
+async def _stream_run_changes(change: RunChange) -> AsyncIterator[str]:
+    with run_changes.subscribe(change.sequence_run.pk) as queue:
+        while True:
+            now = timezone.now()
+            timer = TimerProjection.from_timer_sequence_run(
+                now=now, sequence_run=change.sequence_run, pauses=change.pauses
+            )
+            yield f"event: state\ndata: {json.dumps(timer.to_json())}\n\n"
+
+            # the next event is either a toggle or the end of the current timer
+            boundary = (
+                now + timer.remaining_time + timedelta(milliseconds=10)
+                if timer.state == TimerState.running
+                else None
+            )
+            while True:
+                timeout = RUN_EVENTS_KEEPALIVE
+                if boundary is not None:
+                    timeout = max(min(timeout, boundary - timezone.now()), timedelta())
+
+                try:
+                    change = await asyncio.wait_for(
+                        queue.get(), timeout.total_seconds()
+                    )
+                    break
+                except TimeoutError:
+                    if boundary is not None and timezone.now() >= boundary:
+                        break
+
+                    yield ": keep-alive\n\n"
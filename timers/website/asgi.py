@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "website.settings")
 
 application = get_asgi_application()
+
+# a single ASGI process serves the live updates, it also schedules the ends
+# of the running timers (see `timers.lib.scheduler`)
+from timers.lib.scheduler import run_boundaries  # noqa: E402
+
+run_boundaries.start()
@@ -24,9 +24,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = "django-insecure-mz_q1vgy7c%f=q*3o%)l*40(gtgy2d)cx!_hyqooksernzgaw#"
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get("MZT_DEBUG", "1") == "1"
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [x for x in os.environ.get("MZT_ALLOWED_HOSTS", "").split(",") if x]
 
 
 # Application definition
@@ -37,27 +37,48 @@ INSTALLED_APPS = [
     "django.contrib.contenttypes",
     "django.contrib.sessions",
     "django.contrib.messages",
-    "django.contrib.staticfiles",
+    "timers.apps.StaticFilesConfig",
     "timers.apps.TimersConfig",
-    "debug_toolbar",
 ]
 
 MIDDLEWARE = [
+    "timers.middleware.metrics_middleware",
     "django.middleware.security.SecurityMiddleware",
+    "timers.middleware.static_files_middleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
 ]
 
+# the toolbar is a development dependency, only used when installed
+try:
+    import debug_toolbar  # noqa: F401  # pyright: ignore[reportMissingTypeStubs]
+
+    DEBUG_TOOLBAR = DEBUG
+except ImportError:
+    DEBUG_TOOLBAR = False
+
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.append("debug_toolbar.middleware.DebugToolbarMiddleware")
+
+# serves the list and run views with their native async variants, which only
+# pays off under an ASGI server (see `website.asgi`)
+ASYNC_VIEWS = os.environ.get("MZT_ASYNC_VIEWS", "0") == "1"
+
+# share of the requests recorded by `timers.middleware.metrics_middleware`,
+# exposed to INTERNAL_IPS on /metrics, 0 turns the recording off
+METRICS_SAMPLE_RATE = float(os.environ.get("MZT_METRICS_SAMPLE_RATE", "0"))
+
 ROOT_URLCONF = "website.urls"
 
 TEMPLATES = [  # type: ignore
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # Django templates, timed for the metrics
+        "BACKEND": "timers.lib.metrics.InstrumentedDjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -83,6 +104,65 @@ DATABASES = {  # type: ignore
     }
 }
 
+# "production" tunes SQLite for concurrent writers:
+# - WAL lets readers run alongside the writer, and `synchronous=NORMAL` only
+#   syncs on checkpoints, which is durable enough in WAL mode
+# - transactions take the write lock when they begin: a deferred transaction
+#   that reads then writes fails with "database is locked" right away when
+#   another writer holds the lock, its busy timeout is never applied
+# - writers wait up to `timeout` seconds (SQLite's busy timeout) for the lock
+# - connections are kept between requests, checked before being reused
+#
+# The transaction mode is a connection option, Django cannot set it per
+# `atomic` block. It is harmless to set globally: requests are not atomic,
+# reads run in autocommit outside of any transaction, and every `atomic`
+# block of the app (toggles, creations, edits, cleanruns, the state
+# recompute, session saves) writes. Views only wrap their writes, never the
+# reads or the rendering of a GET.
+DATABASE_PROFILE = os.environ.get("MZT_DATABASE_PROFILE", "development")
+
+
+def database_profile_settings(profile: str) -> dict:
+    """Settings of the default database added by `profile`."""
+    if profile != "production":
+        return {}
+
+    return {
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;",
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
+    }
+
+
+DATABASES["default"].update(database_profile_settings(DATABASE_PROFILE))
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # rendered sequence cards, keyed by sequence and `updated_at`
+    "template_fragments": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "template-fragments",
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+}
+
+# Sessions
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/
+
+# visitors own their sequences through their session, its expiry is
+# refreshed on every request and written behind (see `timers.sessions`)
+SESSION_ENGINE = "timers.sessions"
+SESSION_SAVE_EVERY_REQUEST = True
+SESSION_EXPIRY_WRITE_INTERVAL = 24 * 60 * 60
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -120,6 +200,19 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 STATICFILES_DIRS = [os.path.join(BASE_DIR, "static_files")]
+# written by `scripts/build.static.sh`, served by
+# `timers.middleware.static_files_middleware` when DEBUG is off
+STATIC_ROOT = BASE_DIR / "static"
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    # content hashed and precompressed out of development, see `timers.storage`
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        if DEBUG
+        else "timers.storage.CompressedManifestStaticFilesStorage"
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -1,10 +1,15 @@
-from debug_toolbar.toolbar import (  # pyright: ignore[reportMissingTypeStubs]
-    debug_toolbar_urls,
-)
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("timers.urls")),
-] + debug_toolbar_urls()
+]
+
+if settings.DEBUG_TOOLBAR:
+    from debug_toolbar.toolbar import (  # pyright: ignore[reportMissingTypeStubs]
+        debug_toolbar_urls,
+    )
+
+    urlpatterns += debug_toolbar_urls()